@@ -26,6 +26,9 @@
 # THE SOFTWARE.
 # (https://github.com/bcj/AttrDict/blob/master/LICENSE.txt)
 
+import os
+import sys
+import tempfile
 from collections import MutableMapping
 
 import numpy as np
@@ -202,15 +205,47 @@ class pandapowerNet(ADict):
         return r
 
 
+def _categoricals_to_object(df):
+    """
+    Converts the categorical columns of df (see toolbox.compact_dtypes) to object in place, since a
+    categorical column does not accept values that are not one of its categories. Store df.dtypes
+    before, so that _preserve_dtypes converts the columns back after new entries are added.
+    """
+    for item, dtype in list(df.dtypes.iteritems()):
+        if pd.api.types.is_categorical_dtype(dtype):
+            df[item] = df[item].astype(object)
+
+
 def _preserve_dtypes(df, dtypes):
     for item, dtype in list(dtypes.iteritems()):
-        if df.dtypes.at[item] != dtype:
+        if pd.api.types.is_categorical_dtype(dtype):
+            if not pd.api.types.is_categorical_dtype(df[item]):
+                df[item] = df[item].astype("category")
+        elif df.dtypes.at[item] != dtype:
+            if dtype.kind in "iu":
+                dtype = _fitting_int_dtype(df[item].values, dtype)
             try:
                 df[item] = df[item].astype(dtype)
             except ValueError:
                 df[item] = df[item].astype(float)
 
 
+def _fitting_int_dtype(values, dtype):
+    """
+    Returns dtype or, if the values exceed its range, the smallest integer dtype that holds
+    all values.
+    """
+    try:
+        vmin, vmax = np.nanmin(values), np.nanmax(values)
+    except (TypeError, ValueError):
+        return dtype
+    if not (np.isfinite(vmin) and np.isfinite(vmax)):
+        return dtype
+    for v in (vmin, vmax):
+        dtype = np.promote_types(dtype, np.min_scalar_type(int(v)))
+    return dtype
+
+
 def get_free_id(df):
     """
     Returns next free ID in a dataframe
@@ -330,14 +365,78 @@ def _python_set_isolated_buses_oos(bus_in_service, ppc_bus_isolated, bus_lookup)
             bus_in_service[k] = False
 
 
+# modules which contain functions compiled by numba
+_numba_modules = ["pandapower.auxiliary", "pandapower.build_bus", "pandapower.pf.makeYbus",
+                  "pandapower.pf.create_jacobian_numba", "pandapower.pf.dSbus_dV_numba",
+                  "pandapower.pf.pfsoln"]
+
+
+def _numba_functions():
+    # the numba dispatchers of all imported modules in _numba_modules
+    functions = []
+    for name in _numba_modules:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        for obj in vars(module).values():
+            if hasattr(obj, "py_func") and hasattr(obj, "enable_caching") and \
+                    not any(obj is f for f in functions):
+                functions.append(obj)
+    return functions
+
+
+def set_numba_cache_dir(cache_dir, set_environment=False):
+    """
+    Sets the directory in which numba caches the compiled pandapower functions of this process,
+    so that they are not compiled again by the next python process. By default, numba caches next
+    to the source files or, if the installation is read-only, in the cache directory of the user.
+
+    Functions which have already been compiled in this process are not written to the new
+    directory, so this function should be called before the first power flow or pp.warmup().
+
+    INPUT:
+        **cache_dir** (string) - path of the cache directory
+
+    OPTIONAL:
+        **set_environment** (bool, False) - if True, the directory is also set as environment
+        variable NUMBA_CACHE_DIR, which is inherited by child processes
+
+    EXAMPLE:
+
+        >>> pp.set_numba_cache_dir(os.path.join("C:", "pandapower_cache"))
+
+    """
+    if set_environment:
+        os.environ["NUMBA_CACHE_DIR"] = cache_dir
+    try:
+        from numba import config
+    except ImportError:
+        return
+    config.CACHE_DIR = cache_dir
+    for function in _numba_functions():
+        function.enable_caching()
+
+
 try:
     get_values = jit(nopython=True, cache=True)(_get_values)
     set_elements_oos = jit(nopython=True, cache=True)(_python_set_elements_oos)
     set_isolated_buses_oos = jit(nopython=True, cache=True)(_python_set_isolated_buses_oos)
 except RuntimeError:
-    get_values = jit(nopython=True, cache=False)(_get_values)
-    set_elements_oos = jit(nopython=True, cache=False)(_python_set_elements_oos)
-    set_isolated_buses_oos = jit(nopython=True, cache=False)(_python_set_isolated_buses_oos)
+    # numba found no writable cache location (read-only installation and no writable user cache
+    # directory), so the temp directory is used for all pandapower modules
+    _cache_dir = os.path.join(tempfile.gettempdir(), "pandapower_numba_cache")
+    logger.info("no writable numba cache location found, using %s" % _cache_dir)
+    set_numba_cache_dir(_cache_dir)
+    try:
+        get_values = jit(nopython=True, cache=True)(_get_values)
+        set_elements_oos = jit(nopython=True, cache=True)(_python_set_elements_oos)
+        set_isolated_buses_oos = jit(nopython=True, cache=True)(_python_set_isolated_buses_oos)
+    except RuntimeError:
+        logger.warning("numba functions cannot be cached and are compiled in every process")
+        get_values = jit(nopython=True, cache=False)(_get_values)
+        set_elements_oos = jit(nopython=True, cache=False)(_python_set_elements_oos)
+        set_isolated_buses_oos = jit(nopython=True, cache=False)(
+            _python_set_isolated_buses_oos)
 
 
 def _select_is_elements_numba(net, isolated_nodes=None):
@@ -458,11 +557,13 @@ def _add_opf_options(net, trafo_loading, ac, v_debug=False, **kwargs):
 
 
 def _add_sc_options(net, fault, case, lv_tol_percent, tk_s, topology, r_fault_ohm,
-                    x_fault_ohm, kappa, ip, ith, consider_sgens, branch_results, kappa_method):
+                    x_fault_ohm, kappa, ip, ith, consider_sgens, branch_results, kappa_method,
+                    bus=None, return_all_currents=False, branch_chunk_size=None, n_threads=1):
     """
     creates dictionary for pf, opf and short circuit calculations from input parameters.
     """
     options = {
+        "bus": bus,
         "fault": fault,
         "case": case,
         "lv_tol_percent": lv_tol_percent,
@@ -475,7 +576,10 @@ def _add_sc_options(net, fault, case, lv_tol_percent, tk_s, topology, r_fault_oh
         "ith": ith,
         "consider_sgens": consider_sgens,
         "branch_results": branch_results,
-        "kappa_method": kappa_method
+        "kappa_method": kappa_method,
+        "return_all_currents": return_all_currents,
+        "branch_chunk_size": branch_chunk_size,
+        "n_threads": n_threads
     }
     _add_options(net, options)
 
@@ -505,14 +609,16 @@ def _clean_up(net, res=True):
         net["bus"].drop(buses_3w, inplace=True)
         net["trafo3w"].drop(["ad_bus"], axis=1, inplace=True)
         if res:
-            res_bus.drop(buses_3w, inplace=True)
+            # the short-circuit results may only hold a subset of the buses
+            res_bus.drop(res_bus.index.intersection(buses_3w), inplace=True)
 
     if len(net["xward"]) > 0:
         xward_buses = net["xward"]["ad_bus"].values
         net["bus"].drop(xward_buses, inplace=True)
         net["xward"].drop(["ad_bus"], axis=1, inplace=True)
         if res:
-            res_bus.drop(xward_buses, inplace=True)
+            # the short-circuit results may only hold a subset of the buses
+            res_bus.drop(res_bus.index.intersection(xward_buses), inplace=True)
 
     if len(net["dcline"]) > 0:
         dc_gens = net.gen.index[(len(net.gen) - len(net.dcline) * 2):]
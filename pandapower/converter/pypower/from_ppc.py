@@ -4,12 +4,15 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
+from collections import OrderedDict
 from math import pi
-from numpy import sign, nan, append, zeros, array, power, sqrt, where
+from numpy import sign, nan, zeros, array, power, sqrt, where, arange, unique, full, \
+    empty, cumsum, bincount, isin, isnan
 from numpy import max as max_
 from pandas import Series, DataFrame, concat
 
 import pandapower as pp
+from pandapower.auxiliary import get_free_id, _categoricals_to_object, _preserve_dtypes
 
 try:
     import pplog as logging
@@ -28,41 +31,100 @@ ppc_elms = ["bus", "branch", "gen"]
 
 
 def _create_costs(net, ppc, gen_lookup, type, idx):
-    if ppc['gencost'][idx, 0] == 1:
-        if not len(ppc['gencost'][idx, 4:]) == 2*ppc['gencost'][idx, 3]:
-            logger.error("In gencost line %s, the number n does not fit to the number of values" %
-                         idx)
-        pp.create_piecewise_linear_cost(net, gen_lookup.element.at[idx],
-                                        gen_lookup.element_type.at[idx],
-                                        - ppc['gencost'][idx, 4:], type)
-    elif ppc['gencost'][idx, 0] == 2:
-        if len(ppc['gencost'][idx, 4:]) == ppc['gencost'][idx, 3]:
-            n = len(ppc['gencost'][idx, 4:])
-            values = ppc['gencost'][idx, 4:] / power(1e3, array(range(n))[::-1])
+    gencost = ppc['gencost']
+    polynomial = []
+    for i in idx:
+        if gencost[i, 0] == 1:
+            if not len(gencost[i, 4:]) == 2*gencost[i, 3]:
+                logger.error("In gencost line %s, the number n does not fit to the number of "
+                             "values" % i)
+            pp.create_piecewise_linear_cost(net, gen_lookup.element.at[i],
+                                            gen_lookup.element_type.at[i],
+                                            - gencost[i, 4:], type)
+        elif gencost[i, 0] == 2:
+            if len(gencost[i, 4:]) == gencost[i, 3]:
+                polynomial.append(i)
+            else:
+                logger.error("In gencost line %s, the number n does not fit to the number of "
+                             "values" % i)
         else:
-            logger.error("In gencost line %s, the number n does not fit to the number of values" %
-                         idx)
-        pp.create_polynomial_cost(net, gen_lookup.element.at[idx], gen_lookup.element_type.at[idx],
-                                  - values, type)
-    else:
-        logger.info("Cost mode of gencost line %s is unknown." % idx)
+            logger.info("Cost mode of gencost line %s is unknown." % i)
+    # the polynomial costs are created at once
+    n = gencost.shape[1] - 4
+    c = empty(len(polynomial), dtype=object)
+    for j, i in enumerate(polynomial):
+        c[j] = (- gencost[i, 4:] / power(1e3, arange(n)[::-1])).reshape((1, -1))
+    _add_elements(net, "polynomial_cost", [
+        ("type", type), ("element", gen_lookup.element.values[polynomial]),
+        ("element_type", gen_lookup.element_type.values[polynomial]), ("c", c)])
+
+
+def _add_elements(net, element, columns):
+    """
+    Appends one row per entry of the column arrays to net[element] and keeps the dtypes of the
+    existing columns. Columns which are new to an empty table get the dtype of the new entries, as
+    with the create functions. columns is a list of (column name, values) tuples; scalar values
+    are used for all rows, the order of the tuples gives the order of the new columns. Returns the
+    indices of the new rows.
+    """
+    n = max([len(v) for _, v in columns if hasattr(v, "__len__") and not isinstance(v, str)])
+    start = get_free_id(net[element])
+    index = arange(start, start + n)
+    if not n:
+        return index
+    dtypes = net[element].dtypes
+    _categoricals_to_object(net[element])
+    new = DataFrame(OrderedDict(columns), index=index)
+    if not len(net[element].index):
+        dtypes = dtypes.append(new.dtypes[[c for c in new.columns if c not in dtypes.index]])
+    table_columns = list(net[element].columns) + [c for c in new.columns if c not in
+                                                  net[element].columns]
+    try:
+        net[element] = concat([net[element], new], sort=False)[table_columns]
+    except TypeError:
+        # legacy pandas < 0.21
+        net[element] = concat([net[element], new])[table_columns]
+    _preserve_dtypes(net[element], dtypes)
+    return index
+
 
+def _log_indices(mask, message):
+    if mask.any():
+        logger.info(message % list(where(mask)[0]))
 
-def _gen_bus_info(ppc, idx_gen):
-    bus_name = int(ppc["gen"][idx_gen, 0])
-    # assumption: there is only one bus with this bus_name:
-    idx_bus = int(where(ppc["bus"][:, 0] == bus_name)[0][0])
-    current_bus_type = int(ppc["bus"][idx_bus, 1])
 
-    same_bus_gen_idx = where(ppc["gen"][:, 0] == ppc["gen"][idx_gen, 0])[0].astype(int)
-    same_bus_in_service_gen_idx = same_bus_gen_idx[where(ppc["gen"][same_bus_gen_idx, 7] > 0)]
-    first_same_bus_in_service_gen_idx = same_bus_in_service_gen_idx[0] if len(
-        same_bus_in_service_gen_idx) else None
-    last_same_bus_in_service_gen_idx = same_bus_in_service_gen_idx[-1] if len(
-        same_bus_in_service_gen_idx) else None
+def _bus_lookup(ppc):
+    """ Maps the pypower bus numbers to the positions in ppc["bus"] """
+    return Series(arange(ppc["bus"].shape[0]), index=ppc["bus"][:, 0].astype(int))
 
-    return current_bus_type, idx_bus, same_bus_gen_idx, first_same_bus_in_service_gen_idx, \
-        last_same_bus_in_service_gen_idx
+
+def _branch_buses(ppc, bus_lookup):
+    try:
+        return bus_lookup.loc[ppc["branch"][:, 0].astype(int)].values, \
+            bus_lookup.loc[ppc["branch"][:, 1].astype(int)].values
+    except KeyError:
+        raise UserWarning("The ppc branch data refers to buses which do not exist in ppc['bus']")
+
+
+def _gen_types(ppc, gen_bus):
+    """
+    Returns boolean masks of the pypower generators which are converted to ext_grid, gen and sgen.
+    At slack and pv buses, the first generator in service becomes the ext_grid or gen and all
+    other generators at the same bus become sgens. Generators at isolated buses are not converted.
+    The last return value is the voltage setpoint per bus position, which is given by the last
+    generator in service at the bus.
+    """
+    bus_type = ppc["bus"][gen_bus, 1].astype(int)
+    in_service = where(ppc["gen"][:, 7] > 0)[0]
+    first = zeros(len(gen_bus), dtype=bool)
+    first[in_service[unique(gen_bus[in_service], return_index=True)[1]]] = True
+    last = in_service[::-1][unique(gen_bus[in_service][::-1], return_index=True)[1]]
+    vm_bus = full(ppc["bus"].shape[0], nan)
+    vm_bus[gen_bus[last]] = ppc["gen"][last, 5]
+    is_eg = first & (bus_type == 3)
+    is_gen = first & (bus_type == 2)
+    is_sgen = (~first & ((bus_type == 2) | (bus_type == 3))) | (bus_type == 1)
+    return is_eg, is_gen, is_sgen, vm_bus
 
 
 def from_ppc(ppc, f_hz=50, validate_conversion=False, **kwargs):
@@ -109,151 +171,129 @@ def from_ppc(ppc, f_hz=50, validate_conversion=False, **kwargs):
 
     net = pp.create_empty_network(f_hz=f_hz, sn_kva=baseMVA*1e3)
 
+    # all element tables are created at once from the ppc arrays, the element indices are the
+    # positions in the ppc arrays (buses) or follow their order (all other elements)
+    bus = ppc['bus']
+    n_bus = bus.shape[0]
+    bus_lookup = _bus_lookup(ppc)
+
     # --- bus data -> create buses, sgen, load, shunt
-    for i in range(len(ppc['bus'])):
-        # create buses
-        pp.create_bus(net, name=int(ppc['bus'][i, 0]), vn_kv=ppc['bus'][i, 9], type="b",
-                      zone=ppc['bus'][i, 6], in_service=bool(ppc['bus'][i, 1] != 4),
-                      max_vm_pu=ppc['bus'][i, 11], min_vm_pu=ppc['bus'][i, 12])
-        # create sgen, load
-        if ppc['bus'][i, 2] > 0:
-            pp.create_load(net, i, p_kw=ppc['bus'][i, 2] * 1e3, q_kvar=ppc['bus'][i, 3] * 1e3,
-                           controllable=False)
-        elif ppc['bus'][i, 2] < 0:
-            pp.create_sgen(net, i, p_kw=ppc['bus'][i, 2] * 1e3, q_kvar=ppc['bus'][i, 3] * 1e3,
-                           type="", controllable=False)
-        elif ppc['bus'][i, 3] != 0:
-            pp.create_load(net, i, p_kw=ppc['bus'][i, 2] * 1e3, q_kvar=ppc['bus'][i, 3] * 1e3,
-                           controllable=False)
-        # create shunt
-        if ppc['bus'][i, 4] != 0 or ppc['bus'][i, 5] != 0:
-            pp.create_shunt(net, i, p_kw=ppc['bus'][i, 4] * 1e3,
-                            q_kvar=-ppc['bus'][i, 5] * 1e3)
+    _add_elements(net, "bus", [
+        ("name", bus[:, 0].astype(int).astype(object)), ("vn_kv", bus[:, 9]), ("type", "b"),
+        ("zone", bus[:, 6].astype(object)), ("in_service", bus[:, 1] != 4),
+        ("min_vm_pu", bus[:, 12]), ("max_vm_pu", bus[:, 11])])
+    is_load = (bus[:, 2] > 0) | ((bus[:, 2] == 0) & (bus[:, 3] != 0))
+    is_sgen = bus[:, 2] < 0
+    for element, mask, type_ in [("load", is_load, None), ("sgen", is_sgen, "")]:
+        buses = where(mask)[0]
+        columns = [("name", None), ("bus", buses), ("p_kw", bus[buses, 2] * 1e3),
+                   ("q_kvar", bus[buses, 3] * 1e3), ("sn_kva", nan), ("scaling", 1.),
+                   ("in_service", True), ("type", type_), ("controllable", False)]
+        if element == "load":
+            columns += [("const_z_percent", 0.), ("const_i_percent", 0.)]
+        _add_elements(net, element, columns)
+    buses = where((bus[:, 4] != 0) | (bus[:, 5] != 0))[0]
+    _add_elements(net, "shunt", [
+        ("bus", buses), ("name", None), ("p_kw", bus[buses, 4] * 1e3),
+        ("q_kvar", -bus[buses, 5] * 1e3), ("vn_kv", bus[buses, 9]), ("step", 1),
+        ("max_step", 1), ("in_service", True)])
     # unused data of ppc: Vm, Va (partwise: in ext_grid), zone
 
     # --- gen data -> create ext_grid, gen, sgen
-    gen_lookup = DataFrame(nan, columns=['element', 'element_type'],
-                           index=range(len(ppc['gen'][:, 0])))
     # if in ppc is only one gen -> numpy initially uses one dim array -> change to two dim array
     if len(ppc["gen"].shape) == 1:
         ppc["gen"] = array(ppc["gen"], ndmin=2)
-    for i in range(len(ppc['gen'][:, 0])):
-        current_bus_type, current_bus_idx, same_bus_gen_idx, first_same_bus_in_service_gen_idx, \
-            last_same_bus_in_service_gen_idx = _gen_bus_info(ppc, i)
-        # create ext_grid
-        if current_bus_type == 3:
-            if i == first_same_bus_in_service_gen_idx:
-                gen_lookup.element.loc[i] = pp.create_ext_grid(
-                    net, bus=current_bus_idx, vm_pu=ppc['gen'][last_same_bus_in_service_gen_idx, 5],
-                    va_degree=ppc['bus'][current_bus_idx, 8], in_service=bool(ppc['gen'][i, 7] > 0),
-                    max_p_kw=-ppc['gen'][i, 9] * 1e3, min_p_kw=-ppc['gen'][i, 8] * 1e3,
-                    max_q_kvar=-ppc['gen'][i, 4] * 1e3, min_q_kvar=-ppc['gen'][i, 3] * 1e3)
-                gen_lookup.element_type.loc[i] = 'ext_grid'
-                if ppc['gen'][i, 4] > ppc['gen'][i, 3]:
-                    logger.info('min_q_kvar of gen %d must be less than max_q_kvar but is not.' % i)
-                if -ppc['gen'][i, 9] < -ppc['gen'][i, 8]:
-                    logger.info('max_p_kw of gen %d must be less than min_p_kw but is not.' % i)
-            else:
-                current_bus_type = 1
-        # create gen
-        elif current_bus_type == 2:
-            if i == first_same_bus_in_service_gen_idx:
-                gen_lookup.element.loc[i] = pp.create_gen(
-                    net, bus=current_bus_idx, vm_pu=ppc['gen'][last_same_bus_in_service_gen_idx, 5],
-                    p_kw=-ppc['gen'][i, 1] * 1e3,
-                    in_service=bool(ppc['gen'][i, 7] > 0), controllable=True,
-                    max_p_kw=-ppc['gen'][i, 9] * 1e3, min_p_kw=-ppc['gen'][i, 8] * 1e3,
-                    max_q_kvar=-ppc['gen'][i, 4] * 1e3, min_q_kvar=-ppc['gen'][i, 3] * 1e3)
-                gen_lookup.element_type.loc[i] = 'gen'
-                if ppc['gen'][i, 1] < 0:
-                    logger.info('p_kw of gen %d must be less than zero but is not.' % i)
-                if ppc['gen'][i, 4] > ppc['gen'][i, 3]:
-                    logger.info('min_q_kvar of gen %d must be less than max_q_kvar but is not.' % i)
-                if -ppc['gen'][i, 9] < -ppc['gen'][i, 8]:
-                    logger.info('max_p_kw of gen %d must be less than min_p_kw but is not.' % i)
-            else:
-                current_bus_type = 1
-        # create sgen
-        if current_bus_type == 1:
-            gen_lookup.element.loc[i] = pp.create_sgen(
-                net, bus=current_bus_idx, p_kw=-ppc['gen'][i, 1] * 1e3,
-                q_kvar=-ppc['gen'][i, 2] * 1e3, type="", in_service=bool(ppc['gen'][i, 7] > 0),
-                max_p_kw=-ppc['gen'][i, 9] * 1e3, min_p_kw=-ppc['gen'][i, 8] * 1e3,
-                max_q_kvar=-ppc['gen'][i, 4] * 1e3, min_q_kvar=-ppc['gen'][i, 3] * 1e3,
-                controllable=True)
-            gen_lookup.element_type.loc[i] = 'sgen'
-            if ppc['gen'][i, 1] < 0:
-                logger.info('p_kw of sgen %d must be less than zero but is not.' % i)
-            if ppc['gen'][i, 4] > ppc['gen'][i, 3]:
-                logger.info('min_q_kvar of gen %d must be less than max_q_kvar but is not.' % i)
-            if -ppc['gen'][i, 9] < -ppc['gen'][i, 8]:
-                logger.info('max_p_kw of gen %d must be less than min_p_kw but is not.' % i)
+    gen = ppc['gen']
+    gen_lookup = DataFrame(nan, columns=['element', 'element_type'], index=range(gen.shape[0]))
+    gen_lookup["element_type"] = gen_lookup.element_type.astype(object)
+    gen_bus = bus_lookup.loc[gen[:, 0].astype(int)].values
+    is_eg, is_gen, is_sgen, vm_bus = _gen_types(ppc, gen_bus)
+    for element, mask in [("ext_grid", is_eg), ("gen", is_gen), ("sgen", is_sgen)]:
+        gens = where(mask)[0]
+        buses = gen_bus[gens]
+        columns = [("name", None), ("bus", buses), ("in_service", gen[gens, 7] > 0),
+                   ("min_p_kw", -gen[gens, 8] * 1e3), ("max_p_kw", -gen[gens, 9] * 1e3),
+                   ("min_q_kvar", -gen[gens, 3] * 1e3), ("max_q_kvar", -gen[gens, 4] * 1e3)]
+        if element == "ext_grid":
+            columns += [("vm_pu", vm_bus[buses]), ("va_degree", bus[buses, 8])]
+        else:
+            columns += [("p_kw", -gen[gens, 1] * 1e3), ("sn_kva", nan), ("scaling", 1.),
+                        ("controllable", True)]
+        if element == "gen":
+            columns += [("vm_pu", vm_bus[buses]), ("type", None)]
+        elif element == "sgen":
+            columns += [("q_kvar", -gen[gens, 2] * 1e3), ("type", "")]
+        gen_lookup.loc[gens, "element"] = _add_elements(net, element, columns)
+        gen_lookup.loc[gens, "element_type"] = element
+        if element != "ext_grid":
+            _log_indices(mask & (gen[:, 1] < 0),
+                         'p_kw of ' + element + ' %s must be less than zero but is not.')
+    converted = is_eg | is_gen | is_sgen
+    _log_indices(converted & (gen[:, 4] > gen[:, 3]),
+                 'min_q_kvar of gen %s must be less than max_q_kvar but is not.')
+    _log_indices(converted & (-gen[:, 9] < -gen[:, 8]),
+                 'max_p_kw of gen %s must be less than min_p_kw but is not.')
     # unused data of ppc: Vg (partwise: in ext_grid and gen), mBase, Pc1, Pc2, Qc1min, Qc1max,
     # Qc2min, Qc2max, ramp_agc, ramp_10, ramp_30,ramp_q, apf
 
     # --- branch data -> create line, trafo
-    for i in range(len(ppc['branch'])):
-        from_bus = pp.get_element_index(net, 'bus', name=int(ppc['branch'][i, 0]))
-        to_bus = pp.get_element_index(net, 'bus', name=int(ppc['branch'][i, 1]))
-
-        from_vn_kv = ppc['bus'][from_bus, 9]
-        to_vn_kv = ppc['bus'][to_bus, 9]
-        if (from_vn_kv == to_vn_kv) & ((ppc['branch'][i, 8] == 0) | (ppc['branch'][i, 8] == 1)) & \
-           (ppc['branch'][i, 9] == 0):  # create line
-            Zni = ppc['bus'][to_bus, 9]**2/baseMVA  # ohm
-            max_i_ka = ppc['branch'][i, 5]/ppc['bus'][to_bus, 9]/sqrt(3)
-            if max_i_ka == 0.0:
-                max_i_ka = MAX_VAL
-                logger.debug("ppc branch rateA is zero -> Using MAX_VAL instead to calculate " +
-                             "maximum branch flow")
-            pp.create_line_from_parameters(
-                net, from_bus=from_bus, to_bus=to_bus, length_km=1,
-                r_ohm_per_km=ppc['branch'][i, 2]*Zni, x_ohm_per_km=ppc['branch'][i, 3]*Zni,
-                c_nf_per_km=ppc['branch'][i, 4]/Zni/omega*1e9/2,
-                max_i_ka=max_i_ka, type='ol', max_loading_percent=100,
-                in_service=bool(ppc['branch'][i, 10]))
-
-        else:  # create transformer
-            if from_vn_kv >= to_vn_kv:
-                hv_bus = from_bus
-                vn_hv_kv = from_vn_kv
-                lv_bus = to_bus
-                vn_lv_kv = to_vn_kv
-                tp_side = 'hv'
-            else:
-                hv_bus = to_bus
-                vn_hv_kv = to_vn_kv
-                lv_bus = from_bus
-                vn_lv_kv = from_vn_kv
-                tp_side = 'lv'
-                if from_vn_kv == to_vn_kv:
-                    logger.warning('The pypower branch %d (from_bus, to_bus)=(%d, %d) is considered'
-                                   ' as a transformer because of a ratio != 0 | 1 but it connects '
-                                   'the same voltage level', i, ppc['branch'][i, 0],
-                                   ppc['branch'][i, 1])
-            rk = ppc['branch'][i, 2]
-            xk = ppc['branch'][i, 3]
-            zk = (rk ** 2 + xk ** 2) ** 0.5
-            sn = ppc['branch'][i, 5] * 1e3
-            if sn == 0.0:
-                sn = MAX_VAL
-                logger.debug("ppc branch rateA is zero -> Using MAX_VAL instead to calculate " +
-                             "apparent power")
-            ratio_1 = 0 if ppc['branch'][i, 8] == 0 else (ppc['branch'][i, 8] - 1) * 100
-            i0_percent = -ppc['branch'][i, 4] * 100 * baseMVA * 1e3 / sn
-            if i0_percent < 0:
-                logger.info('A transformer always behaves inductive consumpting but the '
-                            'susceptance of pypower branch %d (from_bus, to_bus)=(%d, %d) is '
-                            'positive.', i, ppc['branch'][i, 0], ppc['branch'][i, 1])
-
-            pp.create_transformer_from_parameters(
-                net, hv_bus=hv_bus, lv_bus=lv_bus, sn_kva=sn, vn_hv_kv=vn_hv_kv,
-                vn_lv_kv=vn_lv_kv, vsc_percent=sign(xk) * zk * sn / 1e3 * 100 / baseMVA,
-                vscr_percent=rk * sn / 1e3 * 100 / baseMVA, max_loading_percent=100,
-                pfe_kw=0, i0_percent=i0_percent, shift_degree=ppc['branch'][i, 9],
-                tp_st_percent=abs(ratio_1) if ratio_1 else nan,
-                tp_pos=sign(ratio_1) if ratio_1 else nan,
-                tp_side=tp_side if ratio_1 else None, tp_mid=0 if ratio_1 else nan)
+    branch = ppc['branch']
+    from_bus, to_bus = _branch_buses(ppc, bus_lookup)
+    from_vn_kv = bus[from_bus, 9]
+    to_vn_kv = bus[to_bus, 9]
+    is_line = (from_vn_kv == to_vn_kv) & ((branch[:, 8] == 0) | (branch[:, 8] == 1)) & \
+        (branch[:, 9] == 0)
+
+    # lines
+    lines = where(is_line)[0]
+    Zni = to_vn_kv[lines]**2/baseMVA  # ohm
+    max_i_ka = branch[lines, 5]/to_vn_kv[lines]/sqrt(3)
+    if (max_i_ka == 0.0).any():
+        max_i_ka[max_i_ka == 0.0] = MAX_VAL
+        logger.debug("ppc branch rateA is zero -> Using MAX_VAL instead to calculate " +
+                     "maximum branch flow")
+    _add_elements(net, "line", [
+        ("name", None), ("std_type", None), ("from_bus", from_bus[lines]),
+        ("to_bus", to_bus[lines]), ("length_km", 1.), ("r_ohm_per_km", branch[lines, 2]*Zni),
+        ("x_ohm_per_km", branch[lines, 3]*Zni),
+        ("c_nf_per_km", branch[lines, 4]/Zni/omega*1e9/2), ("g_us_per_km", 0.),
+        ("max_i_ka", max_i_ka), ("df", 1.), ("parallel", 1), ("type", "ol"),
+        ("in_service", branch[lines, 10].astype(bool)), ("max_loading_percent", 100.)])
+
+    # transformers
+    _log_indices(~is_line & (from_vn_kv == to_vn_kv),
+                 'The pypower branches %s are considered as transformers because of a ratio '
+                 '!= 0 | 1 but they connect the same voltage level.')
+    trafos = where(~is_line)[0]
+    hv_is_from = from_vn_kv[trafos] >= to_vn_kv[trafos]
+    hv_bus = where(hv_is_from, from_bus[trafos], to_bus[trafos])
+    lv_bus = where(hv_is_from, to_bus[trafos], from_bus[trafos])
+    rk = branch[trafos, 2]
+    xk = branch[trafos, 3]
+    zk = (rk ** 2 + xk ** 2) ** 0.5
+    sn = branch[trafos, 5] * 1e3
+    if (sn == 0.0).any():
+        sn[sn == 0.0] = MAX_VAL
+        logger.debug("ppc branch rateA is zero -> Using MAX_VAL instead to calculate " +
+                     "apparent power")
+    ratio = branch[trafos, 8]
+    ratio_1 = where(ratio == 0, 0, (ratio - 1) * 100)
+    has_tap = ratio_1 != 0
+    i0_percent = -branch[trafos, 4] * 100 * baseMVA * 1e3 / sn
+    if (i0_percent < 0).any():
+        logger.info('A transformer always behaves inductive consumpting but the susceptance of '
+                    'pypower branches %s is positive.' % list(trafos[i0_percent < 0]))
+    _add_elements(net, "trafo", [
+        ("name", None), ("std_type", None), ("hv_bus", hv_bus), ("lv_bus", lv_bus),
+        ("sn_kva", sn), ("vn_hv_kv", bus[hv_bus, 9]), ("vn_lv_kv", bus[lv_bus, 9]),
+        ("vsc_percent", sign(xk) * zk * sn / 1e3 * 100 / baseMVA),
+        ("vscr_percent", rk * sn / 1e3 * 100 / baseMVA), ("pfe_kw", 0.),
+        ("i0_percent", i0_percent), ("shift_degree", branch[trafos, 9]),
+        ("tp_side", where(has_tap, where(hv_is_from, "hv", "lv"), None)),
+        ("tp_mid", where(has_tap, 0., nan)), ("tp_min", nan), ("tp_max", nan),
+        ("tp_st_percent", where(has_tap, abs(ratio_1), nan)), ("tp_st_degree", nan),
+        ("tp_pos", where(has_tap, sign(ratio_1), nan)), ("tp_phase_shifter", False),
+        ("parallel", 1), ("df", 1.), ("in_service", True), ("max_loading_percent", 100.)])
     # unused data of ppc: rateB, rateC
 
     # --- gencost -> create polynomial_cost, piecewise_cost
@@ -270,10 +310,8 @@ def from_ppc(ppc, f_hz=50, validate_conversion=False, **kwargs):
         if ppc['gencost'].shape[0] >= 2*gen_lookup.shape[0]:
             idx_p = range(gen_lookup.shape[0])
             idx_q = range(gen_lookup.shape[0], 2*gen_lookup.shape[0])
-        for idx in idx_p:
-            _create_costs(net, ppc, gen_lookup, 'p', idx)
-        for idx in idx_q:
-            _create_costs(net, ppc, gen_lookup, 'q', idx)
+        _create_costs(net, ppc, gen_lookup, 'p', idx_p)
+        _create_costs(net, ppc, gen_lookup, 'q', idx_q)
 
     # areas are unconverted
 
@@ -285,6 +323,24 @@ def from_ppc(ppc, f_hz=50, validate_conversion=False, **kwargs):
     return net
 
 
+def _results_in_ppc_order(net, element, key_columns, result_columns, keys):
+    """
+    Returns the results of the pandapower elements in the order of the ppc rows with the given
+    keys (e.g. the buses of the generators). The n-th ppc row with a certain key gets the results of
+    the n-th pandapower element with this key, which considers parallel elements.
+    """
+    elements = DataFrame(net[element][key_columns].values, columns=key_columns)
+    elements["number"] = elements.groupby(key_columns).cumcount()
+    elements["position"] = arange(len(elements))
+    rows = DataFrame(dict(zip(key_columns, keys)), columns=key_columns)
+    rows["number"] = rows.groupby(key_columns).cumcount() if len(rows) else []
+    position = rows.merge(elements, how="left", on=key_columns + ["number"]).position.values
+    if isnan(position.astype(float)).any():
+        raise UserWarning("The %s table does not contain all elements of the ppc" % element)
+    return net["res_" + element].loc[net[element].index, result_columns].values[
+        position.astype(int)]
+
+
 def _validate_diff_res(diff_res, max_diff_values):
     to_iterate = set(max_diff_values.keys()) & {'gen_q_kvar', 'branch_p_kw', 'branch_q_kvar',
                                                 'gen_p_kw', 'bus_va_degree', 'bus_vm_pu'}
@@ -446,6 +502,9 @@ def validate_from_ppc(ppc_net, pp_net, pf_type="runpp", max_diff_values={
         return False
 
     # --- store pypower powerflow results
+    # if in ppc is only one gen -> numpy initially uses one dim array -> change to two dim array
+    if len(ppc_net["gen"].shape) == 1:
+        ppc_net["gen"] = array(ppc_net["gen"], ndmin=2)
     ppc_res = dict.fromkeys(ppc_elms)
     ppc_res["branch"] = ppc_net['branch'][:, 13:17]
     ppc_res["bus"] = ppc_net['bus'][:, 7:9]
@@ -456,100 +515,38 @@ def validate_from_ppc(ppc_net, pp_net, pf_type="runpp", max_diff_values={
     pp_res["bus"] = array(pp_net.res_bus.sort_index()[['vm_pu', 'va_degree']])
 
     # --- pandapower gen result table
-    pp_res["gen"] = zeros([1, 2])
-    # consideration of parallel generators via storing how much generators have been considered
-    # each node
-    # if in ppc is only one gen -> numpy initially uses one dim array -> change to two dim array
-    if len(ppc_net["gen"].shape) == 1:
-        ppc_net["gen"] = array(ppc_net["gen"], ndmin=2)
-    GENS = DataFrame(ppc_net['gen'][:, [0]].astype(int))
-    GEN_uniq = GENS.drop_duplicates()
-    already_used_gen = Series(zeros(GEN_uniq.shape[0]).astype(int),
-                              index=[int(v) for v in GEN_uniq.values])
-    change_q_compare = []
-    for i, j in GENS.iterrows():
-        current_bus_type, current_bus_idx, same_bus_gen_idx, first_same_bus_in_service_gen_idx, \
-            last_same_bus_in_service_gen_idx = _gen_bus_info(ppc_net, i)
-        if current_bus_type == 3 and i == first_same_bus_in_service_gen_idx:
-            pp_res["gen"] = append(pp_res["gen"], array(pp_net.res_ext_grid[
-                    pp_net.ext_grid.bus == current_bus_idx][['p_kw', 'q_kvar']]).reshape((1, 2)), 0)
-        elif current_bus_type == 2 and i == first_same_bus_in_service_gen_idx:
-            pp_res["gen"] = append(pp_res["gen"], array(pp_net.res_gen[
-                    pp_net.gen.bus == current_bus_idx][['p_kw', 'q_kvar']]).reshape((1, 2)), 0)
-        else:
-            pp_res["gen"] = append(pp_res["gen"], array(pp_net.res_sgen[
-                pp_net.sgen.bus == current_bus_idx][['p_kw', 'q_kvar']])[
-                already_used_gen.at[int(j)]].reshape((1, 2)), 0)
-            already_used_gen.at[int(j)] += 1
-            change_q_compare += [int(j)]
-    pp_res["gen"] = pp_res["gen"][1:, :]  # delete initial zero row
+    gen_bus = _bus_lookup(ppc_net).loc[ppc_net['gen'][:, 0].astype(int)].values
+    is_eg, is_gen = _gen_types(ppc_net, gen_bus)[:2]
+    is_sgen = ~(is_eg | is_gen)
+    pp_res["gen"] = zeros([len(gen_bus), 2])
+    for element, mask in [("ext_grid", is_eg), ("gen", is_gen), ("sgen", is_sgen)]:
+        pp_res["gen"][mask] = _results_in_ppc_order(
+            pp_net, element, ["bus"], ['p_kw', 'q_kvar'], [gen_bus[mask]])
 
     # --- pandapower branch result table
-    pp_res["branch"] = zeros([1, 4])
-    # consideration of parallel branches via storing how often branches were considered
-    # each node-to-node-connection
-    try:
-        init1 = concat([pp_net.line.from_bus, pp_net.line.to_bus], axis=1,
-                       sort=True).drop_duplicates()
-        init2 = concat([pp_net.trafo.hv_bus, pp_net.trafo.lv_bus], axis=1,
-                       sort=True).drop_duplicates()
-    except TypeError:
-        # legacy pandas < 0.21
-        init1 = concat([pp_net.line.from_bus, pp_net.line.to_bus], axis=1).drop_duplicates()
-        init2 = concat([pp_net.trafo.hv_bus, pp_net.trafo.lv_bus], axis=1).drop_duplicates()
-    init1['hv_bus'] = nan
-    init1['lv_bus'] = nan
-    init2['from_bus'] = nan
-    init2['to_bus'] = nan
-    try:
-        already_used_branches = concat([init1, init2], axis=0, sort=True)
-    except TypeError:
-        # pandas < 0.21 legacy
-        already_used_branches = concat([init1, init2], axis=0)
-    already_used_branches['number'] = zeros([already_used_branches.shape[0], 1]).astype(int)
-    BRANCHES = DataFrame(ppc_net['branch'][:, [0, 1, 8, 9]])
-    for i in BRANCHES.index:
-        from_bus = pp.get_element_index(pp_net, 'bus', name=int(ppc_net['branch'][i, 0]))
-        to_bus = pp.get_element_index(pp_net, 'bus', name=int(ppc_net['branch'][i, 1]))
-        from_vn_kv = ppc_net['bus'][from_bus, 9]
-        to_vn_kv = ppc_net['bus'][to_bus, 9]
-        ratio = BRANCHES[2].at[i]
-        angle = BRANCHES[3].at[i]
-        # from line results
-        if (from_vn_kv == to_vn_kv) & ((ratio == 0) | (ratio == 1)) & (angle == 0):
-            pp_res["branch"] = append(pp_res["branch"], array(pp_net.res_line[
-                (pp_net.line.from_bus == from_bus) &
-                (pp_net.line.to_bus == to_bus)]
-                [['p_from_kw', 'q_from_kvar', 'p_to_kw', 'q_to_kvar']])[
-                int(already_used_branches.number.loc[
-                   (already_used_branches.from_bus == from_bus) &
-                   (already_used_branches.to_bus == to_bus)].values)].reshape(1, 4), 0)
-            already_used_branches.number.loc[(already_used_branches.from_bus == from_bus) &
-                                             (already_used_branches.to_bus == to_bus)] += 1
-        # from trafo results
-        else:
-            if from_vn_kv >= to_vn_kv:
-                pp_res["branch"] = append(pp_res["branch"], array(pp_net.res_trafo[
-                    (pp_net.trafo.hv_bus == from_bus) &
-                    (pp_net.trafo.lv_bus == to_bus)]
-                    [['p_hv_kw', 'q_hv_kvar', 'p_lv_kw', 'q_lv_kvar']])[
-                    int(already_used_branches.number.loc[
-                        (already_used_branches.hv_bus == from_bus) &
-                        (already_used_branches.lv_bus == to_bus)].values)].reshape(1, 4), 0)
-                already_used_branches.number.loc[(already_used_branches.hv_bus == from_bus) &
-                                                 (already_used_branches.lv_bus == to_bus)] += 1
-            else:  # switch hv-lv-connection of pypower connection buses
-                pp_res["branch"] = append(pp_res["branch"], array(pp_net.res_trafo[
-                    (pp_net.trafo.hv_bus == to_bus) &
-                    (pp_net.trafo.lv_bus == from_bus)]
-                    [['p_lv_kw', 'q_lv_kvar', 'p_hv_kw', 'q_hv_kvar']])[
-                    int(already_used_branches.number.loc[
-                        (already_used_branches.hv_bus == to_bus) &
-                        (already_used_branches.lv_bus == from_bus)].values)].reshape(1, 4), 0)
-                already_used_branches.number.loc[
-                    (already_used_branches.hv_bus == to_bus) &
-                    (already_used_branches.lv_bus == from_bus)] += 1
-    pp_res["branch"] = pp_res["branch"][1:, :]  # delete initial zero row
+    # the ppc bus numbers are the names of the pandapower buses
+    pp_bus_lookup = Series(pp_net.bus.index.values, index=pp_net.bus.name.values)
+    from_bus = pp_bus_lookup.loc[ppc_net['branch'][:, 0].astype(int)].values
+    to_bus = pp_bus_lookup.loc[ppc_net['branch'][:, 1].astype(int)].values
+    from_vn_kv = ppc_net['bus'][from_bus, 9]
+    to_vn_kv = ppc_net['bus'][to_bus, 9]
+    ratio = ppc_net['branch'][:, 8]
+    angle = ppc_net['branch'][:, 9]
+    is_line = (from_vn_kv == to_vn_kv) & ((ratio == 0) | (ratio == 1)) & (angle == 0)
+    hv_is_from = from_vn_kv >= to_vn_kv
+    pp_res["branch"] = zeros([len(from_bus), 4])
+    pp_res["branch"][is_line] = _results_in_ppc_order(
+        pp_net, "line", ["from_bus", "to_bus"], ['p_from_kw', 'q_from_kvar', 'p_to_kw',
+                                                 'q_to_kvar'],
+        [from_bus[is_line], to_bus[is_line]])
+    trafos = ~is_line
+    trafo_res = _results_in_ppc_order(
+        pp_net, "trafo", ["hv_bus", "lv_bus"], ['p_hv_kw', 'q_hv_kvar', 'p_lv_kw', 'q_lv_kvar'],
+        [where(hv_is_from, from_bus, to_bus)[trafos], where(hv_is_from, to_bus, from_bus)[trafos]])
+    # switch hv-lv-connection of pypower connection buses
+    lv_is_from = ~hv_is_from[trafos]
+    trafo_res[lv_is_from] = trafo_res[lv_is_from][:, [2, 3, 0, 1]]
+    pp_res["branch"][trafos] = trafo_res
 
     # --- do the powerflow result comparison
     diff_res = dict.fromkeys(ppc_elms)
@@ -557,15 +554,16 @@ def validate_from_ppc(ppc_net, pp_net, pf_type="runpp", max_diff_values={
     diff_res["bus"][:, 1] -= diff_res["bus"][0, 1]  # remove va_degree offset
     diff_res["branch"] = ppc_res["branch"] - pp_res["branch"] * 1e-3
     diff_res["gen"] = ppc_res["gen"] + pp_res["gen"] * 1e-3
-    # comparison of buses with several generator units only as q sum
-    for i in GEN_uniq.loc[GEN_uniq[0].isin(change_q_compare)].index:
-        next_is = GEN_uniq.index[GEN_uniq.index > i]
-        if len(next_is) > 0:
-            next_i = next_is[0]
-        else:
-            next_i = GENS.index[-1] + 1
-        if (next_i - i) > 1:
-            diff_res["gen"][i:next_i, 1] = sum(diff_res["gen"][i:next_i, 1])
+    # comparison of buses with several generator units only as q sum: the generators from the
+    # first generator of a bus up to the first generator of the next bus are summed up
+    gen_bus_nr = ppc_net['gen'][:, 0].astype(int)
+    first = zeros(len(gen_bus_nr), dtype=bool)
+    first[unique(gen_bus_nr, return_index=True)[1]] = True
+    block = cumsum(first) - 1
+    q_sum = bincount(block, weights=diff_res["gen"][:, 1])
+    sum_block = isin(gen_bus_nr[first], gen_bus_nr[is_sgen]) & (bincount(block) > 1)
+    summed = sum_block[block]
+    diff_res["gen"][summed, 1] = q_sum[block[summed]]
     # logger info
     logger.debug("Maximum voltage magnitude difference between pypower and pandapower: "
                  "%.2e pu" % max_(abs(diff_res["bus"][:, 0])))
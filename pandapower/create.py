@@ -4,19 +4,31 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
+import copy
+
 import pandas as pd
-from numpy import nan, isnan, arange, dtype, zeros
+from numpy import nan, isnan, arange, dtype, zeros, array, atleast_1d, in1d, unique, int64, \
+    float64
 
-from pandapower.auxiliary import pandapowerNet, get_free_id, _preserve_dtypes
+from pandapower.auxiliary import pandapowerNet, get_free_id, _preserve_dtypes, \
+    _categoricals_to_object
 from pandapower.results import reset_results
 from pandapower.std_types import add_basic_std_types, load_std_type
 from pandapower import __version__
 
 
-def create_empty_network(name="", f_hz=50., sn_kva=1e3):
+# empty networks which are copied by create_empty_network, by the compact parameter
+_empty_network_templates = {}
+
+
+def create_empty_network(name="", f_hz=50., sn_kva=1e3, compact=False, add_stdtypes=True,
+                         add_results=True):
     """
     This function initializes the pandapower datastructure.
 
+    The empty tables and the basic standard types are built once per process and every call
+    returns a copy of this template.
+
     OPTIONAL:
         **f_hz** (float, 50.) - power system frequency in hertz
 
@@ -24,6 +36,15 @@ def create_empty_network(name="", f_hz=50., sn_kva=1e3):
 
         **sn_kva** (float, 1e3) - reference apparent power for per unit system
 
+        **compact** (bool, False) - if True, string columns such as name, type or std_type are \
+            stored as categoricals to reduce the memory footprint (see toolbox.compact_dtypes)
+
+        **add_stdtypes** (bool, True) - if False, the network does not include the basic line, \
+            transformer and three winding transformer standard types
+
+        **add_results** (bool, True) - if False, the network does not include the empty result \
+            tables, they are created by the first power flow
+
     OUTPUT:
         **net** (attrdict) - PANDAPOWER attrdict with empty tables:
 
@@ -31,6 +52,29 @@ def create_empty_network(name="", f_hz=50., sn_kva=1e3):
         net = create_empty_network()
 
     """
+    if compact not in _empty_network_templates:
+        _empty_network_templates[compact] = _build_empty_network(compact)
+    template = _empty_network_templates[compact]
+    net = pandapowerNet({})
+    for key, item in template.items():
+        if isinstance(item, pd.DataFrame):
+            if add_results or not key.startswith("res_"):
+                net[key] = item.copy()
+        elif key == "std_types":
+            if add_stdtypes:
+                net[key] = {component: {name: dict(data) for name, data in types.items()}
+                            for component, types in item.items()}
+            else:
+                net[key] = {component: {} for component in item}
+        else:
+            net[key] = copy.deepcopy(item)
+    net.name = name
+    net.f_hz = f_hz
+    net.sn_kva = sn_kva
+    return net
+
+
+def _build_empty_network(compact=False):
     net = pandapowerNet({
         # structure data
         "bus": [('name', dtype(object)),
@@ -305,10 +349,11 @@ def create_empty_network(name="", f_hz=50., sn_kva=1e3):
                             "ext_grid": None,
                             "gen": None},
         "version": float(__version__[:3]),
+        "format_version": __version__,
         "converged": False,
-        "name": name,
-        "f_hz": f_hz,
-        "sn_kva": sn_kva
+        "name": "",
+        "f_hz": 50.,
+        "sn_kva": 1e3
     })
     for s in net:
         if isinstance(net[s], list):
@@ -316,6 +361,9 @@ def create_empty_network(name="", f_hz=50., sn_kva=1e3):
     add_basic_std_types(net)
     reset_results(net)
     net['user_pf_options'] = dict()
+    if compact:
+        from pandapower.toolbox import compact_dtypes
+        compact_dtypes(net)
     return net
 
 
@@ -366,6 +414,7 @@ def create_bus(net, vn_kv, name=None, index=None, geodata=None, type="b",
 
     # store dtypes
     dtypes = net.bus.dtypes
+    _categoricals_to_object(net.bus)
 
     net.bus.loc[index, ["name", "vn_kv", "type", "zone", "in_service"]] = \
         [name, vn_kv, type, zone, bool(in_service)]
@@ -441,9 +490,9 @@ def create_buses(net, nr_buses, vn_kv, index=None, name=None, type="b", geodata=
         bid = get_free_id(net["bus"])
         index = arange(bid, bid + nr_buses, 1)
 
-    # TODO: not needed when concating anyways?
     # store dtypes
-    # dtypes = net.bus.dtypes
+    dtypes = net.bus.dtypes
+    _categoricals_to_object(net.bus)
 
     dd = pd.DataFrame(index=index, columns=net.bus.columns)
     dd["vn_kv"] = vn_kv
@@ -453,7 +502,7 @@ def create_buses(net, nr_buses, vn_kv, index=None, name=None, type="b", geodata=
     dd["name"] = name
     net["bus"] = net["bus"].append(dd)[net["bus"].columns.tolist()]
     # and preserve dtypes
-    # _preserve_dtypes(net.bus, dtypes)
+    _preserve_dtypes(net.bus, dtypes)
 
     if geodata is not None:
         # works with a 2-tuple or a matching array
@@ -553,6 +602,7 @@ def create_load(net, bus, p_kw, q_kvar=0, const_z_percent=0, const_i_percent=0,
 
     # store dtypes
     dtypes = net.load.dtypes
+    _categoricals_to_object(net.load)
 
     net.load.loc[index, ["name", "bus", "p_kw", "const_z_percent", "const_i_percent", "scaling",
                          "q_kvar", "sn_kva", "in_service", "type"]] = \
@@ -706,6 +756,7 @@ def create_sgen(net, bus, p_kw, q_kvar=0, sn_kva=nan, name=None, index=None,
 
     # store dtypes
     dtypes = net.sgen.dtypes
+    _categoricals_to_object(net.sgen)
 
     net.sgen.loc[index, ["name", "bus", "p_kw", "scaling",
                          "q_kvar", "sn_kva", "in_service", "type"]] = \
@@ -874,6 +925,7 @@ def create_storage(net, bus, p_kw, max_e_kwh, q_kvar=0, sn_kva=nan, soc_percent=
 
     # store dtypes
     dtypes = net.storage.dtypes
+    _categoricals_to_object(net.storage)
 
     net.storage.loc[index, ["name", "bus", "p_kw", "q_kvar", "sn_kva", "scaling",
                             "soc_percent", "min_e_kwh", "max_e_kwh", "in_service", "type"]] = \
@@ -992,6 +1044,7 @@ def create_gen(net, bus, p_kw, vm_pu=1., sn_kva=nan, name=None, index=None, max_
 
     # store dtypes
     dtypes = net.gen.dtypes
+    _categoricals_to_object(net.gen)
 
     net.gen.loc[index, ["name", "bus", "p_kw", "vm_pu", "sn_kva", "type", "in_service",
                         "scaling"]] = [name, bus, p_kw, vm_pu, sn_kva, type, bool(in_service),
@@ -1113,6 +1166,7 @@ def create_ext_grid(net, bus, vm_pu=1.0, va_degree=0., name=None, in_service=Tru
 
     # store dtypes
     dtypes = net.ext_grid.dtypes
+    _categoricals_to_object(net.ext_grid)
 
     net.ext_grid.loc[index, ["bus", "name", "vm_pu", "va_degree", "in_service"]] = \
         [bus, name, vm_pu, va_degree, bool(in_service)]
@@ -1250,6 +1304,7 @@ def create_line(net, from_bus, to_bus, length_km, std_type, name=None, index=Non
 
     # store dtypes
     dtypes = net.line.dtypes
+    _categoricals_to_object(net.line)
 
     net.line.loc[index, list(v.keys())] = list(v.values())
 
@@ -1352,6 +1407,7 @@ def create_line_from_parameters(net, from_bus, to_bus, length_km, r_ohm_per_km,
 
     # store dtypes
     dtypes = net.line.dtypes
+    _categoricals_to_object(net.line)
 
     net.line.loc[index, list(v.keys())] = list(v.values())
 
@@ -1459,6 +1515,7 @@ def create_transformer(net, hv_bus, lv_bus, std_type, name=None, tp_pos=nan, in_
             net.trafo.tp_pos = net.trafo.tp_pos.astype(float)
     # store dtypes
     dtypes = net.trafo.dtypes
+    _categoricals_to_object(net.trafo)
 
     net.trafo.loc[index, list(v.keys())] = list(v.values())
 
@@ -1598,6 +1655,7 @@ def create_transformer_from_parameters(net, hv_bus, lv_bus, sn_kva, vn_hv_kv, vn
 
     # store dtypes
     dtypes = net.trafo.dtypes
+    _categoricals_to_object(net.trafo)
 
     net.trafo.loc[index, list(v.keys())] = list(v.values())
 
@@ -1708,12 +1766,19 @@ def create_transformer3w(net, hv_bus, mv_bus, lv_bus, std_type, name=None, tp_po
         if type(tp_pos) == float:
             net.trafo3w.tp_pos = net.trafo3w.tp_pos.astype(float)
 
+    # store dtypes
+    dtypes = net.trafo3w.dtypes
+    _categoricals_to_object(net.trafo3w)
+
     dd = pd.DataFrame(v, index=[index])
     try:
         net["trafo3w"] = net["trafo3w"].append(dd).reindex(net["trafo3w"].columns, axis=1)
     except TypeError:  # legacy for pandas <0.21
         net["trafo3w"] = net["trafo3w"].append(dd).reindex_axis(net["trafo3w"].columns, axis=1)
 
+    # and preserve dtypes
+    _preserve_dtypes(net.trafo3w, dtypes)
+
     if not isnan(max_loading_percent):
         if "max_loading_percent" not in net.trafo3w.columns:
             net.trafo3w.loc[:, "max_loading_percent"] = pd.Series()
@@ -1843,6 +1908,7 @@ def create_transformer3w_from_parameters(net, hv_bus, mv_bus, lv_bus, vn_hv_kv,
 
     # store dtypes
     dtypes = net.trafo3w.dtypes
+    _categoricals_to_object(net.trafo3w)
 
     net.trafo3w.loc[index, ["lv_bus", "mv_bus", "hv_bus", "vn_hv_kv", "vn_mv_kv", "vn_lv_kv",
                             "sn_hv_kva", "sn_mv_kva", "sn_lv_kva", "vsc_hv_percent",
@@ -1949,6 +2015,7 @@ def create_switch(net, bus, element, et, closed=True, type=None, name=None, inde
 
     # store dtypes
     dtypes = net.switch.dtypes
+    _categoricals_to_object(net.switch)
 
     net.switch.loc[index, ["bus", "element", "et", "closed", "type", "name"]] = \
         [bus, element, et, closed, type, name]
@@ -2008,6 +2075,7 @@ def create_shunt(net, bus, q_kvar, p_kw=0., vn_kv=None, step=1, max_step=1, name
         vn_kv = net.bus.vn_kv.at[bus]
     # store dtypes
     dtypes = net.shunt.dtypes
+    _categoricals_to_object(net.shunt)
 
     net.shunt.loc[index, ["bus", "name", "p_kw", "q_kvar", "vn_kv", "step", "max_step",
                           "in_service"]] = [bus, name, p_kw, q_kvar, vn_kv, step, max_step,
@@ -2078,6 +2146,7 @@ def create_impedance(net, from_bus, to_bus, rft_pu, xft_pu, sn_kva, rtf_pu=None,
 
         # store dtypes
     dtypes = net.impedance.dtypes
+    _categoricals_to_object(net.impedance)
     if rtf_pu is None:
         rtf_pu = rft_pu
     if xtf_pu is None:
@@ -2161,6 +2230,7 @@ def create_ward(net, bus, ps_kw, qs_kvar, pz_kw, qz_kvar, name=None, in_service=
 
     # store dtypes
     dtypes = net.ward.dtypes
+    _categoricals_to_object(net.ward)
 
     net.ward.loc[index, ["bus", "ps_kw", "qs_kvar", "pz_kw", "qz_kvar", "name", "in_service"]] = \
         [bus, ps_kw, qs_kvar, pz_kw, qz_kvar, name, in_service]
@@ -2208,6 +2278,7 @@ def create_xward(net, bus, ps_kw, qs_kvar, pz_kw, qz_kvar, r_ohm, x_ohm, vm_pu,
 
     # store dtypes
     dtypes = net.xward.dtypes
+    _categoricals_to_object(net.xward)
 
     net.xward.loc[index, ["bus", "ps_kw", "qs_kvar", "pz_kw", "qz_kvar", "r_ohm", "x_ohm", "vm_pu",
                           "name", "in_service"]] = \
@@ -2282,6 +2353,7 @@ def create_dcline(net, from_bus, to_bus, p_kw, loss_percent, loss_kw, vm_from_pu
 
     # store dtypes
     dtypes = net.dcline.dtypes
+    _categoricals_to_object(net.dcline)
 
     net.dcline.loc[index, ["name", "from_bus", "to_bus", "p_kw", "loss_percent", "loss_kw",
                            "vm_from_pu", "vm_to_pu", "max_p_kw", "min_q_from_kvar",
@@ -2393,11 +2465,137 @@ def create_measurement(net, meas_type, element_type, value, std_dev, bus, elemen
             raise UserWarning("More than one measurement of this type exists")
 
     dtypes = net.measurement.dtypes
+    _categoricals_to_object(net.measurement)
     net.measurement.loc[index] = [name, meas_type.lower(), element_type, value, std_dev, bus, element]
     _preserve_dtypes(net.measurement, dtypes)
     return index
 
 
+def create_measurements(net, meas_type, element_type, value, std_dev, bus, element=None,
+                        check_existing=True, index=None, name=None):
+    """
+    Creates several measurements at once. All parameters are given as arrays of the same length
+    or as scalars, which are used for all measurements. The meaning of the parameters is the
+    same as in create_measurement, but the measurements are checked and added to
+    net["measurement"] in one step, which is much faster for a large number of measurements.
+
+    INPUT:
+        **meas_type** (array of strings) - Types of the measurements. "v", "p", "q", "i" are
+        possible.
+
+        **element_type** (array of strings) - Measured element types. "bus", "line", "trafo"
+        are possible.
+
+        **value** (array of floats) - Measurement values in "kW" for P, "kVar" for Q, "p.u." for
+        V and "A" for I.
+
+        **std_dev** (array of floats) - Standard deviations in the same units as the
+        measurements.
+
+        **bus** (array) - Indices of the buses. For line/trafo measurements, the side of the
+        element can also be given as "from"/"to" or "hv"/"lv".
+
+        **element** (array, None) - Indices of the measured elements, None for bus
+        measurements.
+
+    OPTIONAL:
+        **check_existing** (bool) - Check for and replace existing measurements with the same
+        bus, type, element_type and element.
+
+        **index** (array, None) - Indices of the new measurements. If None, the indices higher
+        than the highest already existing index are selected.
+
+        **name** (array of strings, None) - names of the measurements.
+
+    OUTPUT:
+        (array) Indices of the measurements
+
+    EXAMPLE:
+        Voltage measurements at buses 0 to 2 and the active power flow at the from side of
+        line 4:
+        create_measurements(net, ["v", "v", "v", "p"], ["bus", "bus", "bus", "line"],
+                            [1.01, 1.0, 0.99, 800.], [.002, .002, .002, 10.],
+                            [0, 1, 2, "from"], [None, None, None, 4])
+    """
+    if element is not None and not isinstance(element, (int, int64)):
+        # keeps None for the bus measurements instead of converting the elements to float
+        element = array(element, dtype=object)
+    meas = pd.DataFrame({"type": meas_type, "element_type": element_type, "value": value,
+                         "std_dev": std_dev, "bus": bus, "element": element, "name": name},
+                        index=range(max(len(atleast_1d(x)) for x in
+                                        (meas_type, element_type, value, std_dev, bus))))
+    meas["type"] = meas["type"].str.lower()
+    invalid = ~meas.type.isin(["v", "p", "q", "i"])
+    if invalid.any():
+        raise UserWarning("Invalid measurement type (%s)" % meas.type[invalid].iloc[0])
+
+    is_branch = meas.element_type.isin(["line", "trafo"]).values & (meas.type != "v").values
+    if pd.isnull(meas.element[is_branch]).any():
+        raise UserWarning("The element type %s requires a value in 'element'"
+                          % meas.element_type[is_branch & pd.isnull(meas.element)].iloc[0])
+    meas.loc[meas.type == "v", "element_type"] = "bus"
+    invalid = ~meas.element_type.isin(["bus", "line", "trafo"])
+    if invalid.any():
+        raise UserWarning("Invalid element type (%s)" % meas.element_type[invalid].iloc[0])
+
+    for et, sides in [("line", ("from_bus", "to_bus")), ("trafo", ("hv_bus", "lv_bus"))]:
+        is_et = (meas.element_type == et).values
+        missing = ~meas.element[is_et].isin(net[et].index)
+        if missing.any():
+            raise UserWarning("%s %s does not exist" % (et.capitalize(),
+                                                       meas.element[is_et][missing].iloc[0]))
+        for side in sides:
+            is_side = is_et & (meas.bus.astype(str) == side.split("_")[0]).values
+            meas.loc[is_side, "bus"] = net[et][side].loc[meas.element[is_side]].values
+    meas["bus"] = meas.bus.astype(int64)
+
+    is_bus = (meas.element_type == "bus").values
+    missing = is_bus & ~meas.bus.isin(net.bus.index).values
+    if missing.any():
+        raise UserWarning("Bus %s does not exist" % meas.bus[missing].iloc[0])
+    if (is_bus & (meas.type == "i").values).any():
+        raise UserWarning("Line current measurements cannot be placed at buses")
+
+    # positions of the measurements which replace existing ones and their indices
+    replaced = zeros(len(meas), dtype=bool)
+    replaced_index = []
+    if check_existing:
+        # elements of bus measurements are None
+        keys = ["type", "element_type", "bus", "element"]
+        old = net.measurement[keys].fillna(-1).reset_index()
+        new = meas[keys].fillna(-1).reset_index()
+        old["element"] = old.element.astype(float64)
+        new["element"] = new.element.astype(float64)
+        matches = new.merge(old, on=keys, suffixes=("", "_existing"))
+        if new.duplicated(keys).any() or matches["index"].duplicated().any():
+            raise UserWarning("More than one measurement of this type exists")
+        replaced[matches["index"].values] = True
+        replaced_index = matches.sort_values("index")["index_existing"].values
+
+    if index is None:
+        bid = get_free_id(net.measurement)
+        index = zeros(len(meas), dtype=int64)
+        index[~replaced] = arange(bid, bid + len(meas) - replaced.sum())
+    else:
+        index = array(index, dtype=int64, ndmin=1)
+        existing = in1d(index, net.measurement.index.values)
+        if existing.any() or len(unique(index)) < len(index):
+            raise UserWarning("A measurement with index %s already exists"
+                              % (index[existing][0] if existing.any() else index))
+    index[replaced] = replaced_index
+    meas.index = index
+
+    columns = net.measurement.columns
+    dtypes = net.measurement.dtypes
+    _categoricals_to_object(net.measurement)
+    replaced = meas.index.isin(net.measurement.index)
+    if replaced.any():
+        net.measurement.loc[meas.index[replaced], columns] = meas.loc[replaced, columns].values
+    net["measurement"] = pd.concat([net.measurement, meas.loc[~replaced, columns]])[columns]
+    _preserve_dtypes(net.measurement, dtypes)
+    return index
+
+
 def create_piecewise_linear_cost(net, element, element_type, data_points, type="p", index=None):
     """
     Creates an entry for piecewise linear costs for an element. The currently supported elements are
@@ -2497,11 +2695,14 @@ def create_piecewise_linear_cost(net, element, element_type, data_points, type="
                 raise ValueError("Cost function must be defined for whole power range of the "
                                  "generator")
 
+    dtypes = net.piecewise_linear_cost.dtypes
+    _categoricals_to_object(net.piecewise_linear_cost)
     net.piecewise_linear_cost.loc[index, ["type", "element", "element_type"]] = \
         [type, element, element_type]
 
     net.piecewise_linear_cost.p.loc[index] = p.reshape((1, -1))
     net.piecewise_linear_cost.f.loc[index] = f.reshape((1, -1))
+    _preserve_dtypes(net.piecewise_linear_cost, dtypes)
 
     return index
 
@@ -2563,9 +2764,12 @@ def create_polynomial_cost(net, element, element_type, coefficients, type="p", i
         raise UserWarning("A piecewise_linear_cost for %s with index %s already exists" %
                           (element_type, element))
 
+    dtypes = net.polynomial_cost.dtypes
+    _categoricals_to_object(net.polynomial_cost)
     net.polynomial_cost.loc[index, ["type", "element", "element_type"]] = \
         [type, element, element_type]
 
     net.polynomial_cost.c.loc[index] = coefficients.reshape((1, -1))
+    _preserve_dtypes(net.polynomial_cost, dtypes)
 
     return index
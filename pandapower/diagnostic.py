@@ -890,7 +890,7 @@ def deviation_from_std_type(net):
                                 check_results[key][i] = {'param': param, 'e_value': element[param],
                                                          'std_type_value': std_type_values[param],
                                                          'std_type_in_lib': True}
-                elif std_type is not None:
+                elif pd.notnull(std_type):
                     if key not in check_results.keys():
                         check_results[key] = {}
                     check_results[key][i] = {'std_type_in_lib': False}
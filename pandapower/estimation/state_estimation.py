@@ -3,9 +3,10 @@
 # Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 import numpy as np
+import pandas as pd
 
-from scipy.sparse import csr_matrix
-from scipy.sparse.linalg import spsolve
+from scipy.sparse import diags
+from scipy.sparse.linalg import spsolve, splu
 from scipy.stats import chi2
 
 from pandapower.estimation.wls_ppc_conversions import _add_measurements_to_ppc, \
@@ -26,6 +27,22 @@ except ImportError:
 std_logger = logging.getLogger(__name__)
 
 
+def _initial_voltages(net, init, calculate_voltage_angles):
+    v_start = None
+    delta_start = None
+    if init == 'results':
+        v_start = net.res_bus_est.vm_pu
+        delta_start = net.res_bus_est.va_degree
+    elif init == 'slack':
+        res_bus = estimate_voltage_vector(net)
+        v_start = res_bus.vm_pu.values
+        if calculate_voltage_angles:
+            delta_start = res_bus.va_degree.values
+    elif init != 'flat':
+        raise UserWarning("Unsupported init value. Using flat initialization.")
+    return v_start, delta_start
+
+
 def estimate(net, init='flat', tolerance=1e-6, maximum_iterations=10,
              calculate_voltage_angles=True, ref_power=1e6):
     """
@@ -51,18 +68,7 @@ def estimate(net, init='flat', tolerance=1e-6, maximum_iterations=10,
         **successful** (boolean) - Was the state estimation successful?
     """
     wls = state_estimation(tolerance, maximum_iterations, net, ref_power=ref_power)
-    v_start = None
-    delta_start = None
-    if init == 'results':
-        v_start = net.res_bus_est.vm_pu
-        delta_start = net.res_bus_est.va_degree
-    elif init == 'slack':
-        res_bus = estimate_voltage_vector(net)
-        v_start = res_bus.vm_pu.values
-        if calculate_voltage_angles:
-            delta_start = res_bus.va_degree.values
-    elif init != 'flat':
-        raise UserWarning("Unsupported init value. Using flat initialization.")
+    v_start, delta_start = _initial_voltages(net, init, calculate_voltage_angles)
     return wls.estimate(v_start, delta_start, calculate_voltage_angles)
 
 
@@ -98,18 +104,7 @@ def remove_bad_data(net, init='flat', tolerance=1e-6, maximum_iterations=10,
         **successful** (boolean) - Was the state estimation successful?
     """
     wls = state_estimation(tolerance, maximum_iterations, net, ref_power=ref_power)
-    v_start = None
-    delta_start = None
-    if init == 'results':
-        v_start = net.res_bus_est.vm_pu
-        delta_start = net.res_bus_est.va_degree
-    elif init == 'slack':
-        res_bus = estimate_voltage_vector(net)
-        v_start = res_bus.vm_pu.values
-        if calculate_voltage_angles:
-            delta_start = res_bus.va_degree.values
-    elif init != 'flat':
-        raise UserWarning("Unsupported init value. Using flat initialization.")
+    v_start, delta_start = _initial_voltages(net, init, calculate_voltage_angles)
     return wls.perform_rn_max_test(v_start, delta_start, calculate_voltage_angles,
                                    rn_max_threshold)
 
@@ -142,18 +137,7 @@ def chi2_analysis(net, init='flat', tolerance=1e-6, maximum_iterations=10,
         **bad_data_detected** (boolean) - Returns true if bad data has been detected
     """
     wls = state_estimation(tolerance, maximum_iterations, net, ref_power=ref_power)
-    v_start = None
-    delta_start = None
-    if init == 'results':
-        v_start = net.res_bus_est.vm_pu
-        delta_start = net.res_bus_est.va_degree
-    elif init == 'slack':
-        res_bus = estimate_voltage_vector(net)
-        v_start = res_bus.vm_pu.values
-        if calculate_voltage_angles:
-            delta_start = res_bus.va_degree.values
-    elif init != 'flat':
-        raise UserWarning("Unsupported init value. Using flat initialization.")
+    v_start, delta_start = _initial_voltages(net, init, calculate_voltage_angles)
     return wls.perform_chi2_test(v_start, delta_start, calculate_voltage_angles,
                                  chi2_prob_false)
 
@@ -230,6 +214,16 @@ class state_estimation(object):
         if self.net is None:
             raise UserWarning("Component was not initialized with a network.")
         t0 = time()
+        self._prepare_estimation(v_start, delta_start, calculate_voltage_angles)
+        successful = self._wls_estimation()
+        if successful is None:
+            return False
+        self._store_results(successful, time() - t0)
+        return successful
+
+    def _prepare_estimation(self, v_start, delta_start, calculate_voltage_angles):
+        # builds the ppci with the measurements and the matrix calculation object, which are
+        # reused for all estimations with a subset of the measurements (see perform_rn_max_test)
         # add initial values for V and delta
         # node voltages
         # V<delta
@@ -243,39 +237,53 @@ class state_estimation(object):
 
         # initialize ppc
         ppc, ppci = _init_ppc(self.net, v_start, delta_start, calculate_voltage_angles)
+        _add_pf_options(self.net, tolerance_kva=1e-5, trafo_loading="current",
+                        numba=True, ac=True, algorithm='nr', max_iteration="auto")
 
         # add measurements to ppci structure
         ppci = _add_measurements_to_ppc(self.net, ppci, self.s_ref)
 
         # calculate relevant vectors from ppci measurements
-        z, self.pp_meas_indices, r_cov = _build_measurement_vectors(ppci)
+        self._z, self._meas_indices, self._r_cov = _build_measurement_vectors(ppci)
+        self._active_meas = np.ones(len(self._z), dtype=bool)
 
         # number of nodes
-        n_active = len(np.where(ppci["bus"][:, 1] != 4)[0])
+        self._n_active = len(np.where(ppci["bus"][:, 1] != 4)[0])
         slack_buses = np.where(ppci["bus"][:, 1] == 3)[0]
+        self._non_slack_buses = np.setdiff1d(np.arange(ppci["bus"].shape[0]), slack_buses)
+
+        # matrix calculation object
+        self._sem = wls_matrix_ops(ppci, slack_buses, self._non_slack_buses, self.s_ref)
+        self._ppc, self._ppci = ppc, ppci
+
+        # set the starting values for all active buses
+        self.V = ppci["bus"][:, 7].copy()
+        self.delta = ppci["bus"][:, 8] * np.pi / 180  # convert to rad
+
+    def _wls_estimation(self):
+        # Gauss-Newton iterations with the active measurements, starting from self.V / self.delta.
+        # Returns None if the estimation is not possible.
+        rows = np.flatnonzero(self._active_meas)
+        z = self._z[rows]
+        self.pp_meas_indices = self._meas_indices[rows]
 
         # Check if observability criterion is fulfilled and the state estimation is possible
-        if len(z) < 2 * n_active - 1:
+        if len(z) < 2 * self._n_active - 1:
             self.logger.error("System is not observable (cancelling)")
             self.logger.error("Measurements available: %d. Measurements required: %d" %
-                              (len(z), 2 * n_active - 1))
-            return False
-
-        # set the starting values for all active buses
-        v_m = ppci["bus"][:, 7]
-        delta = ppci["bus"][:, 8] * np.pi / 180  # convert to rad
-        delta_masked = np.ma.array(delta, mask=False)
-        delta_masked.mask[slack_buses] = True
-        non_slack_buses = np.arange(len(delta))[~delta_masked.mask]
+                              (len(z), 2 * self._n_active - 1))
+            return None
 
-        # matrix calculation object
-        sem = wls_matrix_ops(ppci, slack_buses, non_slack_buses, self.s_ref)
+        sem = self._sem
+        non_slack_buses = self._non_slack_buses
+        v_m = self.V
+        delta = self.delta.copy()
 
         # state vector
-        E = np.concatenate((delta_masked.compressed(), v_m))
+        E = np.concatenate((delta[non_slack_buses], v_m))
 
-        # invert covariance matrix
-        r_inv = csr_matrix(np.linalg.inv(np.diagflat(r_cov) ** 2))
+        # inverted covariance matrix, the measurement errors are uncorrelated
+        r_inv = diags(1. / self._r_cov[rows] ** 2, format="csr")
 
         current_error = 100.
         cur_it = 0
@@ -285,21 +293,16 @@ class state_estimation(object):
             self.logger.debug(" Starting iteration %d" % (1 + cur_it))
             try:
                 # create h(x) for the current iteration
-                h_x = sem.create_hx(v_m, delta)
+                h_x = sem.create_hx(v_m, delta)[rows]
 
                 # residual r
-                r = csr_matrix(z - h_x).T
+                r = (z - h_x)[:, np.newaxis]
 
-                # jacobian matrix H
-                H = csr_matrix(sem.create_jacobian(v_m, delta))
+                # sparse jacobian matrix H
+                H = sem.create_jacobian(v_m, delta)[rows]
 
-                # gain matrix G_m
-                # G_m = H^t * R^-1 * H
-                G_m = H.T * (r_inv * H)
-
-                # state vector difference d_E
-                # d_E = G_m^-1 * (H' * R^-1 * r)
-                d_E = spsolve(G_m, H.T * (r_inv * r))
+                # gain matrix G_m and state vector difference d_E
+                G_m, d_E = self._gain_step(H, r_inv, r)
                 E += d_E
 
                 # update V/delta
@@ -314,7 +317,7 @@ class state_estimation(object):
             except np.linalg.linalg.LinAlgError:
                 self.logger.error("A problem appeared while using the linear algebra methods."
                                   "Check and change the measurement set.")
-                return False
+                return None
 
         # print output for results
         if current_error <= self.tolerance:
@@ -325,12 +328,30 @@ class state_estimation(object):
             self.logger.debug("WLS State Estimation not successful (%d/%d iterations)" %
                               (cur_it, self.max_iterations))
 
+        # store variables required for chi^2 and r_N_max test (R_inv, Gm, H and Ht are sparse):
+        self.R_inv = r_inv
+        self.Gm = G_m
+        self.r = r
+        self.H = H
+        self.Ht = H.T
+        self.hx = h_x
+        self.V = v_m
+        self.delta = delta
+        self._iterations = cur_it
+        return successful
+
+    def _gain_step(self, H, r_inv, r):
+        # G_m = H^t * R^-1 * H
+        G_m = (H.T * (r_inv * H)).tocsc()
+        # d_E = G_m^-1 * (H' * R^-1 * r)
+        return G_m, spsolve(G_m, H.T * (r_inv * r)).ravel()
+
+    def _store_results(self, successful, et):
         # store results for all elements
+        sem, ppci, v_m, delta = self._sem, self._ppci, self.V, self.delta
         # calculate bus power injections
         v_cpx = v_m * np.exp(1j * delta)
-        bus_powers_conj = np.zeros(len(v_cpx), dtype=np.complex128)
-        for i in range(len(v_cpx)):
-            bus_powers_conj[i] = np.dot(sem.Y_bus[i, :], v_cpx) * np.conjugate(v_cpx[i])
+        bus_powers_conj = (sem.Y_bus * v_cpx) * np.conjugate(v_cpx)
 
         ppci["bus"][:, 2] = bus_powers_conj.real  # saved in per unit
         ppci["bus"][:, 3] = - bus_powers_conj.imag  # saved in per unit
@@ -347,15 +368,13 @@ class state_estimation(object):
         St = v_cpx[np.real(branch[br, T_BUS]).astype(int)] * np.conj(sem.Yt[br, :] * v_cpx) * s_ref
         branch[np.ix_(br, [PF, QF, PT, QT])] = np.c_[Sf.real, Sf.imag, St.real, St.imag]
         branch[np.ix_(out, [PF, QF, PT, QT])] = np.zeros((len(out), 4))
-        et = time() - t0
-        ppci = _store_results_from_pf_in_ppci(ppci, bus, gen, branch, successful, cur_it, et)
+        ppci = _store_results_from_pf_in_ppci(ppci, bus, gen, branch, successful,
+                                              self._iterations, et)
 
         # convert to pandapower indices
-        ppc = _copy_results_ppci_to_ppc(ppci, ppc, mode="se")
+        ppc = _copy_results_ppci_to_ppc(ppci, self._ppc, mode="se")
 
         # extract results from ppc
-        _add_pf_options(self.net, tolerance_kva=1e-5, trafo_loading="current",
-                        numba=True, ac=True, algorithm='nr', max_iteration="auto")
         # writes res_bus.vm_pu / va_degree and res_line
         _extract_results_se(self.net, ppc)
 
@@ -369,23 +388,37 @@ class state_estimation(object):
         self.net.res_bus_est.q_kvar = - get_values(ppc["bus"][:, 3], self.net.bus.index.values,
                                                    mapping_table) * self.s_ref / 1e3
 
-        # store variables required for chi^2 and r_N_max test:
-        self.R_inv = r_inv.toarray()
-        self.Gm = G_m.toarray()
-        self.r = r.toarray()
-        self.H = H.toarray()
-        self.Ht = self.H.T
-        self.hx = h_x
-        self.V = v_m
-        self.delta = delta
-
         # delete results which are not correctly calculated
         for k in list(self.net.keys()):
             if k.startswith("res_") and k.endswith("_est") and \
                     k not in ("res_bus_est", "res_line_est", "res_trafo_est", "res_trafo3w_est"):
                 del self.net[k]
 
-        return successful
+    def _normalized_residuals(self, block_size=256):
+        """
+        Normalized residuals r^N_i = |r_i| / sqrt(Omega_ii) of the last estimation. Only the
+        diagonal of the residual covariance matrix Omega = R - H*G^(-1)*H^T is needed, it is
+        calculated with one sparse LU factorization of the gain matrix G and solves for blocks of
+        columns of H^T, so that neither G^(-1) nor Omega are built as dense matrices.
+        """
+        lu = splu(self.Gm.tocsc())
+        Ht = self.H.T.tocsc()
+        n_meas = Ht.shape[1]
+        h_g_h = np.empty(n_meas)
+        for start in range(0, n_meas, block_size):
+            ht_block = Ht[:, start:start + block_size].toarray()
+            h_g_h[start:start + block_size] = np.einsum("ij,ij->j", ht_block, lu.solve(ht_block))
+
+        # (|.| since some -0.0 produced nans)
+        r_diag = 1. / self.R_inv.diagonal()
+        omega = np.abs(r_diag - h_g_h)
+
+        # the residuals of critical measurements are zero (Omega_ii = 0), errors of these
+        # measurements can not be identified
+        rN = np.zeros(n_meas)
+        detectable = omega > 1e-8 * r_diag
+        rN[detectable] = np.abs(self.r[detectable, 0]) / np.sqrt(omega[detectable])
+        return rN
 
     def perform_chi2_test(self, v_in_out=None, delta_in_out=None,
                           calculate_voltage_angles=True, chi2_prob_false=0.05):
@@ -431,7 +464,7 @@ class state_estimation(object):
         self.estimate(v_in_out, delta_in_out, calculate_voltage_angles)
 
         # Performance index J(hx)
-        J = np.dot(self.r.T, np.dot(self.R_inv, self.r))
+        J = float(self.r.T.dot(self.R_inv * self.r))
 
         # Number of measurements
         m = len(self.net.measurement)
@@ -503,69 +536,211 @@ class state_estimation(object):
         if delta_in_out is None:
             delta_in_out = np.zeros(self.net.bus.shape[0])
 
+        t0 = time()
+        self._prepare_estimation(v_in_out, delta_in_out, calculate_voltage_angles)
         num_iterations = 0
 
-        v_in = v_in_out
-        delta_in = delta_in_out
-
         while num_iterations <= 10:
             # Estimate the state with bad data identified in previous iteration
-            # removed from set of measurements:
-            _ = self.estimate(v_in, delta_in, calculate_voltage_angles)
+            # removed from set of measurements, starting from the previous state:
+            successful = self._wls_estimation()
+            if successful is None:
+                return False
 
             # Try to remove the bad data
             try:
-                # Error covariance matrix:
-                R = np.linalg.inv(self.R_inv)
+                # Compute normalized residuals (r^N_i = |r_i|/sqrt{Omega_ii}):
+                rN = self._normalized_residuals()
+            except (np.linalg.linalg.LinAlgError, RuntimeError):
+                self.logger.error("A problem appeared while using the linear algebra methods."
+                                  "Check and change the measurement set.")
+                self._store_results(successful, time() - t0)
+                return False
 
-                # for future debugging: this line's results have changed with the ppc
-                # overhaul in April 2017 after commit 9ae5b8f42f69ae39f8c8cf (which still works)
-                # there are differences of < 1e-10 for the Omega entries which cause
-                # the function to work far worse. As of now it is unclear if it's just numerical
-                # accuracy to blame or an error in the code. a sort in the ppc creation function
-                # was removed which caused this issue
-                # Covariance matrix of the residuals: \Omega = S*R = R - H*G^(-1)*H^T
-                # (S is the sensitivity matrix: r = S*e):
-                Omega = R - np.dot(self.H, np.dot(np.linalg.inv(self.Gm), self.Ht))
+            if max(rN) <= rn_max_threshold:
+                self.logger.debug("Largest normalized residual test passed. "
+                                  "No bad data detected.")
+                self._store_results(successful, time() - t0)
+                return True
+
+            self.logger.debug("Largest normalized residual test failed (%.1f > %.1f)."
+                              % (max(rN), rn_max_threshold))
+
+            # Identify bad data: Determine index corresponding to max(rN):
+            idx_rN = np.argmax(rN)
+
+            # Determine pandapower index of measurement to be removed:
+            meas_idx = self.pp_meas_indices[idx_rN]
+            meas = self.net.measurement.loc[meas_idx]
+
+            # Remove bad measurement:
+            self.logger.debug("Removing measurement: %s" % meas.values[0])
+            self.net.measurement.drop(meas_idx, inplace=True)
+            self._active_meas[np.flatnonzero(self._active_meas)[idx_rN]] = False
+            self.logger.debug("Bad data removed from the set of measurements.")
+
+            # a measurement which was overwritten by the removed one is used again, this
+            # requires to build the measurement vectors again
+            same_quantity = self.net.measurement[
+                (self.net.measurement.type == meas.type) &
+                (self.net.measurement.element_type == meas.element_type) &
+                (self.net.measurement.bus == meas.bus)]
+            if meas.element_type != "bus":
+                same_quantity = same_quantity[same_quantity.element == meas.element]
+            if len(same_quantity):
+                self._store_results(successful, time() - t0)
+                self._prepare_estimation(self.net.res_bus_est.vm_pu.values,
+                                         self.net.res_bus_est.va_degree.values,
+                                         calculate_voltage_angles)
 
-                # Diagonalize \Omega:
-                Omega = np.diag(np.diag(Omega))
+            self.logger.debug("rN_max identification threshold: %.2f" % rn_max_threshold)
+            num_iterations += 1
 
-                # Compute squareroot (|.| since some -0.0 produced nans):
-                Omega = np.sqrt(np.absolute(Omega))
+        self._store_results(successful, time() - t0)
+        return False
 
-                OmegaInv = np.linalg.inv(Omega)
 
-                # Compute normalized residuals (r^N_i = |r_i|/sqrt{Omega_ii}):
-                rN = np.dot(OmegaInv, np.absolute(self.r))
+class tracking_state_estimation(state_estimation):
+    """
+    State estimation for a sequence of measurement snapshots of the same network, e.g. the cycles
+    of a real-time state estimation with SCADA data. The ppci, the mapping of the measurements to
+    the ppci and the matrix calculation object are built once by *initialize*, every call of
+    *update* only takes the new measurement values and starts from the state of the previous
+    snapshot. If the topology of the network or the set of measurements in net.measurement
+    changes, *initialize* has to be called again.
 
-                if max(rN) <= rn_max_threshold:
-                    self.logger.debug("Largest normalized residual test passed. "
-                                      "No bad data detected.")
-                    return True
-                else:
-                    self.logger.debug(
-                        "Largest normalized residual test failed (%.1f > %.1f)."
-                        % (max(rN), rn_max_threshold))
+    INPUT:
+        **net** - The pandapower network with the measurements
 
-                    # Identify bad data: Determine index corresponding to max(rN):
-                    idx_rN = np.argsort(rN, axis=0)[-1]
+    OPTIONAL:
+        **tolerance** - (float) - When the maximum state change between iterations is less than
+        tolerance, the process stops. Default is 1e-6.
 
-                    # Determine pandapower index of measurement to be removed:
-                    meas_idx = self.pp_meas_indices[idx_rN]
+        **maximum_iterations** - (integer) - Maximum number of iterations. Default is 10.
 
-                    # Remove bad measurement:
-                    self.logger.debug("Removing measurement: %s"
-                                      % self.net.measurement.loc[meas_idx].values[0])
-                    self.net.measurement.drop(meas_idx, inplace=True)
-                    self.logger.debug("Bad data removed from the set of measurements.")
+        **ref_power** - (float) - Reference power in W. Default is 1e6.
 
-            except np.linalg.linalg.LinAlgError:
-                self.logger.error("A problem appeared while using the linear algebra methods."
-                                  "Check and change the measurement set.")
-                return False
+        **reuse_gain** (bool, False) - keeps the sparse LU factorization of the gain matrix of
+        the last converged snapshot and uses it for the following snapshots as long as the
+        available measurements and their standard deviations do not change. The iterations are
+        cheaper, but more of them may be needed. If the estimation does not converge with the
+        kept factorization, it is repeated with the exact gain matrix.
 
-            self.logger.debug("rN_max identification threshold: %.2f" % rn_max_threshold)
-            num_iterations += 1
+    EXAMPLE:
+        tse = tracking_state_estimation(net, reuse_gain=True)
+        tse.initialize(init="flat")
+        for values in scada_snapshots:
+            successful = tse.update(values)
+            vm_pu = net.res_bus_est.vm_pu
+    """
+    def __init__(self, net, tolerance=1e-6, maximum_iterations=10, logger=None, ref_power=1e6,
+                 reuse_gain=False):
+        super(tracking_state_estimation, self).__init__(tolerance, maximum_iterations, net,
+                                                        logger, ref_power)
+        self.reuse_gain = reuse_gain
+        self._meas_positions = None
+        self._meas_scale = None
+        self._gain = None
+        self._gain_lu = None
+        self._gain_meas = None
+        self._last_step = None
+        self._results_backed_up = False
+
+    def initialize(self, init="flat", calculate_voltage_angles=True):
+        """
+        Builds the ppci with the measurements of net.measurement and sets the start values for
+        the first snapshot.
 
-        return False
+        OPTIONAL:
+            **init** - (string) Initial voltage for the estimation, see *estimate*. Default is
+            'flat'.
+
+            **calculate_voltage_angles** - (boolean) - Take into account absolute voltage angles
+            and phase shifts in transformers. Default is True.
+        """
+        if self.net is None:
+            raise UserWarning("Component was not initialized with a network.")
+        v_start, delta_start = _initial_voltages(self.net, init, calculate_voltage_angles)
+        self._prepare_estimation(v_start, delta_start, calculate_voltage_angles)
+
+        # position of the measurement of each row in net.measurement (-1 for the virtual
+        # measurements at the buses of open line switches) and the conversion to per unit
+        self._meas_positions = self.net.measurement.index.get_indexer(self._meas_indices)
+        mapped = self._meas_positions >= 0
+        self._meas_scale = np.zeros(len(self._z))
+        self._meas_scale[mapped] = self._r_cov[mapped] / \
+            self.net.measurement.std_dev.values[self._meas_positions[mapped]]
+        self._gain, self._gain_lu, self._gain_meas = None, None, None
+        self._results_backed_up = True
+
+    def _measurement_vector(self, values):
+        if isinstance(values, pd.Series):
+            values = values.reindex(self.net.measurement.index).values
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(self.net.measurement),):
+            raise UserWarning("Expected %d values sorted like net.measurement, got %d" %
+                              (len(self.net.measurement), values.size))
+        mapped = self._meas_positions >= 0
+        return mapped, values[self._meas_positions[mapped]] * self._meas_scale[mapped]
+
+    def update(self, values=None, std_dev=None):
+        """
+        Estimates the state for a new measurement snapshot, starting from the state of the
+        previous snapshot. The results are written to the res_*_est tables of the network.
+
+        OPTIONAL:
+            **values** (array or pandas.Series, None) - measurement values in the units of
+            net.measurement.value. An array has to be sorted like net.measurement, a Series is
+            aligned by the measurement index. Measurements with the value NaN are not used for
+            this snapshot. If None, the values of the previous snapshot are used.
+
+            **std_dev** (array or pandas.Series, None) - standard deviations of the
+            measurements, given like *values*. If None, the previous standard deviations are used.
+
+        OUTPUT:
+            **successful** (boolean) - True if the estimation process was successful
+        """
+        if self._meas_positions is None:
+            self.initialize()
+        t0 = time()
+        if values is not None:
+            mapped, z = self._measurement_vector(values)
+            self._z[mapped] = z
+        if std_dev is not None:
+            mapped, r_cov = self._measurement_vector(std_dev)
+            self._r_cov[mapped] = r_cov
+            self._gain, self._gain_lu = None, None
+        self._active_meas = ~np.isnan(self._z)
+        if self._gain_meas is None or not np.array_equal(self._gain_meas, self._active_meas):
+            self._gain, self._gain_lu = None, None
+
+        self._last_step = None
+        successful = self._wls_estimation()
+        if successful is None:
+            return False
+        if not successful and self._gain_lu is not None:
+            # the kept gain matrix does not fit to this snapshot anymore
+            self._gain, self._gain_lu = None, None
+            successful = self._wls_estimation()
+        if successful and self.reuse_gain and self._gain_lu is None:
+            self._gain, self._gain_lu = self.Gm, splu(self.Gm)
+            self._gain_meas = self._active_meas.copy()
+
+        # back up the power flow results for every snapshot, _store_results restores them
+        if not self._results_backed_up:
+            _copy_power_flow_results(self.net)
+        self._store_results(successful, time() - t0)
+        self._results_backed_up = False
+        return successful
+
+    def _gain_step(self, H, r_inv, r):
+        if self._gain_lu is not None:
+            d_E = self._gain_lu.solve(H.T * (r_inv * r)).ravel()
+            step = np.max(np.abs(d_E))
+            if self._last_step is None or step < self._last_step:
+                self._last_step = step
+                return self._gain, d_E
+            # the iterations with the kept gain matrix do not contract for this snapshot, the
+            # remaining iterations use the exact gain matrix
+            self._gain, self._gain_lu = None, None
+        return super(tracking_state_estimation, self)._gain_step(H, r_inv, r)
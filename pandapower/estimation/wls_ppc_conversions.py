@@ -12,7 +12,6 @@ from pandapower.estimation.idx_brch import *
 from pandapower.idx_brch import branch_cols
 from pandapower.idx_bus import bus_cols
 from pandapower.pf.run_newton_raphson_pf import _run_dc_pf
-from pandapower.build_branch import get_is_lines
 
 
 def _init_ppc(net, v_start, delta_start, calculate_voltage_angles):
@@ -39,6 +38,68 @@ def _init_ppc(net, v_start, delta_start, calculate_voltage_angles):
     return ppc, ppci
 
 
+# columns (value, standard deviation, pandapower index) of the bus and branch measurements in the
+# measurement columns which are appended to ppci["bus"] and ppci["branch"]
+_bus_meas_cols = {"v": (VM, VM_STD, VM_IDX), "p": (P, P_STD, P_IDX), "q": (Q, Q_STD, Q_IDX)}
+_branch_meas_cols = {("i", 0): (IM_FROM, IM_FROM_STD, IM_FROM_IDX),
+                     ("i", 1): (IM_TO, IM_TO_STD, IM_TO_IDX),
+                     ("p", 0): (P_FROM, P_FROM_STD, P_FROM_IDX),
+                     ("p", 1): (P_TO, P_TO_STD, P_TO_IDX),
+                     ("q", 0): (Q_FROM, Q_FROM_STD, Q_FROM_IDX),
+                     ("q", 1): (Q_TO, Q_TO_STD, Q_TO_IDX)}
+
+
+def _measurement_ppci_positions(net, s_ref):
+    """
+    Maps all measurements in net.measurement to their positions in the ppci at once
+    :param net: pandapower net after _pd2ppc
+    :param s_ref: reference power in W
+    :return: dict with the measurement indices, a flag for branch measurements, the ppci rows,
+             the measurement columns (value, std dev, index) and the per unit conversion factors.
+             Measurements which do not fit to the measured element are left out.
+    """
+    meas = net.measurement
+    meas_type = meas.type.values
+    element_type = meas.element_type.values
+    meas_bus = meas.bus.values.astype(np.int64)
+    n_meas = len(meas)
+    is_branch = np.zeros(n_meas, dtype=bool)
+    rows = np.full(n_meas, -1, dtype=np.int64)
+    cols = np.full((n_meas, 3), -1, dtype=np.int64)
+    factor = np.full(n_meas, 1e3 / s_ref)
+
+    map_bus = net["_pd2ppc_lookups"]["bus"]
+    for t, c in _bus_meas_cols.items():
+        sel = np.flatnonzero((element_type == "bus") & (meas_type == t))
+        rows[sel] = map_bus[meas_bus[sel]]
+        cols[sel] = c
+    factor[meas_type == "v"] = 1.
+
+    for et, sides in [("line", ("from_bus", "to_bus")), ("trafo", ("hv_bus", "lv_bus"))]:
+        if et not in net["_pd2ppc_lookups"]["branch"]:
+            continue
+        sel = np.flatnonzero(element_type == et)
+        element_pos = net[et].index.get_indexer(meas.element.values[sel].astype(np.int64))
+        found = element_pos >= 0
+        sel, element_pos = sel[found], element_pos[found]
+        for side, column in enumerate(sides):
+            at_side = meas_bus[sel] == net[et][column].values[element_pos]
+            for (t, s), c in _branch_meas_cols.items():
+                if s != side:
+                    continue
+                is_t = at_side & (meas_type[sel] == t)
+                rows[sel[is_t]] = net["_pd2ppc_lookups"]["branch"][et][0] + element_pos[is_t]
+                cols[sel[is_t]] = c
+        is_branch[sel] = True
+    is_i = meas_type == "i"
+    factor[is_i] = net.bus.vn_kv.loc[meas_bus[is_i]].values * 1e3 / s_ref
+
+    valid = (rows >= 0) & (cols[:, 0] >= 0)
+    return {"index": meas.index.values[valid], "is_branch": is_branch[valid],
+            "row": rows[valid], "cols": cols[valid], "factor": factor[valid],
+            "value": meas.value.values[valid], "std_dev": meas.std_dev.values[valid]}
+
+
 def _add_measurements_to_ppc(net, ppci, s_ref):
     """
     Add pandapower measurements to the ppci structure by adding new columns
@@ -47,48 +108,28 @@ def _add_measurements_to_ppc(net, ppci, s_ref):
     :param s_ref: reference power in W
     :return: ppc with added columns
     """
-
-    map_bus = net["_pd2ppc_lookups"]["bus"]
-    map_line, map_trafo = None, None
-    # mapping to dict instead of np array ensures good performance for large indices
-    # (e.g., 999999999 requires a large np array even if there are only 2 buses)
-    # downside is loop comprehension to access the map
-    if "line" in net["_pd2ppc_lookups"]["branch"]:
-        map_line = dict(zip(net.line.index, range(*net["_pd2ppc_lookups"]["branch"]["line"])))
-    if "trafo" in net["_pd2ppc_lookups"]["branch"]:
-        map_trafo = dict(zip(net.trafo.index, range(*net["_pd2ppc_lookups"]["branch"]["trafo"])))
-
     # set measurements for ppc format
     # add 9 columns to ppc[bus] for Vm, Vm std dev, P, P std dev, Q, Q std dev,
     # pandapower measurement indices V, P, Q
     bus_append = np.full((ppci["bus"].shape[0], bus_cols_se), np.nan, dtype=ppci["bus"].dtype)
 
-    v_measurements = net.measurement[(net.measurement.type == "v")
-                                     & (net.measurement.element_type == "bus")]
-    if len(v_measurements):
-        bus_positions = map_bus[v_measurements.bus.values.astype(int)]
-        bus_append[bus_positions, VM] = v_measurements.value.values
-        bus_append[bus_positions, VM_STD] = v_measurements.std_dev.values
-        bus_append[bus_positions, VM_IDX] = v_measurements.index.values
-
-    p_measurements = net.measurement[(net.measurement.type == "p")
-                                     & (net.measurement.element_type == "bus")]
-    if len(p_measurements):
-        bus_positions = map_bus[p_measurements.bus.values.astype(int)]
-        bus_append[bus_positions, P] = p_measurements.value.values * 1e3 / s_ref
-        bus_append[bus_positions, P_STD] = p_measurements.std_dev.values * 1e3 / s_ref
-        bus_append[bus_positions, P_IDX] = p_measurements.index.values
+    # add 18 columns to mpc[branch] for Im_from, Im_from std dev, Im_to, Im_to std dev,
+    # P_from, P_from std dev, P_to, P_to std dev, Q_from, Q_from std dev,  Q_to, Q_to std dev,
+    # pandapower measurement index I, P, Q
+    branch_append = np.full((ppci["branch"].shape[0], branch_cols_se),
+                            np.nan, dtype=ppci["branch"].dtype)
 
-    q_measurements = net.measurement[(net.measurement.type == "q")
-                                     & (net.measurement.element_type == "bus")]
-    if len(q_measurements):
-        bus_positions = map_bus[q_measurements.bus.values.astype(int)]
-        bus_append[bus_positions, Q] = q_measurements.value.values * 1e3 / s_ref
-        bus_append[bus_positions, Q_STD] = q_measurements.std_dev.values * 1e3 / s_ref
-        bus_append[bus_positions, Q_IDX] = q_measurements.index.values
+    meas = _measurement_ppci_positions(net, s_ref)
+    for append, is_branch in [(bus_append, False), (branch_append, True)]:
+        sel = meas["is_branch"] == is_branch
+        rows, cols = meas["row"][sel], meas["cols"][sel]
+        append[rows, cols[:, 0]] = meas["value"][sel] * meas["factor"][sel]
+        append[rows, cols[:, 1]] = meas["std_dev"][sel] * meas["factor"][sel]
+        append[rows, cols[:, 2]] = meas["index"][sel]
 
     # add virtual measurements for artificial buses, which were created because
     # of an open line switch. p/q are 0. and std dev is 1. (small value)
+    map_bus = net["_pd2ppc_lookups"]["bus"]
     new_in_line_buses = np.setdiff1d(np.arange(ppci["bus"].shape[0]),
                                      map_bus[map_bus >= 0])
     bus_append[new_in_line_buses, 2] = 0.
@@ -96,126 +137,6 @@ def _add_measurements_to_ppc(net, ppci, s_ref):
     bus_append[new_in_line_buses, 4] = 0.
     bus_append[new_in_line_buses, 5] = 1.
 
-    # add 15 columns to mpc[branch] for Im_from, Im_from std dev, Im_to, Im_to std dev,
-    # P_from, P_from std dev, P_to, P_to std dev, Q_from, Q_from std dev,  Q_to, Q_to std dev,
-    # pandapower measurement index I, P, Q
-    branch_append = np.full((ppci["branch"].shape[0], branch_cols_se),
-                            np.nan, dtype=ppci["branch"].dtype)
-
-    i_measurements = net.measurement[(net.measurement.type == "i")
-                                     & (net.measurement.element_type == "line")]
-    if len(i_measurements):
-        meas_from = i_measurements[(i_measurements.bus.values.astype(int) ==
-                                    net.line.from_bus[i_measurements.element]).values]
-        meas_to = i_measurements[(i_measurements.bus.values.astype(int) ==
-                                  net.line.to_bus[i_measurements.element]).values]
-        ix_from = [map_line[l] for l in meas_from.element.values.astype(int)]
-        ix_to = [map_line[l] for l in meas_to.element.values.astype(int)]
-        i_a_to_pu_from = (net.bus.vn_kv[meas_from.bus] * 1e3 / s_ref).values
-        i_a_to_pu_to = (net.bus.vn_kv[meas_to.bus] * 1e3 / s_ref).values
-        branch_append[ix_from, IM_FROM] = meas_from.value.values * i_a_to_pu_from
-        branch_append[ix_from, IM_FROM_STD] = meas_from.std_dev.values * i_a_to_pu_from
-        branch_append[ix_from, IM_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, IM_TO] = meas_to.value.values * i_a_to_pu_to
-        branch_append[ix_to, IM_TO_STD] = meas_to.std_dev.values * i_a_to_pu_to
-        branch_append[ix_to, IM_TO_IDX] = meas_to.index.values
-
-    p_measurements = net.measurement[(net.measurement.type == "p")
-                                      & (net.measurement.element_type == "line")]
-    if len(p_measurements):
-        meas_from = p_measurements[(p_measurements.bus.values.astype(int) ==
-                                    net.line.from_bus[p_measurements.element]).values]
-        meas_to = p_measurements[(p_measurements.bus.values.astype(int) ==
-                                  net.line.to_bus[p_measurements.element]).values]
-        ix_from = [map_line[l] for l in meas_from.element.values.astype(int)]
-        ix_to = [map_line[l] for l in meas_to.element.values.astype(int)]
-        branch_append[ix_from, P_FROM] = meas_from.value.values * 1e3 / s_ref
-        branch_append[ix_from, P_FROM_STD] = meas_from.std_dev.values * 1e3 / s_ref
-        branch_append[ix_from, P_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, P_TO] = meas_to.value.values * 1e3 / s_ref
-        branch_append[ix_to, P_TO_STD] = meas_to.std_dev.values * 1e3 / s_ref
-        branch_append[ix_to, P_TO_IDX] = meas_to.index.values
-
-    q_measurements = net.measurement[(net.measurement.type == "q")
-                                     & (net.measurement.element_type == "line")]
-    if len(q_measurements):
-        meas_from = q_measurements[(q_measurements.bus.values.astype(int) ==
-                                    net.line.from_bus[q_measurements.element]).values]
-        meas_to = q_measurements[(q_measurements.bus.values.astype(int) ==
-                                  net.line.to_bus[q_measurements.element]).values]
-        ix_from = [map_line[l] for l in meas_from.element.values.astype(int)]
-        ix_to = [map_line[l] for l in meas_to.element.values.astype(int)]
-        branch_append[ix_from, Q_FROM] = meas_from.value.values * 1e3 / s_ref
-        branch_append[ix_from, Q_FROM_STD] = meas_from.std_dev.values * 1e3 / s_ref
-        branch_append[ix_from, Q_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, Q_TO] = meas_to.value.values * 1e3 / s_ref
-        branch_append[ix_to, Q_TO_STD] = meas_to.std_dev.values * 1e3 / s_ref
-        branch_append[ix_to, Q_TO_IDX] = meas_to.index.values
-
-    # determine number of lines in ppci["branch"]
-    # out of service lines and lines with open switches at both ends are not in the ppci
-    _is_elements = net["_is_elements"]
-    if "line" not in _is_elements:
-        get_is_lines(net)
-    lines_is = _is_elements['line']
-    bus_is_idx = _is_elements['bus_is_idx']
-    slidx = (net["switch"]["closed"].values == 0) \
-            & (net["switch"]["et"].values == "l") \
-            & (np.in1d(net["switch"]["element"].values, lines_is.index)) \
-            & (np.in1d(net["switch"]["bus"].values, bus_is_idx))
-    ppci_lines = len(lines_is) - np.count_nonzero(slidx)
-
-    i_tr_measurements = net.measurement[(net.measurement.type == "i")
-                                        & (net.measurement.element_type == "trafo")]
-    if len(i_tr_measurements):
-        meas_from = i_tr_measurements[(i_tr_measurements.bus.values.astype(int) ==
-                                       net.trafo.hv_bus[i_tr_measurements.element]).values]
-        meas_to = i_tr_measurements[(i_tr_measurements.bus.values.astype(int) ==
-                                     net.trafo.lv_bus[i_tr_measurements.element]).values]
-        ix_from = [map_trafo[t] for t in meas_from.element.values.astype(int)]
-        ix_to = [map_trafo[t] for t in meas_to.element.values.astype(int)]
-        i_a_to_pu_from = (net.bus.vn_kv[meas_from.bus] * 1e3 / s_ref).values
-        i_a_to_pu_to = (net.bus.vn_kv[meas_to.bus] * 1e3 / s_ref).values
-        branch_append[ix_from, IM_FROM] = meas_from.value.values * i_a_to_pu_from
-        branch_append[ix_from, IM_FROM_STD] = meas_from.std_dev.values * i_a_to_pu_from
-        branch_append[ix_from, IM_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, IM_TO] = meas_to.value.values * i_a_to_pu_to
-        branch_append[ix_to, IM_TO_STD] = meas_to.std_dev.values * i_a_to_pu_to
-        branch_append[ix_to, IM_TO_IDX] = meas_to.index.values
-
-    p_tr_measurements = net.measurement[(net.measurement.type == "p") &
-                                        (net.measurement.element_type == "trafo")]
-
-    if len(p_tr_measurements):
-        meas_from = p_tr_measurements[(p_tr_measurements.bus.values.astype(int) ==
-                                       net.trafo.hv_bus[p_tr_measurements.element]).values]
-        meas_to = p_tr_measurements[(p_tr_measurements.bus.values.astype(int) ==
-                                     net.trafo.lv_bus[p_tr_measurements.element]).values]
-        ix_from = [map_trafo[t] for t in meas_from.element.values.astype(int)]
-        ix_to = [map_trafo[t] for t in meas_to.element.values.astype(int)]
-        branch_append[ix_from, P_FROM] = meas_from.value.values * 1e3 / s_ref
-        branch_append[ix_from, P_FROM_STD] = meas_from.std_dev.values * 1e3 / s_ref
-        branch_append[ix_from, P_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, P_TO] = meas_to.value.values * 1e3 / s_ref
-        branch_append[ix_to, P_TO_STD] = meas_to.std_dev.values * 1e3 / s_ref
-        branch_append[ix_to, P_TO_IDX] = meas_to.index.values
-
-    q_tr_measurements = net.measurement[(net.measurement.type == "q") &
-                                        (net.measurement.element_type == "trafo")]
-    if len(q_tr_measurements):
-        meas_from = q_tr_measurements[(q_tr_measurements.bus.values.astype(int) ==
-                                       net.trafo.hv_bus[q_tr_measurements.element]).values]
-        meas_to = q_tr_measurements[(q_tr_measurements.bus.values.astype(int) ==
-                                     net.trafo.lv_bus[q_tr_measurements.element]).values]
-        ix_from = [map_trafo[t] for t in meas_from.element.values.astype(int)]
-        ix_to = [map_trafo[t] for t in meas_to.element.values.astype(int)]
-        branch_append[ix_from, Q_FROM] = meas_from.value.values * 1e3 / s_ref
-        branch_append[ix_from, Q_FROM_STD] = meas_from.std_dev.values * 1e3 / s_ref
-        branch_append[ix_from, Q_FROM_IDX] = meas_from.index.values
-        branch_append[ix_to, Q_TO] = meas_to.value.values * 1e3 / s_ref
-        branch_append[ix_to, Q_TO_STD] = meas_to.std_dev.values * 1e3 / s_ref
-        branch_append[ix_to, Q_TO_IDX] = meas_to.index.values
-
     ppci["bus"] = np.hstack((ppci["bus"], bus_append))
     ppci["branch"] = np.hstack((ppci["branch"], branch_append))
     return ppci
@@ -5,30 +5,25 @@
 
 
 import copy
+import datetime
 import json
+import mmap
 import os
 import pickle
 import sys
+import zipfile
 from warnings import warn
 
-try:
-    from fiona.crs import from_epsg
-    from geopandas import GeoDataFrame, GeoSeries
-    from shapely.geometry import Point, LineString
-
-    GEOPANDAS_INSTALLED = True
-except ImportError:
-    GEOPANDAS_INSTALLED = False
-
 import pandas as pd
+from six import StringIO, string_types
 
 import numpy
 
 from pandapower.auxiliary import pandapowerNet
-from pandapower.create import create_empty_network
 from pandapower.toolbox import convert_format
 from pandapower.io_utils import to_dict_of_dfs, dicts_to_pandas, from_dict_of_dfs, \
-    PPJSONEncoder, PPJSONDecoder
+    PPJSONDecoder, write_npz_dataframe, read_npz_dataframe, write_json_items, iter_json_items, \
+    line_geodata_from_wide, _geopandas_installed, _empty_network_for_loading
 
 
 def to_pickle(net, filename):
@@ -70,6 +65,37 @@ def to_pickle(net, filename):
         pickle.dump(save_net, f, protocol=2)  # use protocol 2 for py2 / py3 compatibility
 
 
+def to_npz(net, filename):
+    """
+    Saves a pandapower Network in a binary container format. The file is an uncompressed zip
+    archive of .npy files, in which every DataFrame is stored column by column together with its
+    dtypes and index. All other net items are pickled.
+
+    INPUT:
+        **net** (dict) - The pandapower format network
+
+        **filename** (string) - The absolute or relative path to the output file
+
+    EXAMPLE:
+
+        >>> pp.to_npz(net, os.path.join("C:", "example_folder", "example1.npz"))  # absolute path
+        >>> pp.to_npz(net, "example2.npz")  # relative path
+
+    """
+    if not filename.endswith(".npz"):
+        raise Exception("Please use .npz to save pandapower networks in the npz format!")
+    items = dict()
+    tables = dict()
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for key, item in net.items():
+            if isinstance(item, pd.DataFrame):
+                tables[key] = write_npz_dataframe(zf, "table%i" % len(tables), item)
+            else:
+                items[key] = item
+        # use protocol 2 for py2 / py3 compatibility
+        zf.writestr("net.p", pickle.dumps({"items": items, "tables": tables}, protocol=2))
+
+
 def to_excel(net, filename, include_empty_tables=False, include_results=True):
     """
     Saves a pandapower Network to an excel file.
@@ -97,7 +123,7 @@ def to_excel(net, filename, include_empty_tables=False, include_results=True):
     writer.save()
 
 
-def to_json_string(net):
+def to_json_string(net, compact=False):
     """
         Returns a pandapower Network in JSON format. The index columns of all pandas DataFrames will
         be saved in ascending order. net elements which name begins with "_" (internal elements)
@@ -106,44 +132,48 @@ def to_json_string(net):
         INPUT:
             **net** (dict) - The pandapower format network
 
-            **filename** (string) - The absolute or relative path to the input file.
+        OPTIONAL:
+            **compact** (bool, False) - omit indentation and whitespace to reduce the size of the
+            JSON string. The result can be read by all JSON readers of pandapower.
 
         EXAMPLE:
 
              >>> json = pp.to_json_string(net)
 
     """
-    json_string = "{"
-    for k in sorted(net.keys()):
-        if k[0] == "_":
-            continue
-        json_string += '"%s":%s,' % (k, json.dumps(net[k], cls=PPJSONEncoder, indent=4))
-    json_string = json_string[:-1] + "}\n"
-    return json_string
+    json_string = StringIO()
+    write_json_items(json_string, net, compact=compact)
+    return json_string.getvalue()
 
 
-def to_json(net, filename=None):
+def to_json(net, filename=None, compact=False):
     """
         Saves a pandapower Network in JSON format. The index columns of all pandas DataFrames will
         be saved in ascending order. net elements which name begins with "_" (internal elements)
         will not be saved. Std types will also not be saved.
+        The elements are encoded and written to the file one after the other, so that the JSON
+        string of the complete network is never held in memory.
 
         INPUT:
             **net** (dict) - The pandapower format network
 
             **filename** (string or file) - The absolute or relative path to the output file or file-like object
 
+        OPTIONAL:
+            **compact** (bool, False) - omit indentation and whitespace to reduce the file size.
+            The file can be read by all JSON readers of pandapower.
+
         EXAMPLE:
 
              >>> pp.to_json(net, "example.json")
+             >>> pp.to_json(net, "example_compact.json", compact=True)
 
     """
-    json_string = to_json_string(net)
     if hasattr(filename, 'write'):
-        filename.write(json_string)
+        write_json_items(filename, net, compact=compact)
         return
     with open(filename, "w") as text_file:
-        text_file.write(json_string)
+        write_json_items(text_file, net, compact=compact)
 
 
 def to_sql(net, con, include_results=True):
@@ -205,8 +235,11 @@ def from_pickle(filename, convert=True):
                     df_index = pd.Int64Index(df_dict['index'])
                 except TypeError:
                     df_index = df_dict['index']
-                if GEOPANDAS_INSTALLED and "geometry" in df_dict["columns"] \
-                        and epsg is not None:
+                if "geometry" in df_dict["columns"] and epsg is not None \
+                        and _geopandas_installed():
+                    from fiona.crs import from_epsg
+                    from geopandas import GeoDataFrame
+                    from shapely.geometry import Point, LineString
                     # convert primitive data-types to shapely-objects
                     if key == "bus_geodata":
                         data = {"x": [row[0] for row in df_dict["data"]],
@@ -246,6 +279,47 @@ def from_pickle(filename, convert=True):
     return net
 
 
+def from_npz(filename, convert=True, use_mmap=True):
+    """
+    Load a pandapower network from a file that was saved with to_npz. Numerical columns are read
+    by memory mapping the file, so that loading large networks is mostly limited by disk I/O.
+
+    INPUT:
+        **filename** (string) - The absolute or relative path to the input file
+
+    OPTIONAL:
+        **convert** (bool, True) - use the convert format function to
+
+        **use_mmap** (bool, True) - read numerical columns by memory mapping the file \
+            (copy-on-write, the file is never changed). If False, the arrays are read from the \
+            file directly.
+
+    OUTPUT:
+        **net** (dict) - The pandapower format network
+
+    EXAMPLE:
+
+        >>> net1 = pp.from_npz(os.path.join("C:", "example_folder", "example1.npz")) #absolute path
+        >>> net2 = pp.from_npz("example2.npz") #relative path
+
+    """
+    if not os.path.isfile(filename):
+        raise UserWarning("File %s does not exist!!" % filename)
+    with open(filename, "rb") as f, zipfile.ZipFile(f) as zf:
+        if sys.version_info >= (3, 0):
+            content = pickle.loads(zf.read("net.p"), encoding='latin1')
+        else:
+            content = pickle.loads(zf.read("net.p"))
+        # copy-on-write memory map: the arrays are writable, but the file is never changed
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) if use_mmap else None
+        net = pandapowerNet(content["items"])
+        for key, table in content["tables"].items():
+            net[key] = read_npz_dataframe(zf, f, table, mm)
+    if convert:
+        convert_format(net)
+    return net
+
+
 def from_excel(filename, convert=True):
     """
     Load a pandapower network from an excel file
@@ -286,7 +360,9 @@ def from_excel(filename, convert=True):
 def _from_excel_old(xls):
     par = xls["parameters"]["parameters"]
     name = None if pd.isnull(par.at["name"]) else par.at["name"]
-    net = create_empty_network(name=name, f_hz=par.at["f_hz"])
+    net = _empty_network_for_loading(name=name, f_hz=par.at["f_hz"])
+    if "version" in par:
+        net.version = par.at["version"]
 
     for item, table in xls.items():
         if item == "parameters":
@@ -296,11 +372,7 @@ def _from_excel_old(xls):
             for std_type, tab in table.iterrows():
                 net.std_types[item][std_type] = dict(tab)
         elif item == "line_geodata":
-            points = int(len(table.columns) / 2)
-            for i, coords in table.iterrows():
-                coord = [(coords["x%u" % nr], coords["y%u" % nr]) for nr in range(points)
-                         if pd.notnull(coords["x%u" % nr])]
-                net.line_geodata.loc[i, "coords"] = coord
+            net[item] = line_geodata_from_wide(table)
         else:
             net[item] = table
     return net
@@ -311,6 +383,8 @@ def from_json(filename, convert=True):
     Load a pandapower network from a JSON file.
     The index of the returned network is not necessarily in the same order as the original network.
     Index columns of all pandas DataFrames are sorted in ascending order.
+    The file is read in chunks and every element is decoded as soon as it is complete, so that the
+    text of the complete file is never held in memory.
 
     INPUT:
         **filename** (string or file) - The absolute or relative path to the input file or file-like object
@@ -326,12 +400,12 @@ def from_json(filename, convert=True):
 
     """
     if hasattr(filename, 'read'):
-        data = json.load(filename, cls=PPJSONDecoder)
+        data = dict(iter_json_items(filename))
     elif not os.path.isfile(filename):
         raise UserWarning("File %s does not exist!!" % filename)
     else:
         with open(filename) as data_file:
-            data = json.load(data_file, cls=PPJSONDecoder)
+            data = dict(iter_json_items(data_file))
     try:
         pd_dicts = dicts_to_pandas(data)
         net = from_dict_of_dfs(pd_dicts)
@@ -395,7 +469,7 @@ def from_json_dict(json_dict, convert=True):
     """
     warn("This function is deprecated and will be removed in a future release.\r\n"
          "Please resave your grid using the current pandapower version.", DeprecationWarning)
-    net = create_empty_network(name=json_dict["name"], f_hz=json_dict["f_hz"])
+    net = _empty_network_for_loading(name=json_dict["name"], f_hz=json_dict["f_hz"])
 
     for key in sorted(json_dict.keys()):
         if key == 'dtypes':
@@ -413,7 +487,9 @@ def from_json_dict(json_dict, convert=True):
 
 def from_sql(con):
     cursor = con.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    # tables of the SQLiteStore snapshots are not part of the net
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'snapshots' "
+                   "AND name NOT LIKE 'snapshot\\_res\\_%' ESCAPE '\\';")
     dodfs = dict()
     for t, in cursor.fetchall():
         table = pd.read_sql_query("SELECT * FROM %s" % t, con, index_col="index")
@@ -429,3 +505,217 @@ def from_sqlite(filename, netname=""):
     net = from_sql(con)
     con.close()
     return net
+
+
+class SQLiteStore(object):
+    """
+    SQLite file which holds a pandapower network and the results of many power flow calculations,
+    e.g. the time steps of a time series or different scenarios. The network is written once,
+    the result tables (res_bus, res_line, ...) are appended as snapshots with a key (e.g. a
+    timestamp or a scenario id). Snapshots are buffered and written in batches, each batch in a
+    single transaction.
+
+    The results of one element type are stored in the table "snapshot_res_<element>" with one row
+    per snapshot and element. The table is clustered by snapshot and indexed by element, so that
+    both loading a complete snapshot and reading the history of a single element are fast.
+
+    INPUT:
+        **filename** (string) - The absolute or relative path to the sqlite file. An existing
+        file is opened and new snapshots are appended.
+
+    OPTIONAL:
+        **net** (pandapowerNet, None) - network that is written to the file (replaces the
+        network stored in the file)
+
+        **batch_size** (int, 100) - number of snapshots which are buffered before they are
+        written to the file
+
+    EXAMPLE:
+
+        >>> with pp.SQLiteStore("study.db", net) as store:
+        >>>     for t in timesteps:
+        >>>         ...
+        >>>         pp.runpp(net)
+        >>>         store.append_results(net, t)
+        >>> store = pp.SQLiteStore("study.db")
+        >>> vm_pu = store.read_history("bus", 5, "vm_pu")
+
+    """
+    def __init__(self, filename, net=None, batch_size=100):
+        import sqlite3
+        self.con = sqlite3.connect(filename)
+        self.batch_size = batch_size
+        self._buffer = []
+        self._buffer_keys = set()
+        self._columns = dict()
+        with self.con:
+            self.con.execute('CREATE TABLE IF NOT EXISTS "snapshots" '
+                             '(id INTEGER PRIMARY KEY, key UNIQUE NOT NULL)')
+        next_id = self.con.execute('SELECT MAX(id) FROM "snapshots"').fetchone()[0]
+        self._next_id = 0 if next_id is None else next_id + 1
+        if net is not None:
+            self.write_net(net)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_net(self, net):
+        """
+        Writes the network without results to the file.
+        """
+        to_sql(net, self.con, include_results=False)
+
+    def read_net(self):
+        """
+        Reads the network from the file.
+        """
+        return from_sql(self.con)
+
+    def append_results(self, net, key):
+        """
+        Appends the result tables of net as snapshot with the given key.
+
+        INPUT:
+            **net** (pandapowerNet) - network with results
+
+            **key** (int, float, string or datetime) - unique key of the snapshot
+        """
+        key = self._key(key)
+        if key in self._buffer_keys or self.con.execute(
+                'SELECT 1 FROM "snapshots" WHERE key = ?', (key,)).fetchone() is not None:
+            raise UserWarning("Snapshot with key %s already exists in store" % key)
+        tables = dict()
+        for item, table in net.items():
+            if item.startswith("res_") and isinstance(table, pd.DataFrame) and len(table):
+                tables[item] = table.select_dtypes(include=[numpy.number, bool])
+        self._buffer.append((key, tables))
+        self._buffer_keys.add(key)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes all buffered snapshots to the file in one transaction. If the transaction fails,
+        the snapshots stay in the buffer.
+        """
+        if not len(self._buffer):
+            return
+        next_id = self._next_id
+        try:
+            self._write_buffer()
+        except Exception:
+            # the transaction is rolled back, including new tables and columns
+            self._next_id = next_id
+            self._columns = dict()
+            raise
+        self._buffer = []
+        self._buffer_keys = set()
+
+    def _write_buffer(self):
+        with self.con:
+            rows = dict()
+            for key, tables in self._buffer:
+                self.con.execute('INSERT INTO "snapshots" (id, key) VALUES (?, ?)',
+                                 (self._next_id, key))
+                for item, table in tables.items():
+                    columns = self._table_columns(item, table.columns)
+                    values = numpy.empty((len(table), len(columns) + 2), dtype=object)
+                    values[:, 0] = self._next_id
+                    values[:, 1] = table.index.values
+                    values[:, 2:] = table.reindex(columns=columns).values
+                    # NaN is stored as NULL
+                    values[pd.isnull(values)] = None
+                    rows.setdefault(item, []).extend(values.tolist())
+                self._next_id += 1
+            for item, values in rows.items():
+                columns = self._columns[item]
+                self.con.executemany('INSERT INTO "snapshot_%s" VALUES (%s)' % (
+                    item, ", ".join(["?"] * (len(columns) + 2))), values)
+
+    @staticmethod
+    def _key(key):
+        # numpy scalars and timestamps cannot be stored by sqlite3 directly
+        if isinstance(key, numpy.generic):
+            key = key.item()
+        if isinstance(key, datetime.datetime):
+            key = key.isoformat()
+        return key
+
+    def _table_columns(self, item, columns):
+        table = "snapshot_%s" % item
+        if item not in self._columns:
+            self.con.execute('CREATE TABLE IF NOT EXISTS "%s" (snapshot INTEGER, idx INTEGER, '
+                             'PRIMARY KEY (snapshot, idx)) WITHOUT ROWID' % table)
+            self.con.execute('CREATE INDEX IF NOT EXISTS "%s_idx" ON "%s" (idx, snapshot)'
+                             % (table, table))
+            info = self.con.execute('PRAGMA table_info("%s")' % table).fetchall()
+            self._columns[item] = [c[1] for c in info[2:]]
+        for column in columns:
+            if column not in self._columns[item]:
+                self.con.execute('ALTER TABLE "%s" ADD COLUMN "%s" REAL' % (table, column))
+                self._columns[item].append(column)
+        return self._columns[item]
+
+    def keys(self):
+        """
+        Returns the keys of all snapshots in the order in which they were appended.
+        """
+        self.flush()
+        return [k for k, in self.con.execute('SELECT key FROM "snapshots" ORDER BY id')]
+
+    def read_results(self, net, key):
+        """
+        Writes the results of the snapshot with the given key to the result tables of net.
+        """
+        self.flush()
+        snapshot = self.con.execute('SELECT id FROM "snapshots" WHERE key = ?',
+                                    (self._key(key),)).fetchone()
+        if snapshot is None:
+            raise UserWarning("No snapshot with key %s in store" % key)
+        for item, in self.con.execute("SELECT name FROM sqlite_master WHERE type='table' AND "
+                                      "name LIKE 'snapshot\\_res\\_%' ESCAPE '\\'").fetchall():
+            table = pd.read_sql_query('SELECT * FROM "%s" WHERE snapshot = ?' % item, self.con,
+                                      params=snapshot, index_col="idx")
+            table.index.name = None
+            net[item[9:]] = table.drop("snapshot", axis=1)
+
+    def read_history(self, element, index, columns=None):
+        """
+        Returns the results of a single element for all snapshots.
+
+        INPUT:
+            **element** (string) - element type, e.g. "bus" or "line"
+
+            **index** (int) - index of the element
+
+        OPTIONAL:
+            **columns** (string or list, None) - result columns, e.g. "vm_pu". If None, all
+            result columns are returned
+
+        OUTPUT:
+            **history** (DataFrame or Series) - results with the snapshot keys as index. A Series
+            is returned if columns is a string.
+        """
+        self.flush()
+        table = "snapshot_res_%s" % element
+        if isinstance(columns, string_types):
+            return self.read_history(element, index, [columns])[columns]
+        select = "r.*" if columns is None else ", ".join('r."%s"' % c for c in columns)
+        history = pd.read_sql_query(
+            'SELECT s.key AS snapshot_key, %s FROM "%s" r JOIN "snapshots" s ON s.id = r.snapshot '
+            'WHERE r.idx = ? ORDER BY r.snapshot' % (select, table), self.con,
+            params=(int(index),), index_col="snapshot_key")
+        history.index.name = None
+        return history.drop(["snapshot", "idx"], axis=1, errors="ignore")
+
+    def close(self):
+        """
+        Writes the buffered snapshots and closes the file.
+        """
+        try:
+            self.flush()
+        finally:
+            self.con.close()
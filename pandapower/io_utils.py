@@ -12,6 +12,11 @@ import numbers
 import json
 import copy
 import importlib
+import io
+import re
+import struct
+import sys
+import zipfile
 
 try:
     from functools import singledispatch
@@ -19,13 +24,24 @@ except ImportError:
     # Python 2.7
     from singledispatch import singledispatch
 
-try:
-    import fiona
-    import geopandas as gpd
+_PANDAS_VERSION = tuple(int(v) for v in re.findall(r"\d+", pd.__version__)[:2])
 
-    GEOPANDAS_INSTALLED = True
-except ImportError:
-    GEOPANDAS_INSTALLED = False
+
+# geopandas is optional and slow to import, so it is only imported if geodata has to be converted
+# from or to a GeoDataFrame
+def _geopandas_installed():
+    try:
+        import fiona
+        import geopandas
+        return True
+    except ImportError:
+        return False
+
+
+def _is_geodataframe(obj):
+    # a GeoDataFrame can only exist if geopandas has already been imported
+    gpd = sys.modules.get("geopandas")
+    return gpd is not None and isinstance(obj, gpd.GeoDataFrame)
 
 try:
     import pplog as logging
@@ -52,24 +68,68 @@ def to_dict_of_dfs(net, include_results=False, fallback_to_pickle=True):
         elif isinstance(value, (int, float, bool, str)):
             # attributes of primitive types are just stored in a DataFrame "parameters"
             dodfs["parameters"].loc[item] = net[item]
-        elif not isinstance(value, pd.DataFrame) and \
-                (GEOPANDAS_INSTALLED and not isinstance(value, gpd.GeoDataFrame)):
+        elif not isinstance(value, pd.DataFrame):
             logger.warning("Could not serialize net.%s" % item)
         elif item == "bus_geodata":
             dodfs[item] = pd.DataFrame(value[["x", "y"]])
         elif item == "line_geodata":
-            geo = pd.DataFrame()
-            for i in value.index:
-                coords = value.get_value(i, 'coords')
-                for nr, (x, y) in enumerate(coords):
-                    geo.loc[i, "x%u" % nr] = x
-                    geo.loc[i, "y%u" % nr] = y
-            dodfs[item] = geo
+            dodfs[item] = line_geodata_to_long(value)
         else:
             dodfs[item] = value
     return dodfs
 
 
+def line_geodata_to_long(line_geodata):
+    """
+    Converts the coords column of a line_geodata table to a DataFrame in long format with one row
+    per point and the columns "line" (line index), "seq" (position of the point in the line) and
+    "x", "y" (coordinates). Lines without coordinates are omitted.
+    """
+    xy = [numpy.asarray(c, dtype=numpy.float64).reshape(-1, 2)
+          if isinstance(c, (list, tuple, numpy.ndarray)) else numpy.empty((0, 2))
+          for c in line_geodata["coords"].values]
+    lengths = numpy.array([len(c) for c in xy], dtype=numpy.int64)
+    if not lengths.sum():
+        return pd.DataFrame(columns=["line", "seq", "x", "y"])
+    xy = numpy.concatenate(xy)
+    starts = numpy.cumsum(lengths) - lengths
+    return pd.DataFrame({"line": numpy.repeat(line_geodata.index.values, lengths),
+                         "seq": numpy.arange(len(xy)) - numpy.repeat(starts, lengths),
+                         "x": xy[:, 0], "y": xy[:, 1]}, columns=["line", "seq", "x", "y"])
+
+
+def line_geodata_from_long(table):
+    """
+    Creates a line_geodata table from a DataFrame in the long format of line_geodata_to_long.
+    """
+    table = table.sort_values(["line", "seq"])
+    lines, starts = numpy.unique(table["line"].values, return_index=True)
+    xy = table[["x", "y"]].values.tolist()
+    ends = numpy.append(starts[1:], len(xy))
+    return _line_geodata_from_coords(lines, [[tuple(p) for p in xy[s:e]]
+                                             for s, e in zip(starts, ends)])
+
+
+def line_geodata_from_wide(table):
+    """
+    Creates a line_geodata table from a DataFrame with the columns x0, y0, x1, y1, ... which is
+    the format used by pandapower <= 1.6.0.
+    """
+    num_points = len(table.columns) // 2
+    xs = table[["x%u" % nr for nr in range(num_points)]].values.tolist()
+    ys = table[["y%u" % nr for nr in range(num_points)]].values.tolist()
+    return _line_geodata_from_coords(table.index.values, [
+        [(x, y) for x, y in zip(xr, yr) if pd.notnull(x)] for xr, yr in zip(xs, ys)])
+
+
+def _line_geodata_from_coords(index, coords):
+    # fill an object array element-wise, numpy would make a 2D array of equally long lists
+    values = numpy.empty(len(coords), dtype=object)
+    for i, c in enumerate(coords):
+        values[i] = c
+    return pd.DataFrame({"coords": values}, index=index)
+
+
 def collect_all_dtypes_df(net):
     dtypes = []
     for element, table in net.items():
@@ -95,21 +155,30 @@ def dicts_to_pandas(json_dict):
     return pd_dict
 
 
+def _empty_network_for_loading(**kwargs):
+    """
+    Creates the empty network into which a file is loaded. The version of the template is
+    removed, so that the net has the version of the file, or 0 if the file has no version.
+    """
+    net = create_empty_network(**kwargs)
+    net.version = 0.
+    del net["format_version"]
+    return net
+
+
 def from_dict_of_dfs(dodfs):
-    net = create_empty_network()
+    net = _empty_network_for_loading()
     for p, v in dodfs["parameters"].iterrows():
         net[p] = v.parameter
     for item, table in dodfs.items():
         if item in ("parameters", "dtypes"):
             continue
         elif item == "line_geodata":
-            num_points = len(table.columns) // 2
-            for i in table.index:
-                coords = table.loc[i]
-                # for i, coords in table.iterrows():
-                coord = [(coords["x%u" % nr], coords["y%u" % nr]) for nr in range(num_points)
-                         if pd.notnull(coords["x%u" % nr])]
-                net.line_geodata.loc[i, "coords"] = coord
+            if "seq" in table.columns:
+                net[item] = line_geodata_from_long(table)
+            else:
+                # wide format (x0, y0, x1, y1, ...) of files saved with pandapower <= 1.6.0
+                net[item] = line_geodata_from_wide(table)
         elif item.endswith("_std_types"):
             net["std_types"][item[:-10]] = table.T.to_dict()
             continue  # don't go into try..except
@@ -135,6 +204,116 @@ def restore_all_dtypes(net, dtypes):
         except KeyError:
             pass
 
+
+# --- npz container: uncompressed zip archive of .npy files, one file per DataFrame column
+
+NPZ_ALIGNMENT = 64  # alignment of the array data in the file (numpy.lib.format.ARRAY_ALIGN)
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def write_npz_array(zf, name, array):
+    """
+    Writes an array as .npy file to the zip archive zf. The local zip header is padded, so that
+    the data of numerical arrays is aligned in the file and can be memory mapped when reading.
+    Returns a description of the array that is needed to read it with read_npz_array.
+    """
+    array = numpy.asanyarray(array)
+    buffer = io.BytesIO()
+    numpy.lib.format.write_array(buffer, array, allow_pickle=True)
+    zinfo = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    zinfo.compress_type = zipfile.ZIP_STORED
+    header_end = zf.fp.tell() + ZIP_LOCAL_HEADER_SIZE + len(name.encode("utf-8")) + 4
+    padding = -header_end % NPZ_ALIGNMENT
+    zinfo.extra = struct.pack("<HH", 0xD935, padding) + b"\0" * padding
+    zf.writestr(zinfo, buffer.getvalue())
+    if array.dtype.hasobject:
+        return {"name": name, "dtype": None}
+    # the .npy header is not parsed when reading, the data offset is stored instead
+    return {"name": name, "dtype": array.dtype.str, "shape": array.shape,
+            "fortran_order": array.flags.f_contiguous and not array.flags.c_contiguous,
+            "offset": len(buffer.getvalue()) - array.nbytes}
+
+
+def read_npz_array(zf, f, array, mm=None):
+    """
+    Reads an array that was written with write_npz_array from the zip archive zf, which is
+    opened as file object f. If a memory map mm of the file is given, numerical arrays are
+    created on top of it without copying the data. Object arrays are unpickled.
+    """
+    zinfo = zf.getinfo(array["name"])
+    f.seek(zinfo.header_offset)
+    name_len, extra_len = struct.unpack("<HH", f.read(ZIP_LOCAL_HEADER_SIZE)[26:])
+    data_start = zinfo.header_offset + ZIP_LOCAL_HEADER_SIZE + name_len + extra_len
+    if array["dtype"] is None:
+        f.seek(data_start)
+        return numpy.lib.format.read_array(f, allow_pickle=True)
+    dtype = numpy.dtype(array["dtype"])
+    count = int(numpy.prod(array["shape"]))
+    order = "F" if array["fortran_order"] else "C"
+    if count == 0:
+        return numpy.empty(array["shape"], dtype=dtype, order=order)
+    if mm is not None:
+        values = numpy.frombuffer(mm, dtype=dtype, count=count,
+                                  offset=data_start + array["offset"])
+    else:
+        f.seek(data_start + array["offset"])
+        values = numpy.fromfile(f, dtype=dtype, count=count)
+    return values.reshape(array["shape"], order=order)
+
+
+def write_npz_dataframe(zf, prefix, df):
+    """
+    Writes the index and all columns of df as separate arrays to the zip archive zf. Categorical
+    columns are stored as codes and categories. Returns the table description that is needed
+    to restore the DataFrame with read_npz_dataframe.
+    """
+    table = {"index": write_npz_array(zf, "%s/index.npy" % prefix, df.index.values),
+             "index_name": df.index.name, "columns": list(df.columns), "arrays": [],
+             "categories": dict(), "class": df.__class__.__name__}
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if pd.api.types.is_categorical_dtype(column):
+            table["arrays"].append(write_npz_array(zf, "%s/%i.npy" % (prefix, i),
+                                                   column.cat.codes.values))
+            table["categories"][i] = write_npz_array(zf, "%s/%i_categories.npy" % (prefix, i),
+                                                     column.cat.categories.values)
+        else:
+            table["arrays"].append(write_npz_array(zf, "%s/%i.npy" % (prefix, i), column.values))
+    if table["class"] == "GeoDataFrame":
+        table["crs"] = df.crs
+    return table
+
+
+def _frame_from_columns(values, index, columns):
+    """
+    Creates a DataFrame which holds views of the column arrays instead of copies, so that memory
+    mapped arrays stay memory mapped. Since pandas 1.3, pd.DataFrame does not copy the arrays of
+    a dict with copy=False. Older versions consolidate the columns of the same dtype into new 2D
+    blocks, so the frame is built with one block for each column there.
+    """
+    if _PANDAS_VERSION >= (1, 3):
+        return pd.DataFrame(dict(zip(columns, values)), index=index, columns=columns, copy=False)
+    from pandas.core.internals import BlockManager, make_block
+    blocks = [make_block(v if isinstance(v, pd.Categorical) else v.reshape(1, -1), placement=[i])
+              for i, v in enumerate(values)]
+    mgr = BlockManager(blocks, [pd.Index(columns), index])
+    return pd.DataFrame(mgr)
+
+
+def read_npz_dataframe(zf, f, table, mm=None):
+    index = pd.Index(read_npz_array(zf, f, table["index"]), name=table["index_name"])
+    data = dict()
+    for i, array in enumerate(table["arrays"]):
+        data[i] = read_npz_array(zf, f, array, mm)
+        if i in table["categories"]:
+            categories = read_npz_array(zf, f, table["categories"][i])
+            data[i] = pd.Categorical.from_codes(data[i], categories)
+    df = _frame_from_columns([data[i] for i in range(len(data))], index, table["columns"])
+    if table["class"] == "GeoDataFrame" and _geopandas_installed():
+        import geopandas as gpd
+        df = gpd.GeoDataFrame(df, crs=table["crs"])
+    return df
+
 from json.encoder import _make_iterencode
 from json.encoder import *
 
@@ -226,8 +405,14 @@ def pp_hook(d):
                 df.set_index(df.index.astype(numpy.int64), inplace=True)
             except (ValueError, TypeError, AttributeError):
                 logger.debug("failed setting int64 index")
+            # read_json does not restore categorical columns (see toolbox.compact_dtypes)
+            for column, dtype in d.get("dtype", dict()).items():
+                if dtype == "category" and column in df.columns:
+                    df[column] = df[column].astype("category")
             return df
-        elif GEOPANDAS_INSTALLED and class_name == 'GeoDataFrame':
+        elif class_name == 'GeoDataFrame' and _geopandas_installed():
+            import fiona
+            import geopandas as gpd
             df = gpd.GeoDataFrame.from_features(fiona.Collection(obj), crs=d['crs'])
             df.set_index(df['id'].values.astype(numpy.int64), inplace=True)
             # coords column is not handled properly when using from_features
@@ -246,6 +431,102 @@ def pp_hook(d):
         return d
 
 
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def write_json_items(f, net, compact=False):
+    """
+    Writes the elements of a pandapower net as top-level JSON object to the file-like object f.
+    The elements are encoded and written one after the other, so that the JSON representation of
+    the complete net is never held in memory. Elements which name begins with "_" are skipped.
+    If compact is True, indentation and whitespace between separators are omitted.
+    """
+    if compact:
+        kwargs = {"separators": (",", ":")}
+    else:
+        kwargs = {"indent": 4}
+    f.write("{")
+    first = True
+    for k in sorted(net.keys()):
+        if k[0] == "_":
+            continue
+        f.write('"%s":' % k if first else ',"%s":' % k)
+        json.dump(net[k], f, cls=PPJSONEncoder, **kwargs)
+        first = False
+    f.write("}\n")
+
+
+class _JSONStreamBuffer(object):
+    """
+    Text buffer on a file-like object which is refilled in chunks on demand. Consumed text is
+    dropped with every refill, the chunk size grows with the item that is currently decoded.
+    """
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def next_char(self):
+        while True:
+            self.pos = JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                self.pos += 1
+                return self.buffer[self.pos - 1]
+            if self.eof:
+                raise ValueError("Unexpected end of JSON data")
+            self._read()
+
+    def decode(self, decoder):
+        self.next_char()
+        self.pos -= 1
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # incomplete item, unless the whole file has already been read
+                if self.eof:
+                    raise
+            else:
+                # a number at the end of the buffer might be truncated
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return obj
+            self._read()
+
+
+def iter_json_items(f, chunk_size=2 ** 20):
+    """
+    Yields the (key, value) pairs of the top-level JSON object in the text file-like object f.
+    The file is read in chunks and every value is decoded with pp_hook as soon as it is complete,
+    so that only the text of a single element has to be held in memory at a time.
+    """
+    decoder = PPJSONDecoder()
+    stream = _JSONStreamBuffer(f, chunk_size)
+    if stream.next_char() != "{":
+        raise ValueError("JSON data does not contain an object")
+    if stream.next_char() == "}":
+        return
+    stream.pos -= 1
+    while True:
+        key = stream.decode(decoder)
+        if stream.next_char() != ":":
+            raise ValueError("Invalid JSON data: ':' expected after key %s" % key)
+        yield key, stream.decode(decoder)
+        c = stream.next_char()
+        if c == "}":
+            return
+        if c != ",":
+            raise ValueError("Invalid JSON data: ',' or '}' expected after element %s" % key)
+
+
 def with_signature(obj, val, obj_module=None, obj_class=None):
     if obj_module is None:
         obj_module = obj.__module__.__str__()
@@ -271,22 +552,22 @@ def json_net(obj):
 
 @to_serializable.register(pd.DataFrame)
 def json_dataframe(obj):
+    if _is_geodataframe(obj):
+        return json_geodataframe(obj)
     logger.debug('DataFrame')
     d = with_signature(obj, obj.to_json(orient='split',
                                         default_handler=to_serializable, double_precision=14))
     d.update({'dtype': obj.dtypes.astype('str').to_dict(), 'orient': 'split'})
     return d
 
-try:
-    @to_serializable.register(gpd.GeoDataFrame)
-    def json_geodataframe(obj):
-        logger.debug('GeoDataFrame')
-        d = with_signature(obj, obj.to_json())
-        d.update({'dtype': obj.dtypes.astype('str').to_dict(),
-                  'crs': obj.crs, 'columns': obj.columns})
-        return d
-except NameError:
-    pass
+
+def json_geodataframe(obj):
+    logger.debug('GeoDataFrame')
+    d = with_signature(obj, obj.to_json())
+    d.update({'dtype': obj.dtypes.astype('str').to_dict(),
+              'crs': obj.crs, 'columns': obj.columns})
+    return d
+
 
 @to_serializable.register(pd.Series)
 def json_series(obj):
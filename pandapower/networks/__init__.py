@@ -5,6 +5,7 @@ from pandapower.networks.create_examples import *
 from pandapower.networks.kerber_extreme_networks import *
 from pandapower.networks.kerber_networks import *
 from pandapower.networks.mv_oberrhein import *
+from pandapower.networks.network_cache import clear_cache, set_cache_options
 from pandapower.networks.power_system_test_cases import *
 from pandapower.networks.simple_pandapower_test_networks import *
 
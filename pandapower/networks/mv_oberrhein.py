@@ -10,6 +10,7 @@ import numpy as np
 
 import pandapower as pp
 from pandapower.networks.power_system_test_cases import get_pp_networks_path
+from pandapower.networks.network_cache import from_json_cached
 
 
 def mv_oberrhein(scenario="load", cosphi_load=0.98, cosphi_pv=1.0, include_substations=False):
@@ -49,9 +50,9 @@ def mv_oberrhein(scenario="load", cosphi_load=0.98, cosphi_pv=1.0, include_subst
     net = pandapower.networks.mv_oberrhein("generation")
     """
     if include_substations:
-        net = pp.from_json(os.path.join(get_pp_networks_path(), "mv_oberrhein_substations.json"))
+        net = from_json_cached(os.path.join(get_pp_networks_path(), "mv_oberrhein_substations.json"))
     else:
-        net = pp.from_json(os.path.join(get_pp_networks_path(), "mv_oberrhein.json"))
+        net = from_json_cached(os.path.join(get_pp_networks_path(), "mv_oberrhein.json"))
     net.load.q_kvar = np.tan(np.arccos(cosphi_load)) * net.load.p_kw
     net.sgen.q_kvar = np.tan(np.arccos(cosphi_pv)) * net.sgen.p_kw
 
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import copy
+import hashlib
+import os
+from collections import OrderedDict
+
+import pandapower as pp
+
+try:
+    import pplog as logging
+except ImportError:
+    import logging
+
+logger = logging.getLogger(__name__)
+
+# parsed networks by absolute file path, least recently used first
+_cache = OrderedDict()
+_cache_options = {"enabled": True, "max_size": 20, "disk_cache_dir": None}
+
+
+def set_cache_options(enabled=None, max_size=None, disk_cache_dir=None):
+    """
+    Changes the options of the cache for the networks which are loaded from files (e.g. case9(),
+    case2869pegase(), mv_oberrhein()). Each network file is parsed only once per process, every
+    call returns an independent copy of the cached network.
+
+    OPTIONAL:
+        **enabled** (bool, None) - enables or disables the cache. Disabling the cache clears it.
+
+        **max_size** (int, None) - maximum number of networks in the cache. The least recently
+        used networks are removed first. The default is 20.
+
+        **disk_cache_dir** (string, None) - directory in which the parsed networks are
+        additionally stored in the binary npz format (see pp.to_npz), so that other processes do
+        not have to parse the json files again. Use "" to disable the disk cache, which is the
+        default.
+
+    EXAMPLE:
+
+        >>> import pandapower.networks as pn
+        >>> pn.set_cache_options(max_size=5, disk_cache_dir=os.path.join("C:", "pp_cache"))
+
+    """
+    if enabled is not None:
+        _cache_options["enabled"] = enabled
+        if not enabled:
+            clear_cache()
+    if max_size is not None:
+        _cache_options["max_size"] = max_size
+        _limit_cache_size()
+    if disk_cache_dir is not None:
+        _cache_options["disk_cache_dir"] = disk_cache_dir or None
+
+
+def clear_cache(disk=False):
+    """
+    Removes all networks from the cache.
+
+    OPTIONAL:
+        **disk** (bool, False) - also removes the networks stored in the disk cache directory
+    """
+    _cache.clear()
+    cache_dir = _cache_options["disk_cache_dir"]
+    if disk and cache_dir is not None and os.path.isdir(cache_dir):
+        for filename in os.listdir(cache_dir):
+            if filename.endswith(".npz"):
+                os.remove(os.path.join(cache_dir, filename))
+
+
+def _limit_cache_size():
+    while len(_cache) > max(_cache_options["max_size"], 0):
+        _cache.popitem(last=False)
+
+
+def _disk_cache_path(path):
+    cache_dir = _cache_options["disk_cache_dir"]
+    if cache_dir is None:
+        return None
+    # the hash keeps networks with the same file name in different directories apart
+    path_hash = hashlib.md5(path.encode("utf-8")).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, "%s_%s_%s.npz" % (name, path_hash, pp.__version__))
+
+
+def _from_disk_cache(path, mtime):
+    cache_path = _disk_cache_path(path)
+    if cache_path is not None and os.path.isfile(cache_path) and \
+            os.path.getmtime(cache_path) >= mtime:
+        try:
+            return pp.from_npz(cache_path, convert=False)
+        except Exception:
+            logger.warning("could not load %s from disk cache" % cache_path)
+    net = pp.from_json(path)
+    if cache_path is not None:
+        try:
+            if not os.path.isdir(os.path.dirname(cache_path)):
+                os.makedirs(os.path.dirname(cache_path))
+            pp.to_npz(net, cache_path)
+        except (IOError, OSError):
+            logger.warning("could not write %s to disk cache" % cache_path)
+    return net
+
+
+def from_json_cached(filename):
+    """
+    Loads a network from a json file like pp.from_json, but keeps the parsed network in the cache
+    (see set_cache_options). Returns an independent copy of the cached network.
+    """
+    if not _cache_options["enabled"]:
+        return pp.from_json(filename)
+    path = os.path.abspath(filename)
+    mtime = os.path.getmtime(path)
+    if path in _cache and _cache[path][0] == mtime:
+        net = _cache.pop(path)[1]
+    else:
+        net = _from_disk_cache(path, mtime)
+    # (re-)insert as most recently used network
+    _cache[path] = (mtime, net)
+    _limit_cache_size()
+    return copy.deepcopy(net)
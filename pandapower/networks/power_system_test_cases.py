@@ -7,6 +7,7 @@
 import os
 
 import pandapower as pp
+from pandapower.networks.network_cache import from_json_cached
 
 
 def get_pp_networks_path():
@@ -75,7 +76,7 @@ def case4gs():
 
          net = pn.case4gs()
     """
-    case4gs = pp.from_json(_get_cases_path("case4gs.json"))
+    case4gs = from_json_cached(_get_cases_path("case4gs.json"))
     return case4gs
 
 
@@ -92,7 +93,7 @@ def case5():
 
          net = pn.case5()
     """
-    case5 = pp.from_json(_get_cases_path("case5.json"))
+    case5 = from_json_cached(_get_cases_path("case5.json"))
     return case5
 
 
@@ -111,7 +112,7 @@ def case6ww():
 
          net = pn.case6ww()
     """
-    case6ww = pp.from_json(_get_cases_path("case6ww.json"))
+    case6ww = from_json_cached(_get_cases_path("case6ww.json"))
     return case6ww
 
 
@@ -130,7 +131,7 @@ def case9():
 
          net = pn.case9()
     """
-    case9 = pp.from_json(_get_cases_path("case9.json"))
+    case9 = from_json_cached(_get_cases_path("case9.json"))
     return case9
 
 
@@ -151,7 +152,7 @@ def case14():
 
          net = pn.case14()
     """
-    case14 = pp.from_json(_get_cases_path("case14.json"))
+    case14 = from_json_cached(_get_cases_path("case14.json"))
     return case14
 
 
@@ -171,7 +172,7 @@ def case24_ieee_rts():
 
          net = pn.case24_ieee_rts()
     """
-    case24 = pp.from_json(_get_cases_path("case24_ieee_rts.json"))
+    case24 = from_json_cached(_get_cases_path("case24_ieee_rts.json"))
     return case24
 
 
@@ -189,7 +190,7 @@ def case30():
 
          net = pn.case30()
     """
-    case30 = pp.from_json(_get_cases_path("case30.json"))
+    case30 = from_json_cached(_get_cases_path("case30.json"))
     return case30
 
 
@@ -208,7 +209,7 @@ def case_ieee30():
 
          net = pn.case_ieee30()
     """
-    case_ieee30 = pp.from_json(_get_cases_path("case_ieee30.json"))
+    case_ieee30 = from_json_cached(_get_cases_path("case_ieee30.json"))
     return case_ieee30
 
 
@@ -228,7 +229,7 @@ def case33bw():
 
          net = pn.case33bw()
     """
-    case33bw = pp.from_json(_get_cases_path("case33bw.json"))
+    case33bw = from_json_cached(_get_cases_path("case33bw.json"))
     return case33bw
 
 
@@ -251,7 +252,7 @@ def case39():
 
          net = pn.case39()
     """
-    case39 = pp.from_json(_get_cases_path("case39.json"))
+    case39 = from_json_cached(_get_cases_path("case39.json"))
     return case39
 
 
@@ -280,7 +281,7 @@ def case57(vn_kv_area1=115, vn_kv_area2=500, vn_kv_area3=138, vn_kv_area4=345, v
 
          net = pn.case57()
     """
-    case57 = pp.from_json(_get_cases_path("case57.json"))
+    case57 = from_json_cached(_get_cases_path("case57.json"))
     Idx_area1 = case57.bus[case57.bus.vn_kv == 110].index
     Idx_area2 = case57.bus[case57.bus.vn_kv == 120].index
     Idx_area3 = case57.bus[case57.bus.vn_kv == 125].index
@@ -315,7 +316,7 @@ def case89pegase():
 
          net = pn.case89pegase()
     """
-    case89pegase = pp.from_json(_get_cases_path("case89pegase.json"))
+    case89pegase = from_json_cached(_get_cases_path("case89pegase.json"))
     return case89pegase
 
 
@@ -336,7 +337,7 @@ def case118():
 
          net = pn.case118()
     """
-    case118 = pp.from_json(_get_cases_path("case118.json"))
+    case118 = from_json_cached(_get_cases_path("case118.json"))
     return case118
 
 
@@ -354,7 +355,7 @@ def case145():
 
          net = pn.case145()
     """
-    case145 = pp.from_json(_get_cases_path("case145.json"))
+    case145 = from_json_cached(_get_cases_path("case145.json"))
     return case145
 
 
@@ -373,7 +374,7 @@ def case_illinois200():
 
          net = pn.case_illinois200()
     """
-    case_illinois200 = pp.from_json(_get_cases_path("case_illinois200.json"))
+    case_illinois200 = from_json_cached(_get_cases_path("case_illinois200.json"))
     return case_illinois200
 
 
@@ -393,7 +394,7 @@ def case300():
 
          net = pn.case300()
     """
-    case300 = pp.from_json(_get_cases_path("case300.json"))
+    case300 = from_json_cached(_get_cases_path("case300.json"))
     return case300
 
 
@@ -416,7 +417,7 @@ def case1354pegase():
 
          net = pn.case1354pegase()
     """
-    case1354pegase = pp.from_json(_get_cases_path("case1354pegase.json"))
+    case1354pegase = from_json_cached(_get_cases_path("case1354pegase.json"))
     return case1354pegase
 
 
@@ -446,7 +447,7 @@ def case1888rte(ref_bus_idx=1246):
 
          net = pn.case1888rte()
     """
-    case1888rte = pp.from_json(_get_cases_path("case1888rte.json"))
+    case1888rte = from_json_cached(_get_cases_path("case1888rte.json"))
     case1888rte.ext_grid.loc[0, ['min_p_kw',  'max_p_kw',  'min_q_kvar', 'max_q_kvar']] = 2 * \
         case1888rte.ext_grid.loc[0, ['min_p_kw',  'max_p_kw',  'min_q_kvar', 'max_q_kvar']]
 
@@ -481,7 +482,7 @@ def case2848rte(ref_bus_idx=271):
 
          net = pn.case2848rte()
     """
-    case2848rte = pp.from_json(_get_cases_path("case2848rte.json"))
+    case2848rte = from_json_cached(_get_cases_path("case2848rte.json"))
     if ref_bus_idx != 271:  # change reference bus
         _change_ref_bus(case2848rte, ref_bus_idx, ext_grid_p=[-44.01e3])
     return case2848rte
@@ -506,7 +507,7 @@ def case2869pegase():
 
          net = pn.case2869pegase()
     """
-    case2869pegase = pp.from_json(_get_cases_path("case2869pegase.json"))
+    case2869pegase = from_json_cached(_get_cases_path("case2869pegase.json"))
     return case2869pegase
 
 
@@ -524,7 +525,7 @@ def case3120sp():
 
          net = pn.case3120sp()
     """
-    case3120sp = pp.from_json(_get_cases_path("case3120sp.json"))
+    case3120sp = from_json_cached(_get_cases_path("case3120sp.json"))
     return case3120sp
 
 
@@ -554,7 +555,7 @@ def case6470rte(ref_bus_idx=5988):
 
          net = pn.case6470rte()
     """
-    case6470rte = pp.from_json(_get_cases_path("case6470rte.json"))
+    case6470rte = from_json_cached(_get_cases_path("case6470rte.json"))
     case6470rte.ext_grid.loc[0, ['min_p_kw',  'max_p_kw',  'min_q_kvar', 'max_q_kvar']] = 2 * \
         case6470rte.ext_grid.loc[0, ['min_p_kw',  'max_p_kw',  'min_q_kvar', 'max_q_kvar']]
     if ref_bus_idx != 5988:  # change reference bus
@@ -590,7 +591,7 @@ def case6495rte(ref_bus_idx=None):
          net = pn.case6495rte()
     """
     ref_bus_idx = ref_bus_idx or [6077, 6161, 6305, 6306, 6307, 6308]
-    case6495rte = pp.from_json(_get_cases_path("case6495rte.json"))
+    case6495rte = from_json_cached(_get_cases_path("case6495rte.json"))
     if ref_bus_idx != [6077, 6161, 6305, 6306, 6307, 6308]:  # change reference bus
         _change_ref_bus(case6495rte, ref_bus_idx, ext_grid_p=[-1382.35e3, -2894.13e3, -1498.32e3,
                                                               -1498.32e3, -1493.11e3, -1493.12e3])
@@ -623,7 +624,7 @@ def case6515rte(ref_bus_idx=6171):
 
          net = pn.case6515rte()
     """
-    case6515rte = pp.from_json(_get_cases_path("case6515rte.json"))
+    case6515rte = from_json_cached(_get_cases_path("case6515rte.json"))
     if ref_bus_idx != 6171:  # change reference bus
         _change_ref_bus(case6515rte, ref_bus_idx, ext_grid_p=-2850.78e3)
     return case6515rte
@@ -648,7 +649,7 @@ def case9241pegase():
 
          net = pn.case9241pegase()
     """
-    case9241pegase = pp.from_json(_get_cases_path("case9241pegase.json"))
+    case9241pegase = from_json_cached(_get_cases_path("case9241pegase.json"))
     return case9241pegase
 
 
@@ -668,7 +669,7 @@ def GBreducednetwork():
 
          net = pn.GBreducednetwork()
     """
-    GBreducednetwork = pp.from_json(_get_cases_path("GBreducednetwork.json"))
+    GBreducednetwork = from_json_cached(_get_cases_path("GBreducednetwork.json"))
     return GBreducednetwork
 
 
@@ -690,7 +691,7 @@ def GBnetwork():
 
          net = pn.GBnetwork()
     """
-    GBnetwork = pp.from_json(_get_cases_path("GBnetwork.json"))
+    GBnetwork = from_json_cached(_get_cases_path("GBnetwork.json"))
     return GBnetwork
 
 
@@ -711,5 +712,5 @@ def iceland():
 
          net = pn.iceland()
     """
-    iceland = pp.from_json(_get_cases_path("iceland.json"))
+    iceland = from_json_cached(_get_cases_path("iceland.json"))
     return iceland
@@ -64,7 +64,11 @@ def dcopf_solver(om, ppopt, out_opt=None):
         - C{info}   solver specific termination code
         - C{output} solver specific output information
 
-    @see: L{opf}, L{qps_pypower}
+    The solver is selected with the option C{OPF_ALG_DC} as in PYPOWER, with
+    the additional code 800 for L{qps_linprog}, which solves DC OPFs with
+    linear and piecewise linear costs with the HiGHS solvers of scipy.
+
+    @see: L{opf}, L{qps_pypower}, L{qps_linprog}
 
     @author: Ray Zimmerman (PSERC Cornell)
     @author: Carlos E. Murillo-Sanchez (PSERC Cornell & Universidad
@@ -224,12 +228,21 @@ def dcopf_solver(om, ppopt, out_opt=None):
         opt['mosek_opt'] = mosek_options([], ppopt)
     elif alg == 700:
         opt['grb_opt'] = gurobi_options([], ppopt)
+    elif alg == 800:
+        ## linear costs only, solved with the HiGHS solvers of scipy's linprog
+        pass
     else:
         raise ValueError("Unrecognised solver [%d]." % alg)
 
     ##-----  run opf  -----
-    x, f, info, output, lmbda = \
-            qps_pypower(HH, CC, A, l, u, xmin, xmax, x0, opt)
+    if alg == 800:
+        ## imported on demand, scipy.optimize is slow to import
+        from pandapower.opf.qps_linprog import qps_linprog
+        x, f, info, output, lmbda = \
+                qps_linprog(HH, CC, A, l, u, xmin, xmax, x0, opt)
+    else:
+        x, f, info, output, lmbda = \
+                qps_pypower(HH, CC, A, l, u, xmin, xmax, x0, opt)
     success = (info == 1)
 
     ##-----  calculate return values  -----
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+"""Solvers for the KKT systems of the Newton steps of PIPS.
+"""
+
+from numpy import arange, array_equal, bincount, cumsum, diagonal, diff, full, lexsort, nan, r_, \
+    repeat, zeros
+from scipy.linalg import LinAlgError, solve_banded, solve_triangular
+from scipy.sparse import vstack, hstack, csc_matrix, csr_matrix as sparse
+from scipy.sparse.linalg import spsolve, splu
+
+
+def kkt_solver(linsolve=None):
+    """Returns the solver of the KKT systems for the PIPS option C{linsolve}:
+        - C{None} or C{"superlu"} - L{SuperLUKKTSolver} (default)
+        - C{"spsolve"} - L{SpsolveKKTSolver}
+        - C{"ldl"} - L{LDLKKTSolver}
+        - an object with a method C{solve(M, dg, b)}, e.g. a wrapper of
+          another sparse solver
+
+    C{solve(M, dg, b)} returns the solution C{[dx, dlam]} of the KKT system
+
+        [ M     dg ] [ dx   ]
+        [ dg.T  0  ] [ dlam ] = b
+
+    of a Newton step of PIPS, in which C{M} is the symmetric nx x nx matrix
+    of the condensed Hessian and C{dg} the nx x neq matrix of the gradients of
+    the equality constraints (C{None} without equality constraints). The KKT
+    matrix is symmetric and indefinite. A solver is used for one run of PIPS,
+    so it can keep the analysis of the sparsity pattern between the
+    iterations.
+    """
+    if linsolve is None or linsolve == "superlu":
+        return SuperLUKKTSolver()
+    elif linsolve == "spsolve":
+        return SpsolveKKTSolver()
+    elif linsolve == "ldl":
+        return LDLKKTSolver()
+    elif hasattr(linsolve, "solve"):
+        return linsolve
+    else:
+        raise ValueError("unknown linsolve %s for pips, use 'superlu', 'spsolve', 'ldl' or a "
+                         "solver object" % linsolve)
+
+
+class SpsolveKKTSolver(object):
+    """Assembles the KKT matrix with vstack and hstack and solves it with
+    spsolve in each iteration, without reusing anything between iterations.
+    """
+    def solve(self, M, dg, b):
+        return spsolve(_kkt_matrix(M, dg).tocsr(), b)
+
+
+class LDLKKTSolver(object):
+    """Solves the KKT systems with the symmetric indefinite LDL^T
+    factorization (Bunch-Kaufman) of LAPACK, which requires scipy >= 1.1. The
+    KKT matrix is factorized as a dense matrix, so this solver is only suited
+    to small problems.
+    """
+    def __init__(self):
+        try:
+            from scipy.linalg import ldl
+        except ImportError:
+            raise ImportError("linsolve 'ldl' for pips requires scipy >= 1.1")
+        self._ldl = ldl
+
+    def solve(self, M, dg, b):
+        lu, d, perm = self._ldl(_kkt_matrix(M, dg).toarray(), lower=True)
+        ## lu[perm] is unit lower triangular and d block diagonal with blocks
+        ## of size 1 and 2, so the permuted system is solved by substitution
+        ## and a tridiagonal solve
+        n = len(b)
+        bands = zeros((3, n))
+        bands[0, 1:] = diagonal(d, 1)
+        bands[1] = diagonal(d)
+        bands[2, :-1] = diagonal(d, -1)
+        L = lu[perm]
+        try:
+            y = solve_triangular(L, b[perm], lower=True, unit_diagonal=True)
+            y = solve_banded((1, 1), bands, y)
+            y = solve_triangular(L.T, y, lower=False, unit_diagonal=True)
+        except LinAlgError:
+            ## singular KKT matrix, the NaN solution stops PIPS like spsolve
+            return full(n, nan)
+        x = full(n, nan)
+        x[perm] = y
+        return x
+
+
+class SuperLUKKTSolver(object):
+    """Solves the KKT systems with the LU factorization of SuperLU and keeps
+    the analysis of the sparsity pattern as long as the patterns of C{M} and
+    C{dg} do not change, which is the case after the first iterations:
+        - the fill reducing column ordering (COLAMD) of the KKT matrix
+        - the positions of the entries of C{M} and C{dg} in the KKT matrix
+          with the ordered columns in CSC format
+    With a known pattern, the KKT matrix is assembled by indexing the entries
+    of C{M} and C{dg} and factorized without a new ordering.
+    """
+    def __init__(self):
+        self._pattern = None
+
+    def solve(self, M, dg, b):
+        blocks = [sparse(M)] if dg is None else [sparse(M), sparse(dg)]
+        for block in blocks:
+            block.sum_duplicates()
+        ## entries of M, dg and dg.T
+        data = r_[tuple(block.data for block in blocks + blocks[1:])]
+        if not self._same_pattern(blocks):
+            return self._analyse(blocks, data, b)
+        Ab = csc_matrix((data[self._order], self._indices, self._indptr), self._shape)
+        lu = _splu(Ab, permc_spec="NATURAL")
+        return full(len(b), nan) if lu is None else lu.solve(b)[self._perm]
+
+    def _same_pattern(self, blocks):
+        if self._pattern is None or len(blocks) != len(self._pattern):
+            return False
+        for block, (shape, indptr, indices) in zip(blocks, self._pattern):
+            if block.shape != shape or not array_equal(block.indptr, indptr) or \
+                    not array_equal(block.indices, indices):
+                return False
+        return True
+
+    def _analyse(self, blocks, data, b):
+        """Orders the columns of the KKT matrix of the new pattern, keeps the
+        positions of the entries and returns the solution of the system.
+        """
+        M = blocks[0]
+        nx = M.shape[0]
+        rows = [repeat(arange(nx), diff(M.indptr))]
+        cols = [M.indices]
+        if len(blocks) > 1:
+            dg = blocks[1]
+            dg_rows, dg_cols = repeat(arange(nx), diff(dg.indptr)), dg.indices + nx
+            rows += [dg_rows, dg_cols]
+            cols += [dg_cols, dg_rows]
+            n = nx + dg.shape[1]
+        else:
+            n = nx
+        rows, cols = r_[tuple(rows)], r_[tuple(cols)]
+
+        ## first factorization with the COLAMD ordering of SuperLU
+        order = lexsort((rows, cols))
+        indptr = r_[0, cumsum(bincount(cols, minlength=n))]
+        lu = _splu(csc_matrix((data[order], rows[order], indptr), (n, n)))
+        if lu is None:
+            return full(len(b), nan)
+
+        ## positions of the entries with the columns in the order of the factorization
+        self._perm = lu.perm_c
+        ordered_cols = self._perm[cols]
+        self._order = lexsort((rows, ordered_cols))
+        self._indices = rows[self._order]
+        self._indptr = r_[0, cumsum(bincount(ordered_cols, minlength=n))]
+        self._shape = (n, n)
+        self._pattern = [(block.shape, block.indptr, block.indices) for block in blocks]
+        return lu.solve(b)
+
+
+def _kkt_matrix(M, dg):
+    """Returns the sparse KKT matrix assembled with vstack and hstack.
+    """
+    if dg is None:
+        return sparse(M)
+    neq = dg.shape[1]
+    return vstack([
+        hstack([M, dg]),
+        hstack([dg.T, sparse((neq, neq))])
+    ])
+
+
+def _splu(A, permc_spec="COLAMD"):
+    """Returns the LU factorization of A or None if A is singular. Like
+    spsolve, the solution of a singular system is NaN, so that PIPS stops.
+    """
+    try:
+        return splu(A, permc_spec=permc_spec)
+    except RuntimeError:
+        return None
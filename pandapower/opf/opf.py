@@ -22,7 +22,7 @@ from pandapower.opf.opf_execute import opf_execute #temporary changed import to
 from pandapower.opf.opf_setup import opf_setup #temporary changed import to match bugfix path
 
 
-def opf(*args):
+def opf(*args, **kwargs):
     """Solves an optimal power flow.
 
     Returns a C{results} dict.
@@ -63,6 +63,13 @@ def opf(*args):
     See L{ppoption} for more details on the available OPF solvers and other OPF
     options and their default values.
 
+    The OPF model object C{om} of a previous OPF of the case can be given as
+    keyword argument C{om_prev}. If the new OPF model has the same variables
+    and constraints as C{om_prev}, the solution of the previous OPF is kept in
+    the new model, so that an AC OPF with C{INIT = "results"} is started from
+    the previous primal and dual solution (warm start). This is useful for a
+    sequence of OPFs in which only the loads, bounds or costs change.
+
     The solved case is returned in a single results dict (described
     below). Also returned are the final objective function value (C{f}) and a
     flag which is C{True} if the algorithm was successful in finding a solution
@@ -170,6 +177,9 @@ def opf(*args):
 
     ##-----  construct OPF model object  -----
     om = opf_setup(ppc, ppopt)
+    om_prev = kwargs.get("om_prev")
+    if om_prev is not None and om.same_structure(om_prev):
+        om.userdata('warm_start', om_prev.userdata('warm_start'))
 
     ##-----  execute the OPF  -----
     results, success, raw = opf_execute(om, ppopt)
@@ -190,5 +200,7 @@ def opf(*args):
     results['et'] = et
     results['success'] = success
     results['raw'] = raw
+    if 'output' in raw and 'iterations' in raw['output']:
+        results['iterations'] = raw['output']['iterations']
 
     return results
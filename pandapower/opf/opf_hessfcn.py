@@ -177,7 +177,7 @@ def opf_hessfcn(x, lmbda, om, Ybus, Yf, Yt, ppopt, il=None, cost_mult=1.0):
             Hfaa, Hfav, Hfva, Hfvv = d2AIbr_dV2(dIf_dVa, dIf_dVm, If, Yf, V, muF)
             Htaa, Htav, Htva, Htvv = d2AIbr_dV2(dIt_dVa, dIt_dVm, It, Yt, V, muT)
         else:
-            Hfaa= Hfav= Hfva= Hfvv= Htaa= Htav= Htva= Htvv = sparse(zeros((nb,nb)))
+            Hfaa= Hfav= Hfva= Hfvv= Htaa= Htav= Htva= Htvv = sparse((nb, nb))
     else: # pragma: no cover
         f = branch[il, F_BUS].astype(int)    ## list of "from" buses
         t = branch[il, T_BUS].astype(int)    ## list of "to" buses
@@ -8,9 +8,9 @@ problem formulation.
 
 from sys import stderr
 
-from numpy import array, zeros, ones, Inf, dot, arange, r_
+from numpy import array, zeros, ones, Inf, dot, arange, r_, concatenate, real
 from numpy import flatnonzero as find
-from scipy.sparse import lil_matrix, csr_matrix as sparse
+from scipy.sparse import coo_matrix, csr_matrix as sparse
 
 
 class opf_model(object):
@@ -318,7 +318,7 @@ class opf_model(object):
 
         if nx != nv:
             if nw == 0:
-                cp["N"] = sparse(nw, nx)
+                cp["N"] = sparse((nw, nv))
             else:
                 stderr.write('opf_model.add_costs: number of columns in N (%d x %d) does not match\nnumber of variables (%d)\n' % (nw, nx, nv))
 
@@ -428,17 +428,8 @@ class opf_model(object):
         """
         ## initialize parameters
         nw = self.cost["N"]
-#        nnzN = 0
-#        nnzH = 0
-#        for k in range(self.cost["NS"]):
-#            name = self.cost["order"][k]
-#            nnzN = nnzN + nnz(self.cost["data"]["N"][name])
-#            if name in self.cost["data"]["H"]:
-#                nnzH = nnzH + nnz(self.cost["data"]["H"][name])
-
-        ## FIXME Zero dimensional sparse matrices
-        N = zeros((nw, self.var["N"]))
-        H = zeros((nw, nw))  ## default => no quadratic term
+        N = _sparse_blocks(nw, self.var["N"])
+        H = _sparse_blocks(nw, nw)          ## default => no quadratic term
 
         Cw = zeros(nw)
         dd = ones(nw)                        ## default => linear
@@ -454,17 +445,11 @@ class opf_model(object):
             iN = self.cost["idx"]["iN"][name]          ## ing row index
             if self.cost["idx"]["N"][name]:            ## non-zero number of rows to add
                 vsl = self.cost["data"]["vs"][name]    ## var set list
-                kN = 0                                 ## initialize last col of Nk used
-                for v in vsl:
-                    j1 = self.var["idx"]["i1"][v]     ## starting column in N
-                    jN = self.var["idx"]["iN"][v]     ## ing column in N
-                    k1 = kN                           ## starting column in Nk
-                    kN = kN + self.var["idx"]["N"][v] ## ing column in Nk
-                    N[i1:iN, j1:jN] = Nk[:, k1:kN].todense()
+                N.add(Nk, i1, self._var_columns(vsl))
 
                 Cw[i1:iN] = self.cost["data"]["Cw"][name]
                 if name in self.cost["data"]["H"]:
-                    H[i1:iN, i1:iN] = self.cost["data"]["H"][name].todense()
+                    H.add(self.cost["data"]["H"][name], i1, i1 + arange(iN - i1))
 
                 if name in self.cost["data"]["dd"]:
                     dd[i1:iN] = self.cost["data"]["dd"][name]
@@ -478,9 +463,8 @@ class opf_model(object):
                 if name in self.cost["data"]["mm"]:
                     mm[i1:iN] = self.cost["data"]["mm"][name]
 
-        if nw:
-            N = sparse(N)
-            H = sparse(H)
+        N = N.tocsr()
+        H = H.tocsr()
 
         ## save in object
         self.cost["params"] = {
@@ -713,12 +697,8 @@ class opf_model(object):
         """
 
         ## initialize A, l and u
-#        nnzA = 0
-#        for k in range(self.lin["NS"]):
-#            nnzA = nnzA + nnz(self.lin["data"].A.(self.lin.order{k}))
-
         if self.lin["N"]:
-            A = lil_matrix((self.lin["N"], self.var["N"]))
+            A = _sparse_blocks(self.lin["N"], self.var["N"])
             u = Inf * ones(self.lin["N"])
             l = -u
         else:
@@ -737,17 +717,7 @@ class opf_model(object):
                 i1 = self.lin["idx"]["i1"][name]    ## starting row index
                 iN = self.lin["idx"]["iN"][name]    ## ing row index
                 vsl = self.lin["data"]["vs"][name]  ## var set list
-                kN = 0                              ## initialize last col of Ak used
-                # FIXME: Sparse matrix with fancy indexing
-                Ai = zeros((N, self.var["N"]))
-                for v in vsl:
-                    j1 = self.var["idx"]["i1"][v]      ## starting column in A
-                    jN = self.var["idx"]["iN"][v]      ## ing column in A
-                    k1 = kN                            ## starting column in Ak
-                    kN = kN + self.var["idx"]["N"][v]  ## ing column in Ak
-                    Ai[:, j1:jN] = Ak[:, k1:kN].todense()
-
-                A[i1:iN, :] = Ai
+                A.add(Ak, i1, self._var_columns(vsl))
 
                 l[i1:iN] = self.lin["data"]["l"][name]
                 u[i1:iN] = self.lin["data"]["u"][name]
@@ -755,6 +725,29 @@ class opf_model(object):
         return A.tocsr(), l, u
 
 
+    def _var_columns(self, vsl):
+        """Returns the columns of the full set of variables which correspond to
+        the columns of a matrix defined for the var set list C{vsl}.
+        """
+        if len(vsl) == 0:
+            return arange(0)
+        return r_[tuple(arange(self.var["idx"]["i1"][v], self.var["idx"]["iN"][v])
+                        for v in vsl)]
+
+
+    def same_structure(self, om):
+        """Returns C{True} if the OPF model object C{om} has the same sets of
+        variables, linear and nonlinear constraints and costs with the same
+        sizes, so that the solution of one model is a valid initial point of
+        the other.
+        """
+        for field in ["var", "lin", "nln", "cost"]:
+            a, b = getattr(self, field), getattr(om, field)
+            if a["order"] != b["order"] or a["idx"]["N"] != b["idx"]["N"]:
+                return False
+        return True
+
+
     def userdata(self, name, val=None):
         """Used to save or retrieve values of user data.
 
@@ -773,3 +766,30 @@ class opf_model(object):
                 return self.user_data[name]
             else:
                 return array([])
+
+
+class _sparse_blocks(object):
+    """Collects the entries of sparse blocks of a matrix as coordinates, so
+    that the full matrix is built at once without dense intermediates.
+    """
+    def __init__(self, n_rows, n_cols):
+        self.shape = (n_rows, n_cols)
+        self.rows, self.cols, self.data = [], [], []
+
+    def add(self, block, i1, columns):
+        """Adds C{block} with its first row at row C{i1} and its columns at
+        the C{columns} of the full matrix.
+        """
+        block = coo_matrix(block)
+        self.rows.append(block.row + i1)
+        self.cols.append(columns[block.col])
+        ## blocks of the ppc can be complex, the matrix is real
+        self.data.append(real(block.data))
+
+    def tocsr(self):
+        if not self.data:
+            return sparse(self.shape)
+        matrix = sparse((concatenate(self.data),
+                         (concatenate(self.rows), concatenate(self.cols))), self.shape)
+        matrix.sort_indices()
+        return matrix
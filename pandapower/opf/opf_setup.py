@@ -80,7 +80,7 @@ def opf_setup(ppc, ppopt):
 
                 # FIXME: delete sparse matrix columns
                 bcc = delete(arange(ppc['A'].shape[1]), acc)
-                ppc['A'] = ppc['A'].tolil()[:, bcc].tocsr()           ## delete Vm and Qg columns
+                ppc['A'] = ppc['A'].tocsc()[:, bcc].tocsr()           ## delete Vm and Qg columns
 
             if nw and (ppc['N'].shape[1] >= 2*nb + 2*ng):
                 ## make sure there aren't any costs on Vm or Qg
@@ -93,7 +93,7 @@ def opf_setup(ppc, ppopt):
 
                 # FIXME: delete sparse matrix columns
                 bcc = delete(arange(ppc['N'].shape[1]), acc)
-                ppc['N'] = ppc['N'].tolil()[:, bcc].tocsr()               ## delete Vm and Qg columns
+                ppc['N'] = ppc['N'].tocsc()[:, bcc].tocsr()               ## delete Vm and Qg columns
 
     ## convert single-block piecewise-linear costs into linear polynomial cost
     pwl1 = find((ppc['gencost'][:, MODEL] == PW_LINEAR) & (ppc['gencost'][:, NCOST] == 2))
@@ -11,12 +11,15 @@
 """Python Interior Point Solver (PIPS).
 """
 
+from time import time
+
 from numpy import array, Inf, any, isnan, ones, r_, finfo, \
-    zeros, dot, absolute, log, flatnonzero as find
+    zeros, dot, absolute, log, maximum, flatnonzero as find
 from numpy.linalg import norm
 from pypower.pipsver import pipsver
 from scipy.sparse import vstack, hstack, eye, csr_matrix as sparse
-from scipy.sparse.linalg import spsolve
+
+from pandapower.opf.kkt_solver import kkt_solver
 
 
 EPS = finfo(float).eps
@@ -143,6 +146,19 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
                     value is also passed as the 3rd argument to the Hessian
                     evaluation function so that it can appropriately scale the
                     objective function term in the Hessian of the Lagrangian.
+                  - C{warm_start} (None) - slack variables C{z} and multipliers
+                    C{lam} and C{mu} of a previous solution of a problem with
+                    the same constraints (C{output["warm_start"]} of the
+                    previous solution). The interior point method starts from
+                    these values and a barrier coefficient which corresponds to
+                    them instead of the default initial values. Should be used
+                    together with the previous solution as C{x0}.
+                  - C{linsolve} (None) - solver of the KKT systems of the
+                    Newton steps: C{"superlu"} (default), which keeps the
+                    column ordering of the sparsity pattern, C{"spsolve"},
+                    C{"ldl"} for a dense symmetric indefinite factorization,
+                    or an object with the C{solve} method described in
+                    L{kkt_solver}
     @type opt: dict
 
     @rtype: dict
@@ -157,8 +173,12 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
                    - C{iterations} - number of iterations performed
                    - C{hist} - list of arrays with trajectories of the
                      following: feascond, gradcond, compcond, costcond, gamma,
-                     stepsize, obj, alphap, alphad
+                     stepsize, obj, alphap, alphad, linsolve_time (time of
+                     the solution of the KKT system in seconds)
                    - C{message} - exit message
+                   - C{warm_start} - dictionary of the final slack variables
+                     C{z} and the multipliers C{lam} and C{mu}, which can be
+                     used as C{warm_start} option of a subsequent problem
                - C{lmbda} - dictionary containing the Langrange and Kuhn-Tucker
                  multipliers on the constraints, with keys:
                    - C{eqnonlin} - nonlinear equality constraints
@@ -221,10 +241,17 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         opt["cost_mult"] = 1
     if "verbose" not in opt:
         opt["verbose"] = 0
+    if "warm_start" not in opt:
+        opt["warm_start"] = None
+    if "linsolve" not in opt:
+        opt["linsolve"] = None
 
     # initialize history
     hist = []
 
+    # solver of the KKT systems
+    kkt = kkt_solver(opt["linsolve"])
+
     # constants
     xi = 0.99995
     sigma = 0.1
@@ -233,6 +260,7 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     rho_min = 0.95
     rho_max = 1.05
     mu_threshold = 1e-5
+    z_min_warm = 1e-8     # minimum of the slacks and multipliers of a warm start
 
     # initialize
     i = 0                       # iteration counter
@@ -313,6 +341,17 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     mu[k] = gamma / z[k]
     e = ones(niq)
 
+    ws = opt["warm_start"]
+    if ws is not None and len(ws["z"]) == niq and len(ws["lam"]) == neq:
+        # the slacks and multipliers of the previous solution are moved away from zero, so
+        # that the constraints which became active or inactive can be adjusted, and the
+        # barrier coefficient is reduced to the complementarity of the warm start
+        lam = ws["lam"].copy()
+        z = maximum(maximum(ws["z"], -h), z_min_warm)
+        mu = maximum(ws["mu"], z_min_warm)
+        if niq > 0:
+            gamma = sigma * dot(z, mu) / niq
+
     # check tolerance
     f0 = f
     if opt["step_control"]:
@@ -338,7 +377,8 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     # save history
     hist.append({'feascond': feascond, 'gradcond': gradcond,
         'compcond': compcond, 'costcond': costcond, 'gamma': gamma,
-        'stepsize': 0, 'obj': f / opt["cost_mult"], 'alphap': 0, 'alphad': 0})
+        'stepsize': 0, 'obj': f / opt["cost_mult"], 'alphap': 0, 'alphad': 0,
+        'linsolve_time': 0.})
 
     if opt["verbose"]:
         s = '-sc' if opt["step_control"] else ''
@@ -385,13 +425,11 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         M = Lxx if dh is None else Lxx + dh_zinv * mudiag * dh.T
         N = Lx if dh is None else Lx + dh_zinv * (mudiag * h + gamma * e)
 
-        Ab = sparse(M) if dg is None else vstack([
-            hstack([M, dg]),
-            hstack([dg.T, sparse((neq, neq))])
-        ])
         bb = r_[-N, -g]
 
-        dxdlam = spsolve(Ab.tocsr(), bb)
+        t0 = time()
+        dxdlam = kkt.solve(M, dg, bb)
+        linsolve_time = time() - t0
 
         if any(isnan(dxdlam)):
             if opt["verbose"]:
@@ -562,7 +600,7 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
         hist.append({'feascond': feascond, 'gradcond': gradcond,
             'compcond': compcond, 'costcond': costcond, 'gamma': gamma,
             'stepsize': norm(dx), 'obj': f / opt["cost_mult"],
-            'alphap': alphap, 'alphad': alphad})
+            'alphap': alphap, 'alphad': alphad, 'linsolve_time': linsolve_time})
 
         if opt["verbose"] > 1:
             print("%3d  %12.8g %10.5g %12g %12g %12g %12g" %
@@ -603,7 +641,8 @@ def pips(f_fcn, x0=None, A=None, l=None, u=None, xmin=None, xmax=None,
     else:
         raise
 
-    output = {"iterations": i, "hist": hist, "message": message}
+    output = {"iterations": i, "hist": hist, "message": message,
+              "warm_start": {"z": z.copy(), "lam": lam.copy(), "mu": mu.copy()}}
 
     # zero out multipliers on non-binding constraints
     mu[find( (h < -opt["feastol"]) & (mu < mu_threshold) )] = 0.0
@@ -91,6 +91,7 @@ def pipsopf_solver(om, ppopt, out_opt=None):
              'max_red': max_red,
              'step_control': step_control,
              'cost_mult': 1e-4,
+             'linsolve': ppopt.get('PDIPM_LINSOLVE'),
              'verbose': verbose  }
 
     ## unpack data
@@ -140,11 +141,28 @@ def pipsopf_solver(om, ppopt, out_opt=None):
     gh_fcn = lambda x: opf_consfcn(x, om, Ybus, Yf[il, :], Yt[il,:], ppopt, il)
     hess_fcn = lambda x, lmbda, cost_mult: opf_hessfcn(x, lmbda, om, Ybus, Yf[il, :], Yt[il, :], ppopt, il, cost_mult)
 
-    solution = pips(f_fcn, x0, A, l, u, xmin, xmax, gh_fcn, hess_fcn, opt)
+    solution = None
+    warm_start = om.userdata('warm_start')
+    if init == "results" and len(warm_start):
+        ## warm start from the solution of a previous OPF with the same structure (see opf)
+        x0_warm = warm_start["x"].clip(xmin, xmax)
+        solution = pips(f_fcn, x0_warm, A, l, u, xmin, xmax, gh_fcn, hess_fcn,
+                        dict(opt, warm_start=warm_start))
+        if solution["eflag"] <= 0:
+            ## start again from the initial point if the warm start failed
+            it_warm = solution["output"]["iterations"]
+            solution = pips(f_fcn, x0, A, l, u, xmin, xmax, gh_fcn, hess_fcn, opt)
+            solution["output"]["iterations"] += it_warm
+    if solution is None:
+        solution = pips(f_fcn, x0, A, l, u, xmin, xmax, gh_fcn, hess_fcn, opt)
     x, f, info, lmbda, output = solution["x"], solution["f"], \
             solution["eflag"], solution["lmbda"], solution["output"]
 
     success = (info > 0)
+    if success:
+        ## keep the solution as warm start of a subsequent OPF
+        warm_start = dict(output["warm_start"], x=x)
+        om.userdata('warm_start', warm_start)
 
     ## update solution data
     Va = x[vv["i1"]["Va"]:vv["iN"]["Va"]]
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+"""Linear program solver based on the HiGHS solvers of scipy's linprog.
+"""
+
+import re
+
+from numpy import Inf, abs, asarray, c_, full, nan, r_, zeros
+from numpy import flatnonzero as find
+from scipy import __version__ as scipy_version
+from scipy.sparse import vstack, csr_matrix as sparse
+
+## limits beyond this value are treated as infinite, as in PIPS
+INF_LIMIT = 1e10
+
+## linprog returns the multipliers of the HiGHS solvers since scipy 1.7
+HIGHS_AVAILABLE = tuple(int(v) for v in re.findall(r"\d+", scipy_version)[:2]) >= (1, 7)
+
+
+def qps_linprog(H, c, A, l, u, xmin=None, xmax=None, x0=None, opt=None):
+    """Linear program solver with the same interface as L{qps_pypower}.
+
+    Solves the linear program::
+
+        min c'*x
+         x
+
+    subject to::
+
+        l <= A*x <= u       (linear constraints)
+        xmin <= x <= xmax   (variable bounds)
+
+    with the HiGHS solvers of C{scipy.optimize.linprog}, which work on the
+    sparse matrix C{A} and return the multipliers of all constraints. The
+    quadratic cost matrix C{H} must be empty or zero. The starting point
+    C{x0} is ignored.
+
+    C{opt} is an optional options dict with the keys:
+        - C{verbose} (0) - print the log of HiGHS
+        - C{linprog_opt} - options for linprog, e.g. C{{'method': 'highs-ds'}}
+          for the dual simplex method, default C{'highs'} chooses the method
+
+    Returns C{x, f, eflag, output, lmbda} as L{qps_pypower}, where C{eflag}
+    is 1 if an optimal solution was found and C{output} holds the
+    C{iterations}, the C{status} and the C{message} of linprog.
+
+    @see: L{qps_pypower}, L{dcopf_solver}
+    """
+    if not HIGHS_AVAILABLE:
+        raise ImportError("qps_linprog requires the HiGHS solvers of linprog, which are "
+                          "available with scipy >= 1.7 (installed: %s)" % scipy_version)
+    ## imported on demand, scipy.optimize is slow to import
+    from scipy.optimize import linprog
+
+    if opt is None:
+        opt = {}
+    if H is not None and sparse(H).count_nonzero():
+        raise ValueError("qps_linprog solves linear programs only, use a QP solver for "
+                         "quadratic costs")
+    A = sparse(A)
+    nA, nx = A.shape
+    xmin = full(nx, -Inf) if xmin is None else xmin
+    xmax = full(nx, Inf) if xmax is None else xmax
+
+    ## equality constraints, upper and lower bounded inequality constraints
+    ieq = find(abs(u - l) <= 1e-10)
+    iub = find((u < INF_LIMIT) & (abs(u - l) > 1e-10))
+    ilb = find((l > -INF_LIMIT) & (abs(u - l) > 1e-10))
+    nub = len(iub)
+
+    linprog_opt = dict(method="highs", options={"disp": bool(opt.get("verbose", 0))})
+    linprog_opt.update(opt.get("linprog_opt", {}))
+    bounds = c_[xmin, xmax]
+    bounds[bounds <= -INF_LIMIT] = -Inf
+    bounds[bounds >= INF_LIMIT] = Inf
+    A_ub = vstack([A[iub], -A[ilb]], "csr") if nub + len(ilb) else None
+    A_eq = A[ieq] if len(ieq) else None
+    res = linprog(c, A_ub=A_ub, b_ub=r_[u[iub], -l[ilb]] if A_ub is not None else None,
+                  A_eq=A_eq, b_eq=u[ieq] if A_eq is not None else None, bounds=bounds,
+                  **linprog_opt)
+
+    eflag = int(res.status == 0)
+    output = {"iterations": res.nit, "status": res.status, "message": res.message}
+    if res.x is None:
+        x, f = full(nx, nan), nan
+    else:
+        x, f = res.x, res.fun
+
+    ## multipliers in the convention of PIPS: the marginals are the sensitivities of
+    ## the cost to the right hand sides, the multipliers are positive on binding limits
+    mu_l, mu_u = zeros(nA), zeros(nA)
+    lmbda = {"mu_l": mu_l, "mu_u": mu_u, "lower": zeros(nx), "upper": zeros(nx)}
+    if eflag:
+        lam = -asarray(res.eqlin.marginals)
+        mu_ineq = -asarray(res.ineqlin.marginals)
+        mu_l[ieq] = -lam.clip(max=0)
+        mu_u[ieq] = lam.clip(min=0)
+        mu_u[iub] = mu_ineq[:nub]
+        mu_l[ilb] = mu_ineq[nub:]
+        lmbda["lower"] = asarray(res.lower.marginals)
+        lmbda["upper"] = -asarray(res.upper.marginals)
+    return x, f, eflag, output, lmbda
+
@@ -32,6 +32,10 @@ def _optimal_powerflow(net, verbose, suppress_warnings, **kwargs):
     init = net["_options"]["init"]
 
     ppopt = ppoption(VERBOSE=verbose, OPF_FLOW_LIM=2, PF_DC=not ac, INIT=init, **kwargs)
+    # the OPF model of the previous OPF holds the solution for a warm start
+    om_prev = None
+    if init == "results" and net.get("_ppc_opf") is not None:
+        om_prev = net["_ppc_opf"].get("om")
     net["OPF_converged"] = False
     net["converged"] = False
     _add_auxiliary_elements(net)
@@ -49,9 +53,9 @@ def _optimal_powerflow(net, verbose, suppress_warnings, **kwargs):
     if suppress_warnings:
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
-            result = opf(ppci, ppopt)
+            result = opf(ppci, ppopt, om_prev=om_prev)
     else:
-        result = opf(ppci, ppopt)
+        result = opf(ppci, ppopt, om_prev=om_prev)
     net["_ppc_opf"] = result
 
     if not result["success"]:
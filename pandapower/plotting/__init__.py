@@ -1,3 +1,5 @@
+import sys
+
 from pandapower.plotting.collections import *
 from pandapower.plotting.colormaps import *
 from pandapower.plotting.generic_geodata import *
@@ -6,16 +8,9 @@ from pandapower.plotting.simple_plot import *
 from pandapower.plotting.plotly import *
 from pandapower.plotting.geo import *
 from pandapower.plotting.to_html import to_html
+from pandapower.plotting.collections import _set_round_capstyle
 
-import types
-from matplotlib.backend_bases import GraphicsContextBase, RendererBase
-
-class GC(GraphicsContextBase):
-    def __init__(self):
-        super().__init__()
-        self._capstyle = 'round'
-
-def custom_new_gc(self):
-    return GC()
-
-RendererBase.new_gc = types.MethodType(custom_new_gc, RendererBase)
\ No newline at end of file
+# the renderers draw with round line caps. matplotlib is imported on demand by the plotting
+# functions, which patch the renderer then, unless it has been imported before
+if "matplotlib.backend_bases" in sys.modules:
+    _set_round_capstyle()
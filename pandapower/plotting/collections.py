@@ -4,13 +4,7 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.collections import LineCollection, PatchCollection
-from matplotlib.patches import Circle, Ellipse, Rectangle, RegularPolygon, Arc, PathPatch, \
-    FancyArrowPatch
-from matplotlib.textpath import TextPath
-from matplotlib.transforms import Affine2D
 from itertools import combinations
 import copy
 
@@ -30,6 +24,29 @@ def _rotate_dim2(arr, ang):
     return np.dot(np.array([[np.cos(ang), np.sin(ang)], [-np.sin(ang), np.cos(ang)]]), arr)
 
 
+def _set_round_capstyle():
+    """
+    Lets all matplotlib renderers draw with round line caps. matplotlib is imported on demand,
+    so the renderer is patched by the plotting functions which import it.
+    """
+    import types
+    from matplotlib.backend_bases import GraphicsContextBase, RendererBase
+
+    if getattr(RendererBase.new_gc, "_round_capstyle", False):
+        return
+
+    class GC(GraphicsContextBase):
+        def __init__(self):
+            super().__init__()
+            self._capstyle = 'round'
+
+    def custom_new_gc(self):
+        return GC()
+
+    custom_new_gc._round_capstyle = True
+    RendererBase.new_gc = types.MethodType(custom_new_gc, RendererBase)
+
+
 def create_annotation_collection(texts, coords, size, prop=None, **kwargs):
     """
     Creates PatchCollection of Texts shown at the given coordinates
@@ -43,6 +60,10 @@ def create_annotation_collection(texts, coords, size, prop=None, **kwargs):
         **prop** - FontProperties being passed to the TextPatches
         **kwargs** - Any other keyword-arguments will be passed to the PatchCollection.
     """
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import PathPatch
+    from matplotlib.textpath import TextPath
+    _set_round_capstyle()
     tp = []
     # we convert TextPaths to PathPatches to create a PatchCollection
     for t, c in zip(texts, coords):
@@ -97,6 +118,9 @@ def create_bus_collection(net, buses=None, size=5, marker="o", patch_type="circl
     OUTPUT:
         **pc** - patch collection
     """
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Ellipse, Rectangle, RegularPolygon
+    _set_round_capstyle()
     buses = net.bus.index.tolist() if buses is None else list(buses)
     if len(buses) == 0:
         return None
@@ -202,6 +226,8 @@ def create_line_collection(net, lines=None, line_geodata=None, bus_geodata=None,
     OUTPUT:
         **lc** - line collection
     """
+    from matplotlib.collections import LineCollection
+    _set_round_capstyle()
     if use_bus_geodata:
         linetab = net.line if lines is None else net.line.loc[lines]
     lines = net.line.index.tolist() if lines is None else list(lines)
@@ -286,6 +312,8 @@ def create_trafo_connection_collection(net, trafos=None, bus_geodata=None, infof
     OUTPUT:
         **lc** - line collection
     """
+    from matplotlib.collections import LineCollection
+    _set_round_capstyle()
     trafos = net.trafo if trafos is None else net.trafo.loc[trafos]
 
     if bus_geodata is None:
@@ -329,6 +357,8 @@ def create_trafo3w_connection_collection(net, trafos=None, bus_geodata=None, inf
     OUTPUT:
         **lc** - line collection
     """
+    from matplotlib.collections import LineCollection
+    _set_round_capstyle()
     trafos = net.trafo3w if trafos is None else net.trafo3w.loc[trafos]
 
     if bus_geodata is None:
@@ -385,6 +415,9 @@ def create_trafo_collection(net, trafos=None, picker=False, size=None,
 
         **pc** - patch collection
     """
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Circle
+    _set_round_capstyle()
     trafo_table = net.trafo if trafos is None else net.trafo.loc[trafos]
     lines = []
     circles = []
@@ -448,6 +481,9 @@ def create_trafo3w_collection(net, trafo3ws=None, picker=False, infofunc=None, *
 
         **pc** - patch collection
     """
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Circle
+    _set_round_capstyle()
     trafo3w_table = net.trafo3w if trafo3ws is None else net.trafo3w.loc[trafo3ws]
     lines = []
     circles = []
@@ -499,6 +535,9 @@ def create_trafo3w_collection(net, trafo3ws=None, picker=False, infofunc=None, *
 
 
 def create_load_collection(net, loads=None, size=1., infofunc=None, orientation=np.pi, **kwargs):
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import RegularPolygon
+    _set_round_capstyle()
     load_table = net.load if loads is None else net.load.loc[loads]
     """
     Creates a matplotlib patch collection of pandapower loads.
@@ -561,6 +600,9 @@ def create_gen_collection(net, size=1., infofunc=None, **kwargs):
 
         **gen2** - patch collection
     """
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Circle, Arc
+    _set_round_capstyle()
     lines = []
     polys = []
     infos = []
@@ -584,6 +626,9 @@ def create_gen_collection(net, size=1., infofunc=None, **kwargs):
 
 
 def create_sgen_collection(net, sgens=None, size=1., infofunc=None, orientation=np.pi, **kwargs):
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Circle, RegularPolygon
+    _set_round_capstyle()
     sgen_table = net.sgen if sgens is None else net.sgen.loc[sgens]
     """
     Creates a matplotlib patch collection of pandapower sgen.
@@ -668,6 +713,9 @@ def create_ext_grid_collection(net, size=1., infofunc=None, orientation=0, picke
 
         **ext_grid2** - patch collection
     """
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Rectangle
+    _set_round_capstyle()
     lines = []
     polys = []
     infos = []
@@ -712,6 +760,10 @@ def create_line_switch_collection(net, size=1, distance_to_bus=3, use_line_geoda
     OUTPUT:
         **switches** - patch collection
     """
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Rectangle
+    from matplotlib.transforms import Affine2D
+    _set_round_capstyle()
     lbs_switches = net.switch.index[net.switch.et == "l"]
 
     color = kwargs.pop("color", "k")
@@ -800,6 +852,10 @@ def create_bus_bus_switch_collection(net, size=1., helper_line_style=':', helper
     OUTPUT:
         **switches**, **helper_lines** - tuple of patch collections
     """
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Rectangle
+    from matplotlib.transforms import Affine2D
+    _set_round_capstyle()
     lbs_switches = net.switch.index[net.switch.et == "b"]
     color = kwargs.pop("color", "k")
     switch_patches = []
@@ -857,6 +913,7 @@ def draw_collections(collections, figsize=(10, 8), ax=None, plot_colorbars=True,
     OUTPUT:
         **ax** - matplotlib axes
     """
+    import matplotlib.pyplot as plt
 
     if ax is None:
         plt.figure(facecolor="white", figsize=figsize)
@@ -882,6 +939,8 @@ def draw_collections(collections, figsize=(10, 8), ax=None, plot_colorbars=True,
 
 
 def add_collections_to_axes(ax, collections, plot_colorbars=True, copy_collections=True):
+    import matplotlib.pyplot as plt
+    _set_round_capstyle()
     for c in collections:
         if c:
             if copy_collections:
@@ -4,9 +4,6 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-from matplotlib.colors import ListedColormap, BoundaryNorm, LinearSegmentedColormap, Normalize
-
-
 def cmap_discrete(cmap_list):
     """
     Can be used to create a discrete colormap.
@@ -26,6 +23,7 @@ def cmap_discrete(cmap_list):
         >>> lc = create_line_trace(net, cmap=cmap, norm=norm)
         >>> draw_traces([lc])
     """
+    from matplotlib.colors import ListedColormap, BoundaryNorm
     cmap_colors = []
     boundaries = []
     last_upper = None
@@ -60,6 +58,7 @@ def cmap_continous(cmap_list):
         >>> bc = create_bus_trace(net, cmap=cmap, norm=norm)
         >>> draw_traces([bc])
     """
+    from matplotlib.colors import LinearSegmentedColormap, Normalize
     min_loading = cmap_list[0][0]
     max_loading = cmap_list[-1][0]
     cmap_colors = [((loading-min_loading)/(max_loading - min_loading), color) for
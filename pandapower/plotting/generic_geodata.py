@@ -6,7 +6,6 @@
 
 import copy
 
-import networkx as nx
 import pandas as pd
 
 import pandapower.topology as top
@@ -112,6 +111,7 @@ def create_generic_coordinates(net, mg=None, library="igraph", respect_switches=
             layout = graph.layout("rt", root=roots)
         coords = list(zip(*layout.coords))
     elif library == "networkx":
+        import networkx as nx
         if mg is None:
             nxg = top.create_nxgraph(gnet, respect_switches)
         else:
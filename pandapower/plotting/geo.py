@@ -1,11 +1,8 @@
-try:
+def convert_geodata_to_gis(net, epsg=31467, bus_geodata=True, line_geodata=True):
+    # the gis libraries are imported on demand, they are slow to import and optional
     from fiona.crs import from_epsg
     from shapely.geometry import Point, LineString
     from geopandas import GeoDataFrame, GeoSeries
-except:
-    pass
-
-def convert_geodata_to_gis(net, epsg=31467, bus_geodata=True, line_geodata=True):
     if bus_geodata:
         g = net.bus_geodata
         geo = [Point(x, y) for x, y in g[["x", "y"]].values]
@@ -4,22 +4,11 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-import sys
-
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import matplotlib.colors as mplc
-
 import numpy as np
 
-try:
-    import seaborn
-except ImportError:
-    pass
-
 
 def get_plotly_color(color_string):
+    import matplotlib.colors as mplc
     try:
         converted = _to_plotly_color(mplc.to_rgba(color_string))
         return converted
@@ -28,9 +17,12 @@ def get_plotly_color(color_string):
 
 
 def get_plotly_color_palette(n):
-    if 'seaborn' in sys.modules:
+    try:
+        # seaborn is imported on demand, it is slow to import and optional
+        import seaborn
         return _to_plotly_palette(seaborn.color_palette("hls", n))
-    else:
+    except ImportError:
+        import matplotlib.pyplot as plt
         hsv = plt.get_cmap('hsv')
         return _to_plotly_palette(hsv(np.linspace(0, 1.0, n)))
 
@@ -39,6 +31,7 @@ def _to_plotly_palette(scl, transparence=None):
     """
     converts a rgb color palette in format (0-1,0-1,0-1) to a plotly color palette 'rgb(0-255,0-255,0-255)'
     """
+    import matplotlib.colors as mplc
     _out = []
     for color in scl:
         plotly_col = [255 * _c for _c in mplc.to_rgba(color)]
@@ -56,6 +49,7 @@ def _to_plotly_color(scl, transparence=None):
     """
     converts a rgb color in format (0-1,0-1,0-1) to a plotly color 'rgb(0-255,0-255,0-255)'
     """
+    import matplotlib.colors as mplc
     plotly_col = [255 * _c for _c in mplc.to_rgba(scl)] if len(scl) == 3 else [255 * _c for _c in mplc.to_rgb(scl)]
     if transparence is not None:
         assert 0. <= transparence <= 1.0
@@ -66,6 +60,8 @@ def _to_plotly_color(scl, transparence=None):
 
 
 def get_plotly_cmap(values, cmap_name='jet', cmin=None, cmax=None):
+    import matplotlib.cm as cm
+    import matplotlib.colors as mplc
     cmap = cm.get_cmap(cmap_name)
     if cmin is None:
         cmin = values.min()
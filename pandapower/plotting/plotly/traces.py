@@ -18,20 +18,10 @@ except ImportError:
     import logging
 logger = logging.getLogger(__name__)
 
-try:
-    from packaging import version
-    from plotly import __version__
-    from plotly.graph_objs.scatter.marker import ColorBar
-    from plotly.graph_objs import Figure, Layout
-    from plotly.graph_objs.layout import XAxis, YAxis
-    from plotly.graph_objs.scatter import Line, Marker
-    from plotly.graph_objs.scattermapbox import Line as scmLine
-    from plotly.graph_objs.scattermapbox import Marker as scmMarker
-except ImportError:
-    logger.debug("Failed to import plotly - interactive plotting will not be available")
-
 
 def version_check():
+    from packaging import version
+    from plotly import __version__
     if version.parse(__version__) < version.parse("3.1.1"):
         raise UserWarning("Your plotly version {} is no longer supported.\r\n"
                           "Please upgrade your python-plotly installation, "
@@ -161,6 +151,8 @@ def create_bus_trace(net, buses=None, size=5, patch_type="circle", color="blue",
         **colormap_column** (str, "vm_pu") - set color of bus according to this variable
 
     """
+    from plotly.graph_objs.scatter.marker import ColorBar
+    from plotly.graph_objs.scatter import Marker
     color = get_plotly_color(color)
 
     bus_trace = dict(type='scatter', text=[], mode='markers', hoverinfo='text', name=trace_name,
@@ -287,6 +279,8 @@ def create_line_trace(net, lines=None, use_line_geodata=True, respect_switches=F
         **cmax** (float, None) - colorbar range maximum
 
         """
+    from plotly.graph_objs.scatter.marker import ColorBar
+    from plotly.graph_objs.scatter import Line, Marker
 
     color = get_plotly_color(color)
 
@@ -457,6 +451,7 @@ def create_trafo_trace(net, trafos=None, color='green', width=5, infofunc=None,
 
 
     """
+    from plotly.graph_objs.scatter import Line
     color = get_plotly_color(color)
 
     # defining lines to be plot
@@ -550,6 +545,11 @@ def draw_traces(traces, on_map=False, map_style='basic', showlegend=True, figsiz
         **filename** (str, "temp-plot.html") - plots to a html file called filename
 
     """
+    from plotly.graph_objs import Figure, Layout
+    from plotly.graph_objs.layout import XAxis, YAxis
+    from plotly.graph_objs.scatter import Line, Marker
+    from plotly.graph_objs.scattermapbox import Line as scmLine
+    from plotly.graph_objs.scattermapbox import Marker as scmMarker
 
     if on_map:
         try:
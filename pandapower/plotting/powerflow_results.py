@@ -4,17 +4,18 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-import matplotlib.pyplot as plt
 import numpy as np
 from itertools import combinations
 import pandapower.topology as top
 import pandas as pd
-import networkx as nx
+from pandapower.plotting.collections import _set_round_capstyle
 
 
 def plot_voltage_profile(net, plot_transformers=True, ax=None, xlabel="Distance from Slack [km]",
                          ylabel="Voltage [pu]", x0=0, trafocolor="r", bus_colors=None,
                          line_loading_weight=False, voltage_column=None, bus_size=3, **kwargs):
+    import matplotlib.pyplot as plt
+    _set_round_capstyle()
     if ax is None:
         plt.figure(facecolor="white", dpi=120)
         ax = plt.gca()
@@ -88,6 +89,8 @@ def plot_voltage_profile(net, plot_transformers=True, ax=None, xlabel="Distance
 
 
 def plot_loading(net, element="line", boxcolor="b", mediancolor="r", whiskercolor="k", ax=None):
+    import matplotlib.pyplot as plt
+    _set_round_capstyle()
     if ax is None:
         plt.figure(facecolor="white", dpi=80)
         ax = plt.gca()
@@ -104,6 +107,7 @@ def plot_loading(net, element="line", boxcolor="b", mediancolor="r", whiskercolo
 
 
 def voltage_profile_to_bus_geodata(net, voltages=None):
+    import networkx as nx
     if voltages is None:
         if not net.converged:
             raise ValueError("no results in this pandapower network")
@@ -125,6 +129,7 @@ if __name__ == "__main__":
     import pandapower.networks as nw
     import pandas as pd
     import networkx as nx
+    import matplotlib.pyplot as plt
     import plotting
 
     net = nw.mv_oberrhein()
@@ -4,8 +4,6 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-import matplotlib.pyplot as plt
-
 from pandapower.plotting.collections import create_bus_collection, create_line_collection, \
     create_trafo_collection, create_trafo3w_collection, \
     create_line_switch_collection, draw_collections, create_bus_bus_switch_collection, create_sgen_collection, create_load_collection
@@ -172,6 +170,7 @@ def simple_plot(net, respect_switches=False, line_width=1.0, bus_size=1.0, ext_g
 
     ax = draw_collections(collections)
     if show_plot:
+        import matplotlib.pyplot as plt
         plt.show()
     return ax
 
@@ -160,6 +160,7 @@ def _copy_results_ppci_to_ppc(result, ppc, mode):
     if mode == 'opf':
         ppc['obj'] = result['f']
         ppc['internal_gencost'] = result['gencost']
+        ppc['om'] = result['om']
 
     if "iterations" in result:
         ppc["iterations"] = result["iterations"]
@@ -8,7 +8,7 @@ import numpy as np
 
 from pandapower.auxiliary import _add_pf_options, _add_ppc_options, _add_opf_options, \
     _check_if_numba_is_installed, _check_bus_index_and_print_warning_if_high, \
-    _check_gen_index_and_print_warning_if_high
+    _check_gen_index_and_print_warning_if_high, set_numba_cache_dir
 from pandapower.optimal_powerflow import _optimal_powerflow
 from pandapower.opf.validate_opf_input import _check_necessary_opf_parameters
 from pandapower.powerflow import _powerflow
@@ -417,6 +417,10 @@ def runopp(net, verbose=False, calculate_voltage_angles=False, check_connectivit
             "flat" (default): starting vector is (upper bound - lower bound) / 2
             "pf": a power flow is executed prior to the opf and the pf solution is the starting vector. This may improve
             convergence, but takes a longer runtime (which are probably neglectible for opf calculations)
+            "results": the interior point method is started from the primal and dual solution of the previous opf of
+            the net (warm start), if the previous opf converged and the variables and constraints of the opf are the
+            same. This reduces the number of iterations of a sequence of opfs in which only loads, limits or costs
+            change, e.g. for time series. The number of iterations is given in net._ppc_opf["iterations"].
     """
     logger.warning("The OPF cost definition has changed! Please check out the tutorial 'opf_changes-may18.ipynb' or the documentation!")
     _check_necessary_opf_parameters(net, logger)
@@ -474,6 +478,15 @@ def rundcopp(net, verbose=False, check_connectivity=True, suppress_warnings=True
             processed in pypower, ComplexWarnings are raised during the loadflow.
             These warnings are suppressed by this option, however keep in mind all other pypower
             warnings are suppressed, too.
+
+        **OPF_ALG_DC** (int, 0) - solver of the DC OPF, further keyword arguments are passed to
+        the pypower options as well
+
+            0: CPLEX, MOSEK or Gurobi if they are installed, otherwise PIPS
+            200: PIPS, the interior point method of pypower
+            800: the HiGHS solvers of scipy.optimize.linprog (requires scipy >= 1.7), which solve
+            OPFs with linear and piecewise linear costs considerably faster than PIPS. Quadratic
+            costs raise a ValueError.
     """
 
     if (not net.sgen.empty) & (not "controllable" in net.sgen.columns):
@@ -504,3 +517,54 @@ def rundcopp(net, verbose=False, check_connectivity=True, suppress_warnings=True
     _check_bus_index_and_print_warning_if_high(net)
     _check_gen_index_and_print_warning_if_high(net)
     _optimal_powerflow(net, verbose, suppress_warnings, **kwargs)
+
+
+def _warmup_net():
+    import pandapower.create as pc
+    net = pc.create_empty_network()
+    b1 = pc.create_bus(net, vn_kv=110.)
+    b2 = pc.create_bus(net, vn_kv=20.)
+    b3 = pc.create_bus(net, vn_kv=20.)
+    b4 = pc.create_bus(net, vn_kv=20.)
+    pc.create_ext_grid(net, b1)
+    pc.create_transformer(net, b1, b2, std_type="25 MVA 110/20 kV")
+    pc.create_line(net, b2, b3, length_km=1., std_type="NA2XS2Y 1x95 RM/25 12/20 kV")
+    pc.create_switch(net, b3, b4, et="b")
+    pc.create_load(net, b4, p_kw=1000., q_kvar=200.)
+    pc.create_gen(net, b3, p_kw=-500., vm_pu=1.0)
+    return net
+
+
+def warmup(cache_dir=None):
+    """
+    Compiles the numba functions of the power flow in advance by running power flows for a small
+    example network. The compiled functions are stored in the numba cache, so that subsequent
+    python processes load them from the cache instead of compiling them again in their first
+    power flow. This is useful to move the compilation time out of short-lived processes, e.g. by
+    running
+
+        python -c "import pandapower as pp; pp.warmup()"
+
+    when building a container image or deploying an environment. Without numba, warmup does
+    nothing.
+
+    OPTIONAL:
+        **cache_dir** (string, None) - directory of the numba cache (see set_numba_cache_dir).
+        Processes that should use the compiled functions have to use the same directory, e.g. by
+        setting the environment variable NUMBA_CACHE_DIR. If None, numba's default location is
+        used.
+
+    EXAMPLE:
+
+        >>> pp.warmup()
+
+    """
+    if cache_dir is not None:
+        set_numba_cache_dir(cache_dir)
+    if not _check_if_numba_is_installed(True):
+        return
+    net = _warmup_net()
+    # with a pv bus (create_J) and without any pv bus (create_J2)
+    runpp(net, numba=True)
+    net.gen.in_service = False
+    runpp(net, numba=True)
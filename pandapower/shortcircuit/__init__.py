@@ -1 +1,2 @@
-from pandapower.shortcircuit.calc_sc import calc_sc
\ No newline at end of file
+from pandapower.shortcircuit.calc_sc import calc_sc, calc_sc_along_lines, short_circuit_session
+from pandapower.shortcircuit.scenarios import calc_sc_scenarios
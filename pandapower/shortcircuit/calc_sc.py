@@ -12,20 +12,28 @@ except ImportError:
 logger = logging.getLogger(__name__)
 #import time
 
+import copy
+
+import numpy as np
+import pandas as pd
+
 from pandapower.auxiliary import _clean_up, _add_ppc_options, _add_sc_options
 from pandapower.pd2ppc import _pd2ppc
 from pandapower.pd2ppc_zero import _pd2ppc_zero
 from pandapower.powerflow import _add_auxiliary_elements
 from pandapower.results import _copy_results_ppci_to_ppc
 from pandapower.shortcircuit.currents import _calc_ikss, _calc_ikss_1ph, _calc_ip, _calc_ith, _calc_branch_currents
+from pandapower.shortcircuit.idx_bus import IP, ITH
 from pandapower.shortcircuit.impedance import _calc_zbus, _calc_ybus, _calc_rx
 from pandapower.shortcircuit.kappa import _add_kappa_to_ppc
+from pandapower.shortcircuit.line_faults import _calc_line_faults
 from pandapower.shortcircuit.results import _extract_results
 
 
 def calc_sc(net, fault="3ph", case='max', lv_tol_percent=10, topology="auto", ip=False,
             ith=False, tk_s=1., kappa_method="C", r_fault_ohm=0., x_fault_ohm=0.,
-            branch_results=False):
+            branch_results=False, bus=None, return_all_currents=False, branch_chunk_size=None,
+            n_threads=1):
     """
     Calculates minimal or maximal symmetrical short-circuit currents.
     The calculation is based on the method of the equivalent voltage source
@@ -81,6 +89,26 @@ def calc_sc(net, fault="3ph", case='max', lv_tol_percent=10, topology="auto", ip
 
         **consider_sgens** (bool, True) defines if short-circuit contribution of static generators should be considered or not
 
+        **bus** (list, None) indices of the faulted buses. If None, faults at all buses are
+        calculated. For a subset of the buses, only the needed columns of the bus impedance
+        matrix are calculated with a sparse LU factorization of the admittance matrix instead of
+        inverting the whole matrix. net.res_bus_sc then only contains the faulted buses and the
+        branch results are the minimum / maximum currents of these faults.
+
+        **branch_results** (bool, False) if True, the minimum / maximum branch currents over all
+        faults are calculated (in net.res_line_sc, net.res_trafo_sc and net.res_trafo3w_sc)
+
+        **return_all_currents** (bool, False) only for branch_results: if True, the branch
+        currents of each fault are returned instead of the minimum / maximum. The branch result
+        tables are then indexed by the branch and the faulted bus.
+
+        **branch_chunk_size** (int, None) number of faults for which the branch currents are
+        calculated at once. By default, it is chosen so that the arrays of a chunk need about
+        16 MB.
+
+        **n_threads** (int, 1) number of threads in which the chunks of the branch current
+        calculation are processed
+
 
     OUTPUT:
 
@@ -89,102 +117,254 @@ def calc_sc(net, fault="3ph", case='max', lv_tol_percent=10, topology="auto", ip
 
         print(net.res_bus_sc)
     """
-    if fault not in ["3ph", "2ph", "1ph"]:
-        raise NotImplementedError(
-            "Only 3ph, 2ph and 1ph short-circuit currents implemented")
-
-    if len(net.gen) and (ip or ith):
-        logger.warning("aperiodic and thermal short-circuit currents are only implemented for "
-                       "faults far from generators!")
-
-    if case not in ['max', 'min']:
-        raise ValueError('case can only be "min" or "max" for minimal or maximal short "\
-                                "circuit current')
-    if topology not in ["meshed", "radial", "auto"]:
-        raise ValueError(
-            'specify network structure as "meshed", "radial" or "auto"')
-
-    if branch_results:
-        logger.warning("Branch results are in beta mode and might not always be reliable, "
-                       "especially for transformers")
-
-    kappa = ith or ip
-    net["_options"] = {}
-    _add_ppc_options(net, calculate_voltage_angles=False, trafo_model="pi",
-                     check_connectivity=False, mode="sc", copy_constraints_to_ppc=False,
-                     r_switch=0.0, init_vm_pu="flat", init_va_degree="flat", enforce_q_lims=False,
-                     recycle=None)
-    _add_sc_options(net, fault=fault, case=case, lv_tol_percent=lv_tol_percent, tk_s=tk_s,
-                    topology=topology, r_fault_ohm=r_fault_ohm, kappa_method=kappa_method,
-                    x_fault_ohm=x_fault_ohm, kappa=kappa, ip=ip, ith=ith,
-                    consider_sgens=False, branch_results=branch_results)
-    if fault == "3ph":
-        _calc_sc(net)
-    if fault == "2ph":
-        _calc_sc(net)
-    if fault == "1ph":
-        if case == "min":
-            raise NotImplementedError("Minimum 1ph short-circuits are not yet implemented")
-        _calc_sc_1ph(net)
+    session = short_circuit_session(net, lv_tol_percent=lv_tol_percent, topology=topology,
+                                    tk_s=tk_s, kappa_method=kappa_method,
+                                    r_fault_ohm=r_fault_ohm, x_fault_ohm=x_fault_ohm, bus=bus)
+    session.calc_sc(fault=fault, case=case, ip=ip, ith=ith, branch_results=branch_results,
+                    return_all_currents=return_all_currents, branch_chunk_size=branch_chunk_size,
+                    n_threads=n_threads)
 
 
-def _calc_sc(net):
-    #    t0 = time.perf_counter()
-    _add_auxiliary_elements(net)
-    ppc, ppci = _pd2ppc(net)
-#    t1 = time.perf_counter()
-    _calc_ybus(ppci)
-#    t2 = time.perf_counter()
-    try:
-        _calc_zbus(ppci)
-    except Exception as e:
+def calc_sc_along_lines(net, line=None, positions=(0., 0.25, 0.5, 0.75, 1.), fault="3ph",
+                        case="max", lv_tol_percent=10, topology="auto", ip=False, ith=False,
+                        tk_s=1., kappa_method="C", r_fault_ohm=0., x_fault_ohm=0.):
+    """
+    Calculates the short-circuit currents of faults at relative positions along lines, e.g. for
+    the coordination of protection devices. The lines are not split with new buses: the
+    impedances at the fault positions are calculated from the entries of the bus impedance
+    matrix at the buses of the lines, so that the bus impedance matrix of the network is only
+    calculated once for all lines and positions.
+
+    INPUT:
+        **net** (pandapowerNet) pandapower Network
+
+    OPTIONAL:
+        **line** (list, None) indices of the lines, all lines if None
+
+        **positions** (list, (0, 0.25, 0.5, 0.75, 1)) relative positions of the faults along the
+        lines between 0 (from bus) and 1 (to bus)
+
+        **fault** (str, 3ph) type of fault, "3ph" or "2ph"
+
+        **case**, **lv_tol_percent**, **topology**, **ip**, **ith**, **tk_s**,
+        **kappa_method**, **r_fault_ohm**, **x_fault_ohm** - see calc_sc. Kappa method B is
+        only implemented for the topologies "meshed" and "radial".
+
+    OUTPUT:
+        **res_line_fault_sc** (DataFrame) - short-circuit currents ikss_ka (ip_ka, ith_ka) at
+        the fault positions and the currents ikss_from_ka and ikss_to_ka flowing into the fault
+        from the from bus and the to bus side of the line, indexed by the line and the position.
+        Lines which are out of service or not connected to an external grid have no results.
+
+    EXAMPLE:
+        res = calc_sc_along_lines(net, positions=np.linspace(0, 1, 11), ip=True)
+
+        print(res.loc[3])
+    """
+    session = short_circuit_session(net, lv_tol_percent=lv_tol_percent, topology=topology,
+                                    tk_s=tk_s, kappa_method=kappa_method,
+                                    r_fault_ohm=r_fault_ohm, x_fault_ohm=x_fault_ohm)
+    return session.calc_sc_along_lines(line=line, positions=positions, fault=fault, case=case,
+                                       ip=ip, ith=ith)
+
+
+class short_circuit_session(object):
+    """
+    Short-circuit calculations for several fault types and cases in the same network. The
+    positive sequence system of each case, the zero sequence system and the system at the
+    equivalent frequency of kappa method C are built and their bus impedance matrices are
+    calculated only once. All following calculations of the session reuse them, so that e.g.
+    the maximum and minimum currents of three-phase, two-phase and single-phase faults only need
+    two bus impedance matrices of the positive sequence system instead of six.
+
+    The parameters of the network must not be changed during the session, except for the static
+    generators which are current sources (in_service, sn_kva and k of the sgens which are not
+    motors). A new session has to be created after other changes of the network.
+
+    INPUT:
+        **net** (pandapowerNet) pandapower Network
+
+    OPTIONAL:
+        **lv_tol_percent**, **topology**, **tk_s**, **kappa_method**, **r_fault_ohm**,
+        **x_fault_ohm**, **bus** - options of the calculations, see calc_sc
+
+    EXAMPLE:
+        session = short_circuit_session(net, bus=[3, 7])
+
+        for case in ["max", "min"]:
+            session.calc_sc(fault="3ph", case=case, ip=True)
+
+            print(net.res_bus_sc)
+
+        session.calc_sc(fault="1ph", case="max")
+    """
+    def __init__(self, net, lv_tol_percent=10, topology="auto", tk_s=1., kappa_method="C",
+                 r_fault_ohm=0., x_fault_ohm=0., bus=None):
+        if topology not in ["meshed", "radial", "auto"]:
+            raise ValueError(
+                'specify network structure as "meshed", "radial" or "auto"')
+        if bus is not None:
+            bus = np.array(bus, dtype=np.int64, ndmin=1)
+            missing = ~np.in1d(bus, net.bus.index.values)
+            if any(missing):
+                raise UserWarning("Buses %s do not exist" % bus[missing])
+        self.net = net
+        self.options = {"lv_tol_percent": lv_tol_percent, "topology": topology, "tk_s": tk_s,
+                        "kappa_method": kappa_method, "r_fault_ohm": r_fault_ohm,
+                        "x_fault_ohm": x_fault_ohm, "bus": bus}
+        # ppc, ppci and lookups of the positive and zero sequence systems for each case
+        self._systems = {}
+
+    def calc_sc(self, fault="3ph", case="max", ip=False, ith=False, branch_results=False,
+                return_all_currents=False, branch_chunk_size=None, n_threads=1):
+        """
+        Calculates the short-circuit currents of one fault type and case and writes them to
+        net.res_bus_sc (and the branch result tables) like calc_sc.
+
+        OPTIONAL:
+            **fault**, **case**, **ip**, **ith**, **branch_results**, **return_all_currents**,
+            **branch_chunk_size**, **n_threads** - see calc_sc
+        """
+        net = self.net
+        if fault not in ["3ph", "2ph", "1ph"]:
+            raise NotImplementedError(
+                "Only 3ph, 2ph and 1ph short-circuit currents implemented")
+        if fault == "1ph" and case == "min":
+            raise NotImplementedError("Minimum 1ph short-circuits are not yet implemented")
+        if branch_results:
+            logger.warning("Branch results are in beta mode and might not always be reliable, "
+                           "especially for transformers")
+
+        self._add_options(fault, case, ip, ith, branch_results=branch_results,
+                          return_all_currents=return_all_currents,
+                          branch_chunk_size=branch_chunk_size, n_threads=n_threads)
+        system = self._get_system(case, zero_sequence=fault == "1ph")
+        ppci = system["ppci"]
+        if fault == "1ph":
+            # ip and ith are not calculated for single phase faults
+            ppci["bus"][:, [IP, ITH]] = np.nan
+            _calc_ikss_1ph(net, ppci, system["ppci_0"])
+            system["ppc_0"] = _copy_results_ppci_to_ppc(system["ppci_0"], system["ppc_0"], "sc")
+        else:
+            _calc_ikss(net, ppci)
+            if net["_options"]["ip"]:
+                _calc_ip(net, ppci)
+            if net["_options"]["ith"]:
+                _calc_ith(net, ppci)
+            if net._options["branch_results"]:
+                _calc_branch_currents(net, ppci)
+        system["ppc"] = _copy_results_ppci_to_ppc(ppci, system["ppc"], "sc")
+        _extract_results(net, system["ppc"], system.get("ppc_0") if fault == "1ph" else None)
+        _clean_up(net)
+
+    def calc_sc_along_lines(self, line=None, positions=(0., 0.25, 0.5, 0.75, 1.), fault="3ph",
+                            case="max", ip=False, ith=False):
+        """
+        Calculates the short-circuit currents of faults at relative positions along lines, see
+        calc_sc_along_lines. The network is not changed and the results are not written to the
+        result tables of the network.
+
+        OPTIONAL:
+            **line**, **positions**, **fault**, **case**, **ip**, **ith** - see
+            calc_sc_along_lines
+
+        OUTPUT:
+            **res_line_fault_sc** (DataFrame) - short-circuit currents indexed by the line and
+            the position
+        """
+        net = self.net
+        if fault not in ["3ph", "2ph"]:
+            raise NotImplementedError(
+                "Only 3ph and 2ph short-circuit currents implemented for faults along lines")
+        line = net.line.index.values if line is None else np.array(line, ndmin=1)
+        missing = ~np.in1d(line, net.line.index.values)
+        if any(missing):
+            raise UserWarning("Lines %s do not exist" % line[missing])
+        positions = np.array(positions, dtype=np.float64, ndmin=1)
+        if any((positions < 0) | (positions > 1)):
+            raise ValueError("The positions along the lines have to be between 0 and 1")
+
+        self._add_options(fault, case, ip, ith)
+        system = self._get_system(case)
+        results = _calc_line_faults(net, system["ppci"], line, positions)
         _clean_up(net, res=False)
-        raise(e)
-    _calc_rx(net, ppci)
-#    t3 = time.perf_counter()
-    _add_kappa_to_ppc(net, ppci)
-#    t4 = time.perf_counter()
-    _calc_ikss(net, ppci)
-    if net["_options"]["ip"]:
-        _calc_ip(net, ppci)
-    if net["_options"]["ith"]:
-        _calc_ith(net, ppci)
-    if net._options["branch_results"]:
-        _calc_branch_currents(net, ppci)
-    ppc = _copy_results_ppci_to_ppc(ppci, ppc, "sc")
-    _extract_results(net, ppc, ppc_0=None)
-    _clean_up(net)
-#    t5 = time.perf_counter()
-#    net._et = {"sum": t5-t0, "model": t1-t0, "ybus": t2-t1, "zbus": t3-t2, "kappa": t4-t3,
-#               "currents": t5-t4}
-
-
-def _calc_sc_1ph(net):
+        columns = ["ikss_ka", "ip_ka", "ith_ka", "ikss_from_ka", "ikss_to_ka"]
+        index = pd.MultiIndex.from_product([line, positions], names=["line", "position"])
+        return pd.DataFrame({c: results[c].ravel() for c in columns if c in results},
+                            index=index, columns=[c for c in columns if c in results])
+
+    def _add_options(self, fault, case, ip, ith, branch_results=False, return_all_currents=False,
+                     branch_chunk_size=None, n_threads=1):
+        """
+        adds the options of a calculation to the net and the kappa factors to the ppci of the
+        case if they are needed
+        """
+        net = self.net
+        if len(net.gen) and (ip or ith):
+            logger.warning("aperiodic and thermal short-circuit currents are only implemented for "
+                           "faults far from generators!")
+
+        if case not in ['max', 'min']:
+            raise ValueError('case can only be "min" or "max" for minimal or maximal short "\
+                                    "circuit current')
+
+        kappa = ith or ip
+        net["_options"] = {}
+        _add_ppc_options(net, calculate_voltage_angles=False, trafo_model="pi",
+                         check_connectivity=False, mode="sc", copy_constraints_to_ppc=False,
+                         r_switch=0.0, init_vm_pu="flat", init_va_degree="flat",
+                         enforce_q_lims=False, recycle=None)
+        _add_sc_options(net, fault=fault, case=case, kappa=kappa, ip=ip, ith=ith,
+                        consider_sgens=False, branch_results=branch_results,
+                        return_all_currents=return_all_currents,
+                        branch_chunk_size=branch_chunk_size, n_threads=n_threads, **self.options)
+        _add_auxiliary_elements(net)
+        system = self._get_system(case)
+        if kappa and not system["kappa"]:
+            # the kappa factors only depend on the positive sequence system of the case
+            _add_kappa_to_ppc(net, system["ppci"])
+            system["kappa"] = True
+
+    def _get_system(self, case, zero_sequence=False):
+        net = self.net
+        if case not in self._systems:
+            ppc, ppci = _build_sc_system(net)
+            self._systems[case] = {"ppc": ppc, "ppci": ppci, "kappa": False,
+                                   "lookups": copy.deepcopy(net._pd2ppc_lookups),
+                                   "is_elements": net._is_elements}
+        system = self._systems[case]
+        if zero_sequence and "ppci_0" not in system:
+            system["ppc_0"], system["ppci_0"] = _build_sc_system(net, zero_sequence=True)
+        net._pd2ppc_lookups = copy.deepcopy(system["lookups"])
+        # the current sources do not change the systems and are selected for each calculation
+        sgen_is = net.sgen.in_service.values.astype(bool) & \
+            np.in1d(net.sgen.bus.values, system["is_elements"]["bus_is_idx"])
+        net._is_elements = dict(system["is_elements"], sgen=sgen_is)
+        return system
+
+
+def _build_sc_system(net, zero_sequence=False):
     """
-    calculation method for single phase to ground short-circuit currents
+    Builds the ppc of the positive or zero sequence system and calculates the bus impedance
+    matrix and the equivalent impedances of the fault buses
     """
-    _add_auxiliary_elements(net)
-# pos. seq bus impedance
-    ppc, ppci = _pd2ppc(net)
+    ppc, ppci = _pd2ppc_zero(net) if zero_sequence else _pd2ppc(net)
     _calc_ybus(ppci)
     try:
-        _calc_zbus(ppci)
+        _calc_zbus(ppci, _get_fault_buses(net))
     except Exception as e:
         _clean_up(net, res=False)
         raise(e)
     _calc_rx(net, ppci)
-    _add_kappa_to_ppc(net, ppci)
-# zero seq bus impedance
-    ppc_0, ppci_0 = _pd2ppc_zero(net)
-    _calc_ybus(ppci_0)
-    try:
-        _calc_zbus(ppci_0)
-    except Exception as e:
-        _clean_up(net, res=False)
-        raise(e)
-    _calc_rx(net, ppci_0)
-    _calc_ikss_1ph(net, ppci, ppci_0)
-    ppc_0 = _copy_results_ppci_to_ppc(ppci_0, ppc_0, "sc")
-    ppc = _copy_results_ppci_to_ppc(ppci, ppc, "sc")
-    _extract_results(net, ppc, ppc_0)
-    _clean_up(net)
+    return ppc, ppci
+
+
+def _get_fault_buses(net):
+    """
+    ppci indices of the faulted buses, None if all buses are faulted
+    """
+    bus = net._options["bus"]
+    if bus is None:
+        return None
+    ppc_buses = net._pd2ppc_lookups["bus"][bus]
+    return np.unique(ppc_buses[ppc_buses >= 0])
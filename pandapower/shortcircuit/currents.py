@@ -4,6 +4,9 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
+import warnings
+from multiprocessing.pool import ThreadPool
+
 import numpy as np
 from pandapower.idx_bus import BASE_KV
 import pandas as pd
@@ -11,6 +14,7 @@ import pandas as pd
 from pandapower.shortcircuit.idx_brch import IKSS_F, IKSS_T, IP_F, IP_T, ITH_F, ITH_T
 from pandapower.shortcircuit.idx_bus import C_MIN, C_MAX, KAPPA, R_EQUIV, IKSS1, IP, ITH, X_EQUIV, IKSS2, IKCV, M
 from pandapower.auxiliary import _sum_by_group
+from pandapower.shortcircuit.impedance import _zbus_dot
 
 
 def _calc_ikss(net, ppc):
@@ -48,6 +52,26 @@ def _calc_ikss_1ph(net, ppc, ppc_0):
 def _current_source_current(net, ppc):
     ppc["bus"][:, IKCV] = 0
     ppc["bus"][:, IKSS2] = 0
+    current_sources = _current_source_injection(net)
+    if current_sources is None:
+        return
+    buses, ikcv_pu = current_sources
+    baseI = ppc["internal"]["baseI"]
+    Zbus = ppc["internal"]["Zbus"]
+    fault_buses = ppc["internal"]["fault_buses"]
+    ppc["bus"][buses, IKCV] = ikcv_pu
+    # Zbus is symmetric, the columns of the fault buses are also their rows
+    z_diag = Zbus[fault_buses, np.arange(len(fault_buses))]
+    ppc["bus"][fault_buses, IKSS2] = abs(
+        1 / z_diag * np.dot(Zbus.T, ppc["bus"][:, IKCV] * -1j) / baseI[fault_buses])
+    ppc["bus"][buses, IKCV] /= baseI[buses]
+
+
+def _current_source_injection(net):
+    """
+    ppc buses and currents (in per unit) of the static generators which are considered as
+    current sources, None if there are no current sources
+    """
     bus_lookup = net["_pd2ppc_lookups"]["bus"]
     if not "motor" in net.sgen.type.values:
         sgen = net.sgen[net._is_elements["sgen"]]
@@ -55,20 +79,14 @@ def _current_source_current(net, ppc):
         sgen = net.sgen[(net._is_elements["sgen"]) &
                         (net.sgen.type != "motor")]
     if len(sgen) == 0:
-        return
+        return None
     if any(pd.isnull(sgen.sn_kva)):
         raise UserWarning(
             "sn_kva needs to be specified for all sgens in net.sgen.sn_kva")
-    baseI = ppc["internal"]["baseI"]
-    sgen_buses = sgen.bus.values
-    sgen_buses_ppc = bus_lookup[sgen_buses]
-    Zbus = ppc["internal"]["Zbus"]
+    sgen_buses_ppc = bus_lookup[sgen.bus.values]
     i_sgen_pu = sgen.sn_kva.values / net.sn_kva * sgen.k.values
     buses, ikcv_pu, _ = _sum_by_group(sgen_buses_ppc, i_sgen_pu, i_sgen_pu)
-    ppc["bus"][buses, IKCV] = ikcv_pu
-    ppc["bus"][:, IKSS2] = abs(
-        1 / np.diag(Zbus) * np.dot(Zbus, ppc["bus"][:, IKCV] * -1j) / baseI)
-    ppc["bus"][buses, IKCV] /= baseI[buses]
+    return buses, ikcv_pu
 
 
 def _calc_ip(net, ppc):
@@ -78,70 +96,142 @@ def _calc_ip(net, ppc):
 
 
 def _calc_ith(net, ppc):
-    tk_s = net["_options"]["tk_s"]
-    kappa = ppc["bus"][:, KAPPA]
-    f = 50
     n = 1
-    m = (np.exp(4 * f * tk_s * np.log(kappa - 1)) - 1) / \
-        (2 * f * tk_s * np.log(kappa - 1))
-    m[np.where(kappa > 1.99)] = 0
+    m = _ith_factor_m(ppc["bus"][:, KAPPA], net["_options"]["tk_s"])
     ppc["bus"][:, M] = m
     ith = (ppc["bus"][:, IKSS1] + ppc["bus"][:, IKSS2]) * np.sqrt(m + n)
     ppc["bus"][:, ITH] = ith
 
 
+def _ith_factor_m(kappa, tk_s):
+    """
+    factor m of the thermal equivalent short-circuit current for the peak factors kappa
+    """
+    f = 50
+    m = (np.exp(4 * f * tk_s * np.log(kappa - 1)) - 1) / \
+        (2 * f * tk_s * np.log(kappa - 1))
+    with np.errstate(invalid="ignore"):
+        # kappa is nan for the buses which are not faulted
+        m[np.where(kappa > 1.99)] = 0
+    return m
+
+
 def _calc_branch_currents(net, ppc):
+    """
+    Calculates the branch currents of all faults and stores the maximum / minimum over the
+    faults in ppc["branch"]. The faults are processed in chunks of fault buses, so that only
+    the branch currents of one chunk are in memory at the same time. If return_all_currents is
+    set, the currents of all faults are kept in ppc["internal"]["branch_currents"] with one
+    column for each fault bus.
+    """
     case = net._options["case"]
-    Zbus = ppc["internal"]["Zbus"]
-    Yf = ppc["internal"]["Yf"]
-    Yt = ppc["internal"]["Yf"]
+    return_all_currents = net._options["return_all_currents"]
+    fault_buses = ppc["internal"]["fault_buses"]
     baseI = ppc["internal"]["baseI"]
-    n = ppc["bus"].shape[0]
     fb = np.real(ppc["branch"][:, 0]).astype(int)
     tb = np.real(ppc["branch"][:, 1]).astype(int)
-    minmax = np.nanmin if case == "min" else np.nanmax
-    # calculate voltage source branch current
-    V_ikss = (ppc["bus"][:, IKSS1] * baseI) * Zbus
-    ikss1_all_f = np.conj(Yf.dot(V_ikss))
-    ikss1_all_t = np.conj(Yt.dot(V_ikss))
-    ikss1_all_f[abs(ikss1_all_f) < 1e-10] = np.nan
-    ikss1_all_t[abs(ikss1_all_t) < 1e-10] = np.nan
+    n_branch, n_fault = ppc["branch"].shape[0], len(fault_buses)
 
-    # add current source branch current if there is one
+    quantities = ["ikss"] + [q for q in ["ip", "ith"] if net._options[q]]
+    columns = {"ikss": (IKSS_F, IKSS_T), "ip": (IP_F, IP_T), "ith": (ITH_F, ITH_T)}
+    # voltages caused by the current sources, the same for all faults
     current_sources = any(ppc["bus"][:, IKCV]) > 0
-    if current_sources:
-        current = np.tile(-ppc["bus"][:, IKCV], (n, 1))
-        np.fill_diagonal(current, current.diagonal() + ppc["bus"][:, IKSS2])
-        V = np.dot((current * baseI), Zbus).T
-        fb = np.real(ppc["branch"][:, 0]).astype(int)
-        tb = np.real(ppc["branch"][:, 1]).astype(int)
-        ikss2_all_f = np.conj(Yf.dot(V))
-        ikss2_all_t = np.conj(Yt.dot(V))
-        ikss_all_f = abs(ikss1_all_f + ikss2_all_f)
-        ikss_all_t = abs(ikss1_all_t + ikss2_all_t)
+    v_kcv = _zbus_dot(ppc, ppc["bus"][:, IKCV] * baseI) if current_sources else None
+
+    chunk_size = _branch_chunk_size(net._options["branch_chunk_size"], ppc["bus"].shape[0],
+                                    n_branch)
+    chunks = [slice(i, min(i + chunk_size, n_fault)) for i in range(0, n_fault, chunk_size)]
+    if return_all_currents:
+        all_currents = {(q, side): np.empty((n_branch, n_fault)) for q in quantities
+                        for side in ["f", "t"]}
+
+    def branch_currents(chunk):
+        currents = _branch_currents_of_faults(net, ppc, chunk, v_kcv)
+        if return_all_currents:
+            for key, current in currents.items():
+                all_currents[key][:, chunk] = current
+        minmax = np.nanmin if case == "min" else np.nanmax
+        with warnings.catch_warnings():
+            # branches which do not carry current for any fault of the chunk
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return {key: minmax(current, axis=1) for key, current in currents.items()}
+
+    n_threads = net._options["n_threads"]
+    if n_threads > 1 and len(chunks) > 1:
+        # the sparse matrix products and the array operations release the GIL
+        pool = ThreadPool(min(n_threads, len(chunks)))
+        try:
+            chunk_results = pool.map(branch_currents, chunks)
+        finally:
+            pool.close()
     else:
-        ikss_all_f = abs(ikss1_all_f)
-        ikss_all_t = abs(ikss1_all_t)
+        chunk_results = [branch_currents(chunk) for chunk in chunks]
+
+    combine = np.fmin if case == "min" else np.fmax
+    for q in quantities:
+        for side, col, bus in [("f", columns[q][0], fb), ("t", columns[q][1], tb)]:
+            extreme = np.full(n_branch, np.nan)
+            for result in chunk_results:
+                extreme = combine(extreme, result[(q, side)])
+            ppc["branch"][:, col] = extreme / baseI[bus]
+            if return_all_currents:
+                all_currents[(q, side)] /= baseI[bus][:, np.newaxis]
+    if return_all_currents:
+        ppc["internal"]["branch_currents"] = all_currents
+
+
+def _branch_chunk_size(chunk_size, n_bus, n_branch, chunk_memory=2**24):
+    """
+    Number of fault buses processed at once. By default, the complex voltage and current
+    arrays of a chunk take about chunk_memory bytes.
+    """
+    if chunk_size is not None:
+        return max(int(chunk_size), 1)
+    return max(int(chunk_memory / (16 * (n_bus + 2 * n_branch))), 1)
+
+
+def _branch_currents_of_faults(net, ppc, chunk, v_kcv):
+    """
+    Branch currents at the from and to buses of all branches for the faults at the fault buses
+    of the chunk (in kA, one column for each fault)
+    """
+    Zbus = ppc["internal"]["Zbus"][:, chunk]
+    buses = ppc["internal"]["fault_buses"][chunk]
+    Yf = ppc["internal"]["Yf"]
+    Yt = ppc["internal"]["Yt"]
+    baseI = ppc["internal"]["baseI"]
+    # calculate voltage source branch current, column j is the fault at the j-th bus
+    V_ikss = (ppc["bus"][buses, IKSS1] * baseI[buses]) * Zbus
+    ikss1_f = np.conj(Yf.dot(V_ikss))
+    ikss1_t = np.conj(Yt.dot(V_ikss))
+    ikss1_f[abs(ikss1_f) < 1e-10] = np.nan
+    ikss1_t[abs(ikss1_t) < 1e-10] = np.nan
 
-    ppc["branch"][:, IKSS_F] = minmax(ikss_all_f, axis=1) / baseI[fb]
-    ppc["branch"][:, IKSS_T] = minmax(ikss_all_t, axis=1) / baseI[tb]
+    # add current source branch current if there is one
+    if v_kcv is not None:
+        # V = Zbus * (ikss2 at the fault bus - ikcv of the current sources) for each fault
+        V = (ppc["bus"][buses, IKSS2] * baseI[buses]) * Zbus - v_kcv[:, np.newaxis]
+        ikss2_f = np.conj(Yf.dot(V))
+        ikss2_t = np.conj(Yt.dot(V))
+        ikss_f = abs(ikss1_f + ikss2_f)
+        ikss_t = abs(ikss1_t + ikss2_t)
+    else:
+        ikss_f = abs(ikss1_f)
+        ikss_t = abs(ikss1_t)
+    currents = {("ikss", "f"): ikss_f, ("ikss", "t"): ikss_t}
 
     if net._options["ip"]:
-        kappa = ppc["bus"][:, KAPPA]
-        if current_sources:
-            ip_all_f = np.sqrt(2) * (ikss1_all_f * kappa + ikss2_all_f)
-            ip_all_t = np.sqrt(2) * (ikss1_all_t * kappa + ikss2_all_t)
+        kappa = ppc["bus"][buses, KAPPA]
+        if v_kcv is not None:
+            currents[("ip", "f")] = abs(np.sqrt(2) * (ikss1_f * kappa + ikss2_f))
+            currents[("ip", "t")] = abs(np.sqrt(2) * (ikss1_t * kappa + ikss2_t))
         else:
-            ip_all_f = np.sqrt(2) * ikss1_all_f * kappa
-            ip_all_t = np.sqrt(2) * ikss1_all_t * kappa
-
-        ppc["branch"][:, IP_F] = minmax(abs(ip_all_f), axis=1) / baseI[fb]
-        ppc["branch"][:, IP_T] = minmax(abs(ip_all_t), axis=1) / baseI[tb]
+            currents[("ip", "f")] = abs(np.sqrt(2) * ikss1_f * kappa)
+            currents[("ip", "t")] = abs(np.sqrt(2) * ikss1_t * kappa)
 
     if net._options["ith"]:
         n = 1
-        m = ppc["bus"][:, M]
-        ith_all_f = ikss_all_f * np.sqrt(m + n)
-        ith_all_t = ikss_all_t * np.sqrt(m + n)
-        ppc["branch"][:, ITH_F] = minmax(ith_all_f, axis=1) / baseI[fb]
-        ppc["branch"][:, ITH_T] = minmax(ith_all_t, axis=1) / baseI[fb]
+        m = ppc["bus"][buses, M]
+        currents[("ith", "f")] = ikss_f * np.sqrt(m + n)
+        currents[("ith", "t")] = ikss_t * np.sqrt(m + n)
+    return currents
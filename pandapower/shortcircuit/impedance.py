@@ -7,7 +7,7 @@
 import warnings
 
 import numpy as np
-from scipy.sparse.linalg import inv as inv_sparse
+from scipy.sparse.linalg import inv as inv_sparse, splu
 from scipy.linalg import inv
 
 
@@ -19,17 +19,42 @@ except ImportError:
     from pandapower.pf.makeYbus_pypower import makeYbus
 
 
+class _SparseLU(object):
+    """
+    Sparse LU factorization of a matrix which can be copied and pickled with the net. The
+    factorization itself (a SuperLU object) cannot, it is dropped on copies and calculated again
+    on the first solve.
+    """
+    def __init__(self, A):
+        self.A = A.tocsc()
+        self.shape = self.A.shape
+        self._lu = splu(self.A)
+
+    def solve(self, b):
+        if self._lu is None:
+            self._lu = splu(self.A)
+        return self._lu.solve(b)
+
+    def __getstate__(self):
+        return dict(self.__dict__, _lu=None)
+
+
 def _calc_rx(net, ppc):
     Zbus = ppc["internal"]["Zbus"]
+    fault_buses = ppc["internal"]["fault_buses"]
+    # entries of the fault buses on the diagonal of Zbus
+    diagonal = (fault_buses, np.arange(len(fault_buses)))
     r_fault = net["_options"]["r_fault_ohm"]
     x_fault = net["_options"]["x_fault_ohm"]
     if r_fault > 0 or x_fault > 0:
-        base_r = np.square(ppc["bus"][:, BASE_KV]) / ppc["baseMVA"]
+        base_r = np.square(ppc["bus"][fault_buses, BASE_KV]) / ppc["baseMVA"]
         fault_impedance = (r_fault + x_fault * 1j) / base_r
-        np.fill_diagonal(Zbus, Zbus.diagonal() + fault_impedance)
-    z_equiv = np.diag(Zbus)
-    ppc["bus"][:, R_EQUIV] = z_equiv.real
-    ppc["bus"][:, X_EQUIV] = z_equiv.imag
+        Zbus[diagonal] += fault_impedance
+        ppc["internal"]["fault_impedance"] = fault_impedance
+    z_equiv = Zbus[diagonal]
+    ppc["bus"][:, [R_EQUIV, X_EQUIV]] = np.nan
+    ppc["bus"][fault_buses, R_EQUIV] = z_equiv.real
+    ppc["bus"][fault_buses, X_EQUIV] = z_equiv.imag
 
 def _calc_ybus(ppc):
     Ybus, Yf, Yt = makeYbus(ppc["baseMVA"], ppc["bus"],  ppc["branch"])
@@ -37,12 +62,81 @@ def _calc_ybus(ppc):
     ppc["internal"]["Yt"] = Yt
     ppc["internal"]["Ybus"] = Ybus
 
-def _calc_zbus(ppc):
+def _calc_zbus(ppc, fault_buses=None):
+    """
+    Calculates the columns of the bus impedance matrix Zbus = Ybus^-1 for the fault buses (ppci
+    indices, all buses if None). Zbus is symmetric, so that the columns are also the rows of the
+    fault buses. If only a subset of the buses is faulted, the columns are calculated with a
+    sparse LU factorization of Ybus, which is kept in ppc["internal"]["Ybus_lu"] for further
+    solves with Ybus.
+    """
     Ybus = ppc["internal"]["Ybus"]
-    sparsity = Ybus.nnz / Ybus.shape[0]**2
-    if sparsity < 0.002:
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            ppc["internal"]["Zbus"] = inv_sparse(Ybus).toarray()
-    else:
-        ppc["internal"]["Zbus"] = inv(Ybus.toarray())
+    n_bus = Ybus.shape[0]
+    ppc["internal"].pop("Ybus_lu", None)
+    ppc["internal"].pop("fault_impedance", None)
+    if fault_buses is None or len(fault_buses) == n_bus:
+        ppc["internal"]["fault_buses"] = np.arange(n_bus)
+        sparsity = Ybus.nnz / Ybus.shape[0]**2
+        if sparsity < 0.002:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ppc["internal"]["Zbus"] = inv_sparse(Ybus).toarray()
+        else:
+            ppc["internal"]["Zbus"] = inv(Ybus.toarray())
+        return
+    fault_buses = np.asarray(fault_buses, dtype=np.int64)
+    lu = _SparseLU(Ybus)
+    unit_columns = np.zeros((n_bus, len(fault_buses)), dtype=np.complex128)
+    unit_columns[fault_buses, np.arange(len(fault_buses))] = 1.
+    ppc["internal"]["fault_buses"] = fault_buses
+    ppc["internal"]["Ybus_lu"] = lu
+    ppc["internal"]["Zbus"] = lu.solve(unit_columns)
+
+
+def _zbus_dot(ppc, x):
+    """
+    Returns Zbus * x for all buses, including the fault impedances on the diagonal of Zbus.
+    """
+    if "Ybus_lu" not in ppc["internal"]:
+        return np.dot(ppc["internal"]["Zbus"], x)
+    zx = ppc["internal"]["Ybus_lu"].solve(x.astype(np.complex128))
+    if "fault_impedance" in ppc["internal"]:
+        fault_buses = ppc["internal"]["fault_buses"]
+        zx[fault_buses] += ppc["internal"]["fault_impedance"] * x[fault_buses]
+    return zx
+
+
+def _zbus_entries(ppc, rows, columns):
+    """
+    Returns the entries Zbus[rows, columns] of the bus impedance matrix without the fault
+    impedances. If the full Zbus is not available, the needed columns are solved with a sparse
+    LU factorization of Ybus.
+    """
+    internal = ppc["internal"]
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = np.asarray(columns, dtype=np.int64)
+    if "Ybus_lu" in internal:
+        return _inverse_entries(internal["Ybus_lu"], rows, columns)
+    z = internal["Zbus"][rows, columns]
+    if "fault_impedance" in internal:
+        diagonal = rows == columns
+        z[diagonal] -= internal["fault_impedance"][rows[diagonal]]
+    return z
+
+
+def _inverse_entries(lu, rows, columns, chunk_size=256):
+    """
+    Returns the entries [rows, columns] of the inverse of the matrix factorized in lu. The
+    columns of the inverse are solved in chunks of chunk_size columns.
+    """
+    n_bus = lu.shape[0]
+    entries = np.empty(len(rows), dtype=np.complex128)
+    unique_columns, column_position = np.unique(columns, return_inverse=True)
+    for start in range(0, len(unique_columns), chunk_size):
+        chunk = unique_columns[start:start + chunk_size]
+        unit_columns = np.zeros((n_bus, len(chunk)), dtype=np.complex128)
+        unit_columns[chunk, np.arange(len(chunk))] = 1.
+        inverse_columns = lu.solve(unit_columns)
+        in_chunk = (column_position >= start) & (column_position < start + len(chunk))
+        entries[in_chunk] = inverse_columns[rows[in_chunk], column_position[in_chunk] - start]
+    return entries
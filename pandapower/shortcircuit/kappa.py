@@ -5,8 +5,15 @@
 
 
 import copy
+try:
+    import pplog as logging
+except ImportError:
+    import logging
+
 import networkx as nx
 import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, shortest_path
 
 from pandapower.idx_brch import F_BUS, T_BUS, BR_R, BR_X
 from pandapower.idx_bus import BUS_I, GS, BS, BASE_KV
@@ -14,6 +21,8 @@ from pandapower.idx_bus import BUS_I, GS, BS, BASE_KV
 from pandapower.shortcircuit.idx_bus import KAPPA, R_EQUIV, X_EQUIV
 from pandapower.shortcircuit.impedance import _calc_ybus, _calc_zbus, _calc_rx
 
+logger = logging.getLogger(__name__)
+
 def _add_kappa_to_ppc(net, ppc):
     if not net._options["kappa"]:
         return
@@ -36,7 +45,9 @@ def _kappa_method_c(net, ppc):
         fc = 24
     else:
         raise ValueError("Frequency has to be 50 Hz or 60 Hz according to the standard")
-    ppc_c = copy.deepcopy(ppc)
+    # the matrices in ppc["internal"] are calculated again for ppc_c
+    ppc_c = {key: copy.deepcopy(value) for key, value in ppc.items() if key != "internal"}
+    ppc_c["internal"] = {}
     ppc_c["branch"][:, BR_X] *= fc / net.f_hz
 
     zero_conductance = np.where(ppc["bus"][:,GS] == 0)
@@ -48,7 +59,9 @@ def _kappa_method_c(net, ppc):
     ppc_c["bus"][conductance, GS] = y_shunt.real[0]
     ppc_c["bus"][conductance, BS] = y_shunt.imag[0]
     _calc_ybus(ppc_c)
-    _calc_zbus(ppc_c)
+    # kept for the faults along lines, see _calc_line_faults
+    ppc["internal"]["Ybus_c"] = ppc_c["internal"]["Ybus"]
+    _calc_zbus(ppc_c, ppc["internal"]["fault_buses"])
     _calc_rx(net, ppc_c)
     rx_equiv_c = ppc_c["bus"][:, R_EQUIV] / ppc_c["bus"][:, X_EQUIV] * fc / net.f_hz
     return _kappa(rx_equiv_c)
@@ -68,21 +81,221 @@ def _kappa_method_b(net, ppc):
     else:
         kappa_korr = np.full(ppc["bus"].shape[0], 1.)
     if topology == "auto":
-        kappa_korr = np.full(ppc["bus"].shape[0], 1.)
-        mg = nxgraph_from_ppc(net, ppc)
-        for bidx in ppc["bus"][:, BUS_I].astype(int):
-            paths = list(nx.all_simple_paths(mg, bidx, "earth"))
-            if len(paths) > 1:
-                kappa_korr[bidx] = 1.15
-                for path in paths:
-                    r = sum([mg[b1][b2][0]["r"] for b1, b2 in zip(path, path[1:])])
-                    x = sum([mg[b1][b2][0]["x"] for b1, b2 in zip(path, path[1:])])
-                    if r / x < .3:
-                        kappa_korr[bidx] = 1.
-                        break
+        kappa_korr = _kappa_korr_auto(net, ppc)
     rx_equiv = ppc["bus"][:, R_EQUIV] / ppc["bus"][:, X_EQUIV]
     return np.clip(kappa_korr * _kappa(rx_equiv), 1, kappa_max)
 
+def _kappa_korr_auto(net, ppc):
+    """
+    Correction factor of method B for the topology "auto": 1.15 for the buses which are supplied
+    over multiple paths if the R/X ratio of all paths to the voltage sources is at least 0.3, 1
+    otherwise.
+
+    Instead of searching all paths for each bus, the network is decomposed into its biconnected
+    blocks. A bus is supplied over multiple paths if a block between the bus and the voltage
+    sources is not a single branch. The minimum of R - 0.3 * X over all paths of a bus is the sum
+    of the minima within the blocks on the way to the voltage sources, which are bounded with
+    shortest path searches in each block. Only for the buses for which these bounds do not decide
+    the criterion, a path with R/X < 0.3 is searched.
+    """
+    fault_buses = ppc["internal"]["fault_buses"]
+    kappa_korr = np.full(ppc["bus"].shape[0], 1.)
+    f, t, r, x, multiple = _graph_edges_to_earth(net, ppc)
+    n_nodes = ppc["bus"].shape[0] + 1
+    earth = n_nodes - 1
+    w = r - .3 * x
+
+    dist = shortest_path(_undirected_graph(f, t, np.ones(len(f)), n_nodes), unweighted=True,
+                         indices=earth)
+    blocks = []
+    graph = nx.Graph()
+    graph.add_edges_from(zip(f, t))
+    edge_codes = f * n_nodes + t
+    for block in nx.biconnected_component_edges(graph):
+        block = np.array(block)
+        nodes = np.unique(block)
+        if np.isinf(dist[nodes[0]]):
+            continue
+        edges = np.searchsorted(edge_codes, block.min(axis=1) * n_nodes + block.max(axis=1))
+        blocks.append((dist[nodes].min(), nodes[np.argmin(dist[nodes])], nodes, edges))
+
+    # lower and upper bound of the minimum of R - 0.3 * X over all paths from the bus to earth
+    # and if the bus is supplied over multiple paths. The blocks are processed from earth on, so
+    # that the values of the node over which a block is supplied are always known.
+    lower = np.full(n_nodes, np.nan)
+    upper = np.full(n_nodes, np.nan)
+    meshed = np.zeros(n_nodes, dtype=bool)
+    lower[earth] = upper[earth] = 0.
+    for _, supply, nodes, edges in sorted(blocks, key=lambda block: block[0]):
+        fed = nodes != supply
+        if len(edges) == 1:
+            lower_block = upper_block = w[edges]
+            meshed[nodes[fed]] = meshed[supply] or multiple[edges[0]]
+        else:
+            lower_block, upper_block = _block_bounds(nodes, f[edges], t[edges], w[edges], supply)
+            lower_block, upper_block = lower_block[fed], upper_block[fed]
+            meshed[nodes[fed]] = True
+        lower[nodes[fed]] = lower_block + lower[supply]
+        upper[nodes[fed]] = upper_block + upper[supply]
+
+    is_fault = np.zeros(n_nodes, dtype=bool)
+    is_fault[fault_buses] = True
+    with np.errstate(invalid="ignore"):
+        # the bounds are nan for the buses which are not connected to a voltage source
+        kappa_korr[(is_fault & meshed & (lower >= 0))[:-1]] = 1.15
+        undecided = np.flatnonzero(is_fault & meshed & (lower < 0) & (upper >= 0))
+    if len(undecided):
+        graph = _undirected_graph(f, t, w, n_nodes)
+        # the path searches can take exponential time in large meshed blocks with edges of
+        # negative and of positive weight, so that the number of search steps is limited
+        steps_left = 100 * n_nodes
+        not_found = 0
+        for bidx in undecided:
+            found, steps = _negative_path_exists(graph, lower, bidx, earth, steps_left)
+            steps_left -= steps
+            kappa_korr[bidx] = 1. if found else 1.15
+            not_found += found is None
+        if not_found:
+            logger.warning("the search for a path with R/X < 0.3 was stopped for %u buses, the "
+                           "correction factor 1.15 is used for these buses" % not_found)
+    return kappa_korr
+
+def _negative_path_exists(graph, lower, start, target, max_steps):
+    """
+    Depth first search for a path from start to target with a negative sum of the edge weights.
+    Branches for which the lower bound of the remaining path cannot give a negative sum are
+    skipped. Returns the result, which is None if the search is stopped after max_steps steps,
+    and the number of steps.
+    """
+    indptr, indices, weights = graph.indptr, graph.indices, graph.data
+    visited = np.zeros(graph.shape[0], dtype=bool)
+    visited[start] = True
+    path = [start]
+
+    def candidates(node, partial):
+        neighbors = indices[indptr[node]:indptr[node + 1]]
+        sums = partial + weights[indptr[node]:indptr[node + 1]]
+        with np.errstate(invalid="ignore"):
+            promising = ~visited[neighbors] & (sums + lower[neighbors] < 0)
+        order = np.argsort(-(sums + lower[neighbors])[promising])
+        return list(zip(neighbors[promising][order], sums[promising][order]))
+
+    # candidates of each node on the path: next nodes and partial sums, best candidate last
+    stack = [candidates(start, 0.)]
+    for step in range(max_steps):
+        if not stack:
+            return False, step
+        if not stack[-1]:
+            stack.pop()
+            visited[path.pop()] = False
+            continue
+        node, partial = stack[-1].pop()
+        if node == target:
+            return True, step
+        visited[node] = True
+        path.append(node)
+        stack.append(candidates(node, partial))
+    return None, max_steps
+
+def _graph_edges_to_earth(net, ppc):
+    """
+    Edges of the graph of nxgraph_from_ppc without parallel edges, sorted by their nodes. Like
+    in the path search of nxgraph_from_ppc, r and x of parallel edges are the values of the first
+    edge. *multiple* is True for the edges which stand for several parallel edges.
+    """
+    n_bus = ppc["bus"].shape[0]
+    bus_lookup = net._pd2ppc_lookups["bus"]
+    vs_buses_pp = list(set(net["ext_grid"][net._is_elements["ext_grid"]].bus.values) |
+                       set(net["gen"][net._is_elements["gen"]].bus))
+    vs_buses = bus_lookup[vs_buses_pp].astype(np.int64)
+    z = 1 / (ppc["bus"][vs_buses, GS] + ppc["bus"][vs_buses, BS] * 1j)
+    branch = ppc["branch"].real
+    f = np.concatenate((branch[:, F_BUS].astype(np.int64), vs_buses))
+    t = np.concatenate((branch[:, T_BUS].astype(np.int64), np.full(len(vs_buses), n_bus)))
+    r = np.concatenate((branch[:, BR_R], z.real))
+    x = np.concatenate((branch[:, BR_X], z.imag))
+    # self loops are not part of any path
+    loops = f == t
+    f, t, r, x = f[~loops], t[~loops], r[~loops], x[~loops]
+    f, t = np.minimum(f, t), np.maximum(f, t)
+    _, first, count = np.unique(f * (n_bus + 1) + t, return_index=True, return_counts=True)
+    return f[first], t[first], r[first], x[first], count > 1
+
+def _undirected_graph(f, t, weight, n_nodes):
+    # explicitly stored zero weights are edges for the csgraph routines
+    return csr_matrix((np.concatenate((weight, weight)), (np.concatenate((f, t)),
+                                                           np.concatenate((t, f)))),
+                      shape=(n_nodes, n_nodes))
+
+def _block_bounds(nodes, f, t, w, supply, max_negative_edges=10):
+    """
+    Lower and upper bound of the minimum of w over all paths within a block from each node of
+    the block to the node *supply*. If there are no negative weights, both bounds are the
+    shortest path distance.
+    """
+    f, t = np.searchsorted(nodes, f), np.searchsorted(nodes, t)
+    source = np.searchsorted(nodes, supply)
+    negative = w < 0
+    positive_graph = _undirected_graph(f, t, np.where(negative, 0., w), len(nodes))
+    distance, predecessors = dijkstra(positive_graph, indices=source, return_predecessors=True)
+    if not any(negative):
+        return distance, distance
+    if np.sum(negative) <= max_negative_edges:
+        lower = _negative_edge_lower_bound(f, t, w, source, len(nodes))
+    else:
+        # a path uses each edge at most once
+        lower = distance + w[negative].sum()
+    # the weights of the shortest path trees are the weights of existing paths
+    weight_graph = _undirected_graph(f, t, w, len(nodes))
+    upper = _path_weights(weight_graph, predecessors, source)
+    _, predecessors = dijkstra(_undirected_graph(f, t, abs(w), len(nodes)), indices=source,
+                               return_predecessors=True)
+    upper = np.minimum(upper, _path_weights(weight_graph, predecessors, source))
+    return lower, upper
+
+def _negative_edge_lower_bound(f, t, w, source, n_nodes):
+    """
+    Each path consists of sections without negative weights and of distinct edges with negative
+    weight. The sum of the shortest distances between these edges without using negative edges
+    and of the negative weights is minimized over all sequences of distinct negative edges.
+    """
+    negative = np.flatnonzero(w < 0)
+    k = len(negative)
+    positive = w >= 0
+    ends = np.concatenate((f[negative], t[negative]))
+    distance = dijkstra(_undirected_graph(f[positive], t[positive], w[positive], n_nodes),
+                        indices=np.append(ends, source))
+    # crossing negative edge j from the end j + k * side to the end j + k * (1 - side)
+    crossings = [(j, j + k * side, j + k * (1 - side)) for j in range(k) for side in range(2)]
+    # minimum from the end p of a crossed negative edge to the source if the edges in the
+    # bit set s have been crossed already
+    remaining = np.empty((2 ** k, 2 * k))
+    for s in range(2 ** k - 1, 0, -1):
+        remaining[s] = distance[-1, ends]
+        for j, start, end in crossings:
+            if not s & (1 << j):
+                remaining[s] = np.minimum(remaining[s], distance[start, ends] + w[negative[j]] +
+                                          remaining[s | (1 << j), end])
+    lower = distance[-1].copy()
+    for j, start, end in crossings:
+        lower = np.minimum(lower, distance[start] + w[negative[j]] + remaining[1 << j, end])
+    return lower
+
+def _path_weights(weight_graph, predecessors, source):
+    """
+    Sum of the weights along the paths of a shortest path tree from each node to the source
+    """
+    ancestor = predecessors.copy()
+    ancestor[source] = source
+    nodes = np.arange(len(ancestor))
+    weight = np.asarray(weight_graph[nodes, ancestor]).ravel()
+    weight[source] = 0.
+    # pointer jumping: weight is the sum up to the ancestor, which is doubled in each step
+    while np.any(ancestor != source):
+        weight = weight + weight[ancestor]
+        ancestor = ancestor[ancestor]
+    return weight
+
 def nxgraph_from_ppc(net, ppc):
     bus_lookup = net._pd2ppc_lookups["bus"]
     mg = nx.MultiGraph()
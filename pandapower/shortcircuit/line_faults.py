@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import numpy as np
+from scipy.sparse.linalg import splu
+
+from pandapower.idx_brch import F_BUS, T_BUS, BR_R, BR_X
+from pandapower.idx_bus import BASE_KV
+from pandapower.shortcircuit.currents import _current_source_injection, _ith_factor_m
+from pandapower.shortcircuit.idx_bus import C_MIN, C_MAX
+from pandapower.shortcircuit.impedance import _zbus_entries, _inverse_entries, _zbus_dot
+from pandapower.shortcircuit.kappa import _kappa
+
+
+def _calc_line_faults(net, ppci, line, positions):
+    """
+    Calculates the short-circuit currents of faults at the relative positions along the lines
+    without changing the network.
+
+    A fault at the position x of a line between the buses i and j adds a bus p, which splits the
+    line impedance z into x * z and (1 - x) * z. Since the lines do not have shunt admittances in
+    the short-circuit calculation, injecting a current at p is the same as injecting (1 - x) of
+    it at i and x of it at j. Therefore, the impedance at the fault position is
+
+        Z_pp = (1 - x)**2 * Z_ii + x**2 * Z_jj + 2 * x * (1 - x) * Z_ij + x * (1 - x) * z
+
+    and only the entries of Zbus at the buses of the lines are needed.
+
+    Returns a dictionary of arrays with one row for each line and one column for each position.
+    The currents flowing into the fault from the from bus and the to bus side of the line are
+    returned as "ikss_from_ka" and "ikss_to_ka".
+    """
+    fault = net._options["fault"]
+    case = net._options["case"]
+    n_lines, n_positions = len(line), len(positions)
+    x = np.asarray(positions, dtype=np.float64)[np.newaxis, :]
+
+    # rows of the lines in the ppci, lines which are not in the ppci do not have results
+    f, _ = net._pd2ppc_lookups["branch"]["line"]
+    ppc_rows = f + net.line.index.get_indexer(line)
+    branch_is = ppci["internal"]["branch_is"]
+    in_ppci = branch_is[ppc_rows]
+    ppci_rows = (np.cumsum(branch_is) - 1)[ppc_rows[in_ppci]]
+    branch = ppci["branch"][ppci_rows]
+    fb = np.real(branch[:, F_BUS]).astype(np.int64)
+    tb = np.real(branch[:, T_BUS]).astype(np.int64)
+    z_line = (np.real(branch[:, BR_R]) + 1j * np.real(branch[:, BR_X]))[:, np.newaxis]
+
+    z_entries = _zbus_entries(ppci, np.r_[fb, tb, fb], np.r_[fb, tb, tb]).reshape(3, -1, 1)
+    z_pp = _fault_position_impedance(z_entries, z_line, x)
+    base_r = np.square(ppci["bus"][fb, BASE_KV]) / ppci["baseMVA"]
+    r_fault, x_fault = net._options["r_fault_ohm"], net._options["x_fault_ohm"]
+    z_equiv = z_pp + ((r_fault + x_fault * 1j) / base_r)[:, np.newaxis]
+
+    c = ppci["bus"][fb, C_MIN if case == "min" else C_MAX][:, np.newaxis]
+    base_kv = ppci["bus"][fb, BASE_KV][:, np.newaxis]
+    baseI = base_kv * np.sqrt(3) / ppci["baseMVA"]
+    if fault == "3ph":
+        ikss1 = c / abs(z_equiv) / base_kv / np.sqrt(3) * ppci["baseMVA"]
+    else:
+        ikss1 = c / abs(z_equiv) / base_kv / 2 * ppci["baseMVA"]
+
+    # currents of the current sources and the bus voltages which they cause
+    current_sources = _current_source_injection(net)
+    ikss2 = np.zeros_like(ikss1)
+    if current_sources is not None:
+        ikcv = np.zeros(ppci["bus"].shape[0], dtype=np.complex128)
+        ikcv[current_sources[0]] = current_sources[1]
+        v_kcv = _zbus_dot(ppci, ikcv)
+        if "fault_impedance" in ppci["internal"]:
+            fault_buses = ppci["internal"]["fault_buses"]
+            v_kcv[fault_buses] -= ppci["internal"]["fault_impedance"] * ikcv[fault_buses]
+        v_kcv_f, v_kcv_t = v_kcv[fb][:, np.newaxis], v_kcv[tb][:, np.newaxis]
+        ikss2 = abs(1 / z_equiv * ((1 - x) * v_kcv_f + x * v_kcv_t) * -1j) / baseI
+
+    # currents from both sides of the line into the fault: the current of the line segment
+    # between the fault and the bus i is (V_j - V_i) / z + (1 - x) * I_fault
+    z_ii, z_jj, z_ij = z_entries
+    dv_pu = (1 - x) * (z_ij - z_ii) + x * (z_jj - z_ij)
+    i_fault = (ikss1 + ikss2) * baseI
+    i_from = i_fault * (dv_pu / z_line + 1 - x)
+    i_to = i_fault * (x - dv_pu / z_line)
+    if current_sources is not None:
+        i_from -= (v_kcv_t - v_kcv_f) / z_line
+        i_to += (v_kcv_t - v_kcv_f) / z_line
+
+    results = {"ikss_ka": ikss1 + ikss2, "ikss_from_ka": abs(i_from) / baseI,
+               "ikss_to_ka": abs(i_to) / baseI}
+    if net._options["ip"] or net._options["ith"]:
+        kappa = _line_fault_kappa(net, ppci, fb, tb, z_line, z_equiv, z_pp, x, base_kv)
+        if net._options["ip"]:
+            results["ip_ka"] = np.sqrt(2) * (kappa * ikss1 + ikss2)
+        if net._options["ith"]:
+            n = 1
+            m = _ith_factor_m(kappa, net._options["tk_s"])
+            results["ith_ka"] = (ikss1 + ikss2) * np.sqrt(m + n)
+
+    for key, values in results.items():
+        all_values = np.full((n_lines, n_positions), np.nan)
+        all_values[in_ppci] = values
+        results[key] = all_values
+    return results
+
+
+def _fault_position_impedance(z_entries, z_line, x):
+    z_ii, z_jj, z_ij = z_entries
+    return (1 - x)**2 * z_ii + x**2 * z_jj + 2 * x * (1 - x) * z_ij + x * (1 - x) * z_line
+
+
+def _line_fault_kappa(net, ppci, fb, tb, z_line, z_equiv, z_pp, x, base_kv):
+    topology = net._options["topology"]
+    kappa_method = net._options["kappa_method"]
+    if topology == "radial":
+        return _kappa(z_equiv.real / z_equiv.imag)
+    elif kappa_method in ["C", "c"]:
+        fc = 20 if net.f_hz == 50 else 24
+        lu = splu(ppci["internal"]["Ybus_c"].tocsc())
+        z_entries_c = _inverse_entries(lu, np.r_[fb, tb, fb], np.r_[fb, tb, tb]).reshape(3, -1, 1)
+        z_line_c = z_line.real + 1j * z_line.imag * fc / net.f_hz
+        z_equiv_c = _fault_position_impedance(z_entries_c, z_line_c, x) + z_equiv - z_pp
+        return _kappa(z_equiv_c.real / z_equiv_c.imag * fc / net.f_hz)
+    elif kappa_method in ["B", "b"]:
+        if topology != "meshed":
+            raise NotImplementedError("Kappa method B is only implemented for the topologies "
+                                      "meshed and radial for faults along lines")
+        kappa_max = np.where(base_kv < 1., 1.8, 2.)
+        return np.clip(1.15 * _kappa(z_equiv.real / z_equiv.imag), 1, kappa_max)
+    else:
+        raise ValueError("Unkown kappa method %s - specify B or C" % kappa_method)
@@ -21,15 +21,59 @@ def _extract_results(net, ppc, ppc_0):
 
 
 def _initialize_result_tables(net):
-    net.res_bus_sc = pd.DataFrame(index=net.bus.index)
-    net.res_line_sc = pd.DataFrame(index=net.line.index)
-    net.res_trafo_sc = pd.DataFrame(index=net.trafo.index)
-    net.res_trafo3w_sc = pd.DataFrame(index=net.trafo3w.index)
+    bus = net._options["bus"]
+    net.res_bus_sc = pd.DataFrame(index=net.bus.index if bus is None else bus)
+    net.res_line_sc = pd.DataFrame(index=_branch_result_index(net, "line"))
+    net.res_trafo_sc = pd.DataFrame(index=_branch_result_index(net, "trafo"))
+    net.res_trafo3w_sc = pd.DataFrame(index=_branch_result_index(net, "trafo3w"))
+
+
+def _fault_bus_index(net):
+    """
+    faulted buses without the auxiliary buses of trafo3w and xward
+    """
+    bus = net._options["bus"]
+    if bus is not None:
+        return bus
+    bus = net.bus.index.values
+    for element in ["trafo3w", "xward"]:
+        if len(net[element]) and "ad_bus" in net[element]:
+            bus = bus[~np.in1d(bus, net[element]["ad_bus"].values)]
+    return bus
+
+
+def _branch_result_index(net, element):
+    if net._options["branch_results"] and net._options["return_all_currents"]:
+        return pd.MultiIndex.from_product([net[element].index, _fault_bus_index(net)],
+                                          names=[element, "bus"])
+    return net[element].index
+
+
+def _branch_currents(net, ppc, quantity, side, f, t):
+    """
+    Currents of the ppc branches f:t at the from ("f") or to ("t") side: the minimum / maximum
+    over all faults or, with return_all_currents, the currents of each fault as a flat array in
+    the order of the branch result index
+    """
+    if not net._options["return_all_currents"]:
+        col = {("ikss", "f"): IKSS_F, ("ikss", "t"): IKSS_T, ("ip", "f"): IP_F,
+               ("ip", "t"): IP_T, ("ith", "f"): ITH_F, ("ith", "t"): ITH_T}[(quantity, side)]
+        return ppc["branch"][f:t, col].real
+    fault_buses = ppc["internal"]["fault_buses"]
+    ppc_index = net._pd2ppc_lookups["bus"][_fault_bus_index(net)]
+    # column of each faulted bus, buses which are not in the ppci do not have currents
+    position = np.minimum(np.searchsorted(fault_buses, ppc_index), len(fault_buses) - 1)
+    has_currents = fault_buses[position] == ppc_index
+    currents = np.full((ppc["branch"].shape[0], len(ppc_index)), np.nan)
+    branch_is = ppc["internal"]["branch_is"]
+    currents[np.ix_(branch_is, has_currents)] = \
+        ppc["internal"]["branch_currents"][(quantity, side)][:, position[has_currents]]
+    return currents[f:t].ravel()
 
 
 def _get_bus_results(net, ppc, ppc_0):
     bus_lookup = net._pd2ppc_lookups["bus"]
-    ppc_index = bus_lookup[net.bus.index]
+    ppc_index = bus_lookup[net.res_bus_sc.index.values]
     if net["_options"]["fault"] == "1ph":
         net.res_bus_sc["ikss_ka"] = ppc_0["bus"][ppc_index,
                                                  IKSS1] + ppc["bus"][ppc_index, IKSS2]
@@ -47,23 +91,25 @@ def _get_line_results(net, ppc):
     case = net._options["case"]
     if "line" in branch_lookup:
         f, t = branch_lookup["line"]
-        minmax = np.max if case == "max" else np.min
-        net.res_line_sc["ikss_ka"] = minmax(
-            ppc["branch"][f:t, [IKSS_F, IKSS_T]].real, axis=1)
-        if net._options["ip"]:
-            net.res_line_sc["ip_ka"] = minmax(
-                ppc["branch"][f:t, [IP_F, IP_T]].real, axis=1)
-        if net._options["ith"]:
-            net.res_line_sc["ith_ka"] = minmax(
-                ppc["branch"][f:t, [ITH_F, ITH_T]].real, axis=1)
+        if net._options["return_all_currents"]:
+            # the open end of a line does not carry current for the faults at the other buses
+            minmax = np.fmax if case == "max" else np.fmin
+        else:
+            minmax = np.maximum if case == "max" else np.minimum
+        for quantity in ["ikss", "ip", "ith"]:
+            if quantity != "ikss" and not net._options[quantity]:
+                continue
+            net.res_line_sc["%s_ka" % quantity] = minmax(
+                _branch_currents(net, ppc, quantity, "f", f, t),
+                _branch_currents(net, ppc, quantity, "t", f, t))
 
 
 def _get_trafo_results(net, ppc):
     branch_lookup = net._pd2ppc_lookups["branch"]
     if "trafo" in branch_lookup:
         f, t = branch_lookup["trafo"]
-        net.res_trafo_sc["ikss_hv_ka"] = ppc["branch"][f:t, IKSS_F].real
-        net.res_trafo_sc["ikss_lv_ka"] = ppc["branch"][f:t, IKSS_T].real
+        net.res_trafo_sc["ikss_hv_ka"] = _branch_currents(net, ppc, "ikss", "f", f, t)
+        net.res_trafo_sc["ikss_lv_ka"] = _branch_currents(net, ppc, "ikss", "t", f, t)
 
 
 def _get_trafo3w_results(net, ppc):
@@ -73,6 +119,6 @@ def _get_trafo3w_results(net, ppc):
         hv = int(f + (t - f) / 3)
         mv = int(f + 2 * (t - f) / 3)
         lv = t
-        net.res_trafo3w_sc["ikss_hv_ka"] = ppc["branch"][f:hv, IKSS_F].real
-        net.res_trafo3w_sc["ikss_mv_ka"] = ppc["branch"][hv:mv, IKSS_T].real
-        net.res_trafo3w_sc["ikss_lv_ka"] = ppc["branch"][mv:lv, IKSS_T].real
+        net.res_trafo3w_sc["ikss_hv_ka"] = _branch_currents(net, ppc, "ikss", "f", f, hv)
+        net.res_trafo3w_sc["ikss_mv_ka"] = _branch_currents(net, ppc, "ikss", "t", hv, mv)
+        net.res_trafo3w_sc["ikss_lv_ka"] = _branch_currents(net, ppc, "ikss", "t", mv, lv)
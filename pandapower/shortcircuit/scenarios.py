@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import copy
+from multiprocessing import Pool
+
+import pandas as pd
+
+from pandapower.shortcircuit.calc_sc import short_circuit_session
+
+# parameters of the static generators which only change the current sources, but not the systems
+CURRENT_SOURCE_PARAMETERS = ["in_service", "sn_kva", "k"]
+
+# network of the worker processes, see _init_worker
+_worker_net = None
+
+
+def calc_sc_scenarios(net, scenarios, fault="3ph", case="max", ip=False, ith=False,
+                      branch_results=False, n_processes=1, lv_tol_percent=10, topology="auto",
+                      tk_s=1., kappa_method="C", r_fault_ohm=0., x_fault_ohm=0., bus=None):
+    """
+    Calculates the short-circuit currents of many scenarios of the network, e.g. switching states
+    or generator dispatch states for protection studies. Each scenario is a set of modifications
+    of the element tables of the network.
+
+    The scenarios are grouped by the modifications which change the systems of the short-circuit
+    calculation. Only modifications of the static generators which are current sources
+    (in_service, sn_kva and k of sgens which are not motors) do not change the systems. The
+    scenarios of a group are calculated in one short-circuit session (see
+    short_circuit_session), so that the ppc is built and the bus impedance matrix is calculated
+    only once per group. The groups can be calculated in parallel in a pool of processes.
+
+    The network is not changed.
+
+    INPUT:
+        **net** (pandapowerNet) pandapower Network
+
+        **scenarios** (list or dict) - modifications of each scenario as a dictionary with the
+        element and the column as key and the new values as a dictionary or a Series indexed by
+        the element index, e.g. {("switch", "closed"): {3: False, 7: True},
+        ("sgen", "in_service"): {1: False}}. The scenarios of a list are named by their position,
+        the keys of a dict are used as the names of the scenarios.
+
+    OPTIONAL:
+        **fault**, **case**, **ip**, **ith**, **branch_results**, **lv_tol_percent**,
+        **topology**, **tk_s**, **kappa_method**, **r_fault_ohm**, **x_fault_ohm**, **bus** -
+        options of the calculations, see calc_sc
+
+        **n_processes** (int, 1) - number of processes in which the groups of scenarios are
+        calculated. With 1, all scenarios are calculated in the current process.
+
+    OUTPUT:
+        **results** (dict) - the result tables "res_bus_sc" (and "res_line_sc", "res_trafo_sc",
+        "res_trafo3w_sc" if branch_results is True) of all scenarios, indexed by the name of the
+        scenario and the element index
+
+    EXAMPLE:
+        scenarios = [{("switch", "closed"): {s: False}} for s in net.switch.index]
+
+        results = calc_sc_scenarios(net, scenarios, ip=True, n_processes=4)
+
+        print(results["res_bus_sc"].loc[0])
+    """
+    if isinstance(scenarios, dict):
+        names, scenarios = list(scenarios.keys()), list(scenarios.values())
+    else:
+        names = list(range(len(scenarios)))
+    groups = _group_scenarios(net, names, scenarios)
+    session_options = {"lv_tol_percent": lv_tol_percent, "topology": topology, "tk_s": tk_s,
+                       "kappa_method": kappa_method, "r_fault_ohm": r_fault_ohm,
+                       "x_fault_ohm": x_fault_ohm, "bus": bus}
+    calc_options = {"fault": fault, "case": case, "ip": ip, "ith": ith,
+                    "branch_results": branch_results}
+    # the largest groups first, so that the processes are evenly loaded
+    tasks = sorted([(modifications, group, session_options, calc_options)
+                    for modifications, group in groups.values()], key=lambda t: -len(t[1]))
+
+    if n_processes > 1 and len(tasks) > 1:
+        pool = Pool(min(n_processes, len(tasks)), initializer=_init_worker, initargs=(net,))
+        try:
+            group_results = pool.map(_calc_scenario_group_in_worker, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        group_results = [_calc_scenario_group(net, *task) for task in tasks]
+
+    results = {}
+    for group_result in group_results:
+        results.update(group_result)
+    tables = ["res_bus_sc"]
+    if branch_results:
+        tables += ["res_line_sc", "res_trafo_sc", "res_trafo3w_sc"]
+    return {table: _stack_results([results[name][table] for name in names], names,
+                                  table[4:-3]) for table in tables}
+
+
+def _group_scenarios(net, names, scenarios):
+    """
+    Groups the scenarios by their modifications which change the systems. Returns the
+    modifications and the list of (name, current source modifications) for each group.
+    """
+    motors = net.sgen.index[net.sgen.type.values == "motor"] if "type" in net.sgen else []
+    groups = {}
+    for name, scenario in zip(names, scenarios):
+        system_modifications, current_source_modifications = {}, {}
+        for (element, column), values in scenario.items():
+            values = pd.Series(values)
+            if element not in net or not isinstance(net[element], pd.DataFrame):
+                raise UserWarning("Element %s does not exist (scenario %s)" % (element, name))
+            if column not in net[element].columns:
+                raise UserWarning("Column %s does not exist in net.%s (scenario %s)"
+                                  % (column, element, name))
+            missing = values.index.difference(net[element].index)
+            if len(missing):
+                raise UserWarning("%s %s do not exist (scenario %s)"
+                                  % (element, list(missing), name))
+            if element == "sgen" and column in CURRENT_SOURCE_PARAMETERS and \
+                    not values.index.isin(motors).any():
+                current_source_modifications[(element, column)] = values
+            else:
+                system_modifications[(element, column)] = values
+        key = tuple(sorted((element, column, tuple(sorted(values.items())))
+                           for (element, column), values in system_modifications.items()))
+        if key not in groups:
+            groups[key] = (system_modifications, [])
+        groups[key][1].append((name, current_source_modifications))
+    return groups
+
+
+def _init_worker(net):
+    global _worker_net
+    _worker_net = net
+
+
+def _calc_scenario_group_in_worker(task):
+    return _calc_scenario_group(_worker_net, *task)
+
+
+def _calc_scenario_group(net, system_modifications, scenarios, session_options, calc_options):
+    """
+    Calculates the scenarios of a group in one short-circuit session of a copy of the network
+    """
+    net = copy.deepcopy(net)
+    _modify(net, system_modifications)
+    session = short_circuit_session(net, **session_options)
+    tables = ["res_bus_sc"]
+    if calc_options["branch_results"]:
+        tables += ["res_line_sc", "res_trafo_sc", "res_trafo3w_sc"]
+    results = {}
+    for name, current_source_modifications in scenarios:
+        original = _modify(net, current_source_modifications)
+        session.calc_sc(**calc_options)
+        results[name] = {table: net[table] for table in tables}
+        _modify(net, original)
+    return results
+
+
+def _modify(net, modifications):
+    """
+    Writes the modifications to the element tables and returns the original values
+    """
+    original = {}
+    for (element, column), values in modifications.items():
+        original[(element, column)] = net[element].loc[values.index, column].copy()
+        net[element].loc[values.index, column] = values.values
+    return original
+
+
+def _stack_results(tables, names, element):
+    index_name = tables[0].index.name or element
+    stacked = pd.concat(tables, keys=names)
+    stacked.index.names = ["scenario", index_name]
+    return stacked
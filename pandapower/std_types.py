@@ -5,6 +5,7 @@
 
 
 import pandas as pd
+from pandapower.auxiliary import _preserve_dtypes, _categoricals_to_object
 try:
     import pplog as logging
 except ImportError:
@@ -234,10 +235,13 @@ def change_std_type(net, eid, name, element="line"):
     """
     type_param = load_std_type(net, name, element)
     table = net[element]
+    dtypes = table.dtypes
+    _categoricals_to_object(table)
     for column in table.columns:
         if column in type_param:
             table.at[eid, column] = type_param[column]
     table.at[eid, "std_type"] = name
+    _preserve_dtypes(table, dtypes)
 
 
 def find_std_type_by_parameter(net, data, element="line", epsilon=0.):
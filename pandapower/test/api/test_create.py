@@ -157,5 +157,34 @@ def test_create_buses():
         pp.create_buses(net, 2, 110, geodata=geodata)
 
 
+def test_create_empty_network():
+    net1 = pp.create_empty_network(name="net1", f_hz=60.)
+    net2 = pp.create_empty_network()
+    assert net1.name == "net1" and net1.f_hz == 60.
+    assert net2.name == "" and net2.f_hz == 50.
+
+    # the networks are independent copies of the template
+    pp.create_bus(net1, 20.)
+    net1.std_types["line"]["NAYY 4x50 SE"]["r_ohm_per_km"] = 1.
+    net1.user_pf_options["init"] = "dc"
+    net3 = pp.create_empty_network()
+    for net in [net2, net3]:
+        assert len(net.bus) == 0
+        assert net.std_types["line"]["NAYY 4x50 SE"]["r_ohm_per_km"] == 0.642
+        assert net.user_pf_options == {}
+
+    net = pp.create_empty_network(add_stdtypes=False, add_results=False)
+    assert all(len(net.std_types[component]) == 0 for component in ["line", "trafo", "trafo3w"])
+    assert "res_bus" not in net and "_empty_res_bus" in net
+    b1 = pp.create_bus(net, 20.)
+    b2 = pp.create_bus(net, 20.)
+    pp.create_ext_grid(net, b1)
+    pp.create_line_from_parameters(net, b1, b2, length_km=1., r_ohm_per_km=0.1,
+                                   x_ohm_per_km=0.1, c_nf_per_km=10., max_i_ka=0.4)
+    pp.create_load(net, b2, p_kw=100.)
+    pp.runpp(net)
+    assert net.converged and len(net.res_bus) == 2
+
+
 if __name__ == '__main__':
     pytest.main(["test_create.py"])
@@ -4,6 +4,8 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
+import io
+import mmap
 import os
 import pytest
 import copy
@@ -11,9 +13,10 @@ import copy
 import pandas as pd
 import pandapower as pp
 from pandapower.test.toolbox import assert_net_equal, create_test_network, tempdir, net_in
-from pandapower.io_utils import collect_all_dtypes_df, restore_all_dtypes
+from pandapower.io_utils import collect_all_dtypes_df, restore_all_dtypes, to_dict_of_dfs, \
+    from_dict_of_dfs
 import pandapower.networks as nw
-from pandapower.io_utils import PPJSONEncoder, PPJSONDecoder
+from pandapower.io_utils import PPJSONEncoder, PPJSONDecoder, iter_json_items
 import json
 import numpy as np
 
@@ -24,6 +27,33 @@ def test_pickle(net_in, tempdir):
     assert_net_equal(net_in, net_out)
 
 
+def test_npz(net_in, tempdir):
+    filename = os.path.join(tempdir, "testfile.npz")
+    pp.runpp(net_in)
+    pp.to_npz(net_in, filename)
+    for use_mmap in [True, False]:
+        net_out = pp.from_npz(filename, use_mmap=use_mmap)
+        assert_net_equal(net_in, net_out)
+        assert pp.nets_equal(net_in, net_out)
+
+    # numerical columns are views of the memory mapped file
+    net_out = pp.from_npz(filename)
+    for values in [net_out.bus.vn_kv.values, net_out.res_bus.vm_pu.values]:
+        base = values
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        # numpy >= 1.23 wraps the mmap in a memoryview
+        buffer = getattr(base.base, "obj", base.base)
+        assert isinstance(buffer, mmap.mmap)
+        assert np.shares_memory(values, np.frombuffer(buffer, dtype=np.uint8))
+
+    # memory mapped arrays are copy-on-write: changing the net does not change the file
+    net_out.bus.vn_kv.values[:] = 0.
+    net_out.res_bus.vm_pu.values[:] = 0.
+    net_out = pp.from_npz(filename)
+    assert_net_equal(net_in, net_out)
+
+
 def test_excel(net_in, tempdir):
     filename = os.path.join(tempdir, "testfile.xlsx")
     pp.to_excel(net_in, filename)
@@ -71,6 +101,29 @@ def test_json(net_in, tempdir):
     assert_net_equal(net_in, net_out)
 
 
+def test_json_streaming(net_in, tempdir):
+    json_string = pp.to_json_string(net_in)
+    # the streamed file is identical to the json string
+    filename = os.path.join(tempdir, "testfile.json")
+    pp.to_json(net_in, filename)
+    with open(filename) as f:
+        assert f.read() == json_string
+
+    compact_string = pp.to_json_string(net_in, compact=True)
+    assert len(compact_string) < len(json_string)
+    assert json.loads(compact_string) == json.loads(json_string)
+    for s in [json_string, compact_string]:
+        # small chunks split keys, numbers and tables
+        for chunk_size in [1, 13, 2 ** 20]:
+            data = dict(iter_json_items(io.StringIO(s), chunk_size=chunk_size))
+            assert sorted(data.keys()) == sorted(json.loads(s).keys())
+        assert_net_equal(net_in, pp.from_json(io.StringIO(s)))
+        assert_net_equal(net_in, pp.from_json_string(s))
+
+    with pytest.raises(ValueError):
+        list(iter_json_items(io.StringIO(compact_string[:-10])))
+
+
 def test_type_casting_json(net_in, tempdir):
     filename = os.path.join(tempdir, "testfile.json")
     net_in.sn_kva = 1000
@@ -86,6 +139,119 @@ def test_sqlite(net_in, tempdir):
     assert_net_equal(net_in, net_out)
 
 
+def test_line_geodata_long_format(net_in):
+    dodfs = to_dict_of_dfs(net_in, include_results=True)
+    geo = dodfs["line_geodata"]
+    assert list(geo.columns) == ["line", "seq", "x", "y"]
+    assert len(geo) == sum(len(c) for c in net_in.line_geodata.coords)
+    assert list(geo.loc[geo.line == 11, "seq"]) == [0, 1, 2]
+    net_out = from_dict_of_dfs(dodfs)
+    assert_net_equal(net_in, net_out)
+
+    # wide format of files saved with pandapower <= 1.6.0
+    wide = pd.DataFrame([[1.1, 2.2, 3.3, 4.4, None, None], [5.5, 5.5, 6.6, 6.6, 7.7, 7.7]],
+                        index=[0, 11], columns=["x0", "y0", "x1", "y1", "x2", "y2"])
+    dodfs["line_geodata"] = wide
+    net_out = from_dict_of_dfs(dodfs)
+    assert_net_equal(net_in, net_out)
+
+
+def test_sqlite_store(tempdir):
+    filename = os.path.join(tempdir, "store.db")
+    net = nw.example_simple()
+    p_kw = net.load.p_kw.copy()
+    results = dict()
+    with pp.SQLiteStore(filename, net, batch_size=3) as store:
+        for scenario in range(5):
+            net.load.p_kw = p_kw * (1 + 0.1 * scenario)
+            pp.runpp(net)
+            store.append_results(net, "scenario%i" % scenario)
+            results[scenario] = copy.deepcopy(net)
+
+    store = pp.SQLiteStore(filename)
+    assert store.keys() == ["scenario%i" % i for i in range(5)]
+    net_out = store.read_net()
+    store.read_results(net_out, "scenario2")
+    for element in ["bus", "line", "trafo", "ext_grid"]:
+        res = results[2]["res_" + element]
+        assert np.allclose(net_out["res_" + element].loc[res.index, res.columns], res)
+
+    vm_pu = store.read_history("bus", 3, "vm_pu")
+    assert list(vm_pu.index) == store.keys()
+    assert np.allclose(vm_pu.values, [results[i].res_bus.vm_pu.at[3] for i in range(5)])
+    history = store.read_history("line", 0)
+    assert list(history.columns) == list(net.res_line.columns)
+
+    # new snapshots are appended to an existing store
+    store.append_results(net, 17)
+    assert store.keys()[-1] == 17
+    with pytest.raises(UserWarning):
+        store.read_results(net_out, "scenario5")
+    store.close()
+    # the snapshots are not part of the network
+    net_out = pp.from_sqlite(filename)
+    assert not any(key.startswith("snapshot") for key in net_out.keys())
+    assert pp.dataframes_equal(net_out.bus, net.bus)
+
+
+
+def test_sqlite_store_errors(tempdir):
+    import sqlite3
+    filename = os.path.join(tempdir, "store_errors.db")
+    net = nw.example_simple()
+    # tables of the net which start with "snapshot" are not confused with the snapshots
+    net["snapshot_data"] = pd.DataFrame({"a": [1., 2.]})
+    pp.runpp(net)
+    store = pp.SQLiteStore(filename, net, batch_size=10)
+
+    # a failed transaction is rolled back, including the new result tables, and the snapshots
+    # are written with the next flush
+    store.append_results(net, 0)
+    with store.con:
+        store.con.execute('INSERT INTO "snapshots" (id, key) VALUES (100, 0)')
+    with pytest.raises(sqlite3.IntegrityError):
+        store.flush()
+    with store.con:
+        store.con.execute('DELETE FROM "snapshots" WHERE id = 100')
+    assert store.keys() == [0]
+    net_out = store.read_net()
+    assert pp.dataframes_equal(net_out.snapshot_data, net.snapshot_data)
+    store.read_results(net_out, 0)
+    assert np.allclose(net_out.res_bus.vm_pu.loc[net.bus.index], net.res_bus.vm_pu)
+
+    # duplicate keys are rejected when they are appended
+    store.append_results(net, 1)
+    with pytest.raises(UserWarning):
+        store.append_results(net, 1)
+    with pytest.raises(UserWarning):
+        store.append_results(net, 0)
+    assert store.keys() == [0, 1]
+
+    # the file is closed even if the buffered snapshots cannot be written
+    store.append_results(net, 2)
+    with store.con:
+        store.con.execute('INSERT INTO "snapshots" (id, key) VALUES (100, 2)')
+    with pytest.raises(sqlite3.IntegrityError):
+        store.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.con.execute("SELECT 1")
+
+
+def test_compact_dtypes_io(tempdir):
+    net_in = create_test_network()
+    pp.compact_dtypes(net_in)
+    for ext, to_file, from_file in [("p", pp.to_pickle, pp.from_pickle),
+                                    ("npz", pp.to_npz, pp.from_npz),
+                                    ("json", pp.to_json, pp.from_json),
+                                    ("xlsx", pp.to_excel, pp.from_excel),
+                                    ("db", pp.to_sqlite, pp.from_sqlite)]:
+        filename = os.path.join(tempdir, "testfile_compact.%s" % ext)
+        to_file(net_in, filename)
+        net_out = from_file(filename)
+        for element in ["bus", "line", "trafo", "load", "switch"]:
+            assert net_out[element].dtypes.astype(str).equals(net_in[element].dtypes.astype(str))
+
+
 def test_convert_format():  # TODO what is this thing testing ?
     folder = os.path.abspath(os.path.dirname(pp.__file__))
     net = pp.from_pickle(os.path.join(folder, "test", "api", "old_net.p"))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import subprocess
+import sys
+
+import pytest
+
+# optional dependencies and subpackages which make up a large part of the import time and have to
+# be imported on demand
+LAZY_MODULES = ["networkx", "geopandas", "shapely", "fiona", "seaborn", "igraph", "scipy.optimize",
+                "pandapower.plotting", "pandapower.estimation", "pandapower.shortcircuit",
+                "pandapower.converter", "pandapower.networks"]
+
+# the plotting libraries are imported when the first plot is drawn. pandas < 0.24 imports parts of
+# matplotlib itself, so only the modules which pandas does not need are checked
+PLOTTING_MODULES = ["matplotlib.pyplot", "matplotlib.collections", "matplotlib.patches",
+                    "matplotlib.backend_bases", "plotly"]
+
+
+def _import_in_subprocess(module):
+    # a fresh interpreter is needed to see which modules the import loads
+    code = "import sys; import %s; print(' '.join(sys.modules))" % module
+    out = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                           universal_newlines=True).communicate()[0].splitlines()
+    assert len(out) >= 1, "import of %s failed" % module
+    return set(out[-1].split())
+
+
+def test_import():
+    modules = _import_in_subprocess("pandapower")
+    assert "pandapower.toolbox" in modules
+    for module in LAZY_MODULES:
+        assert module not in modules, "%s is imported by import pandapower" % module
+
+
+def test_plotting_import():
+    pytest.importorskip("matplotlib")
+    modules = _import_in_subprocess("pandapower.plotting")
+    for module in ["networkx", "geopandas", "shapely", "fiona", "seaborn"] + PLOTTING_MODULES:
+        assert module not in modules, "%s is imported by import pandapower.plotting" % module
+
+
+def test_plotting_round_capstyle():
+    pytest.importorskip("matplotlib")
+    # the renderer is patched by the first collection, drawn or not
+    code = "import matplotlib; matplotlib.use('Agg'); import pandapower.plotting as plot; " \
+           "import pandapower.networks as nw; net = nw.mv_oberrhein(); " \
+           "plot.create_bus_collection(net, net.bus.index[:3]); " \
+           "from matplotlib.backend_bases import RendererBase; " \
+           "print(RendererBase.new_gc()._capstyle)"
+    out = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                           universal_newlines=True).communicate()[0].splitlines()
+    assert out and out[-1] == "round"
+
+
+def test_namespace():
+    import pandapower as pp
+    for name in ["create_bus", "runpp", "runopp", "to_json", "from_json", "convert_format",
+                 "nets_equal", "LoadflowNotConverged", "OPFNotConverged"]:
+        assert hasattr(pp, name)
+
+
+if __name__ == '__main__':
+    pytest.main(["test_import.py"])
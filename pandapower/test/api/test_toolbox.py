@@ -5,12 +5,16 @@
 
 
 import copy
+import os
 import numpy as np
+import pandas as pd
 import pytest
 
 import pandapower as pp
 import pandapower.networks as nw
 import pandapower.toolbox as tb
+from pandapower.io_utils import to_dict_of_dfs, from_dict_of_dfs
+from pandapower.test.toolbox import tempdir
 
 
 def test_nets_equal():
@@ -144,8 +148,8 @@ def test_drop_inactive_elements():
 
         sum_of_elements = 0
         for element in net.keys():
-            # skip this one since we expect items here
-            if element == "std_types" or element.startswith("_"):
+            # skip these since we expect items here
+            if element in ("std_types", "format_version") or element.startswith("_"):
                 continue
             try:
                 if service and (element == 'ext_grid' or (element == 'bus' and len(net.bus) == 1)):
@@ -612,5 +616,134 @@ def test_impedance_line_replacement():
     assert np.allclose(net3.res_impedance[cols].values, net2.res_line[cols].values)
 
 
+def test_convert_format_version():
+    net = nw.example_simple()
+    applied = []
+    pp.register_format_migration(1.6, lambda n: applied.append(n.version))
+    try:
+        # nets saved with the current version are not converted
+        assert pp.convert_format(net) is net
+        assert len(applied) == 0
+        net.version = 1.5
+        pp.convert_format(net)
+        assert applied == [1.5]
+        assert net.version == float(pp.__version__[:3])
+    finally:
+        tb._format_migrations.pop()
+
+
+
+def test_convert_format_old_files(tempdir):
+    net = nw.example_simple()
+    current_version = float(pp.__version__[:3])
+    applied = []
+    pp.register_format_migration(current_version, lambda n: applied.append(n.version))
+    try:
+        # files without version are converted with all migrations
+        dodfs = to_dict_of_dfs(net)
+        dodfs["parameters"].drop(["version", "format_version"], inplace=True)
+        dodfs["line"] = dodfs["line"].rename(columns={"max_i_ka": "imax_ka"})
+        net_old = from_dict_of_dfs(dodfs)
+        assert net_old.version == 0. and "format_version" not in net_old
+        pp.convert_format(net_old)
+        assert applied == [0.]
+        assert "max_i_ka" in net_old.line and "imax_ka" not in net_old.line
+        assert net_old.version == current_version and net_old.format_version == pp.__version__
+
+        # pre-releases of the current version did not save a format version
+        net_old = copy.deepcopy(net)
+        del net_old["format_version"]
+        net_old.trafo.tp_side = 0
+        filename = os.path.join(tempdir, "pre_release.p")
+        pp.to_pickle(net_old, filename)
+        net_old = pp.from_pickle(filename)
+        assert applied == [0., current_version]
+        assert (net_old.trafo.tp_side == "hv").all()
+
+        # the version of the file is kept by all formats
+        filename = os.path.join(tempdir, "current.json")
+        pp.to_json(net_old, filename)
+        net_json = pp.from_json(filename, convert=False)
+        assert net_json.format_version == pp.__version__
+        pp.convert_format(net_json)
+        assert len(applied) == 2
+    finally:
+        tb._format_migrations.pop()
+
+
+def test_compact_dtypes():
+    net = nw.mv_oberrhein()
+    pp.runpp(net)
+    vm_pu = net.res_bus.vm_pu.values.copy()
+    pp.compact_dtypes(net)
+
+    for element, column in [("bus", "name"), ("bus", "zone"), ("line", "std_type"),
+                            ("trafo", "std_type"), ("load", "type"), ("switch", "et")]:
+        assert pd.api.types.is_categorical_dtype(net[element][column])
+    assert net.line.from_bus.dtype.itemsize < 4
+    assert net.bus.in_service.dtype == bool
+
+    pp.runpp(net)
+    assert np.allclose(vm_pu, net.res_bus.vm_pu.values)
+
+    # create functions keep the compact dtypes and extend the categories
+    b = pp.create_bus(net, 20., name="new bus")
+    l = pp.create_line(net, b, net.bus.index[0], 1., "NA2XS2Y 1x185 RM/25 12/20 kV")
+    pp.create_switch(net, b, l, "l")
+    assert pd.api.types.is_categorical_dtype(net.bus.name)
+    assert net.bus.name.at[b] == "new bus"
+    assert pd.api.types.is_categorical_dtype(net.switch.et)
+    assert net.line.std_type.at[l] == "NA2XS2Y 1x185 RM/25 12/20 kV"
+
+    # values which do not fit the right-sized integers are not truncated
+    b = pp.create_bus(net, 20., index=70000)
+    pp.create_load(net, b, p_kw=10.)
+    assert net.load.bus.iloc[-1] == 70000
+
+    # convert_format keeps the compact dtypes
+    net2 = pp.convert_format(copy.deepcopy(net))
+    assert net2.bus.name.dtype == net.bus.name.dtype
+    assert net2.line.from_bus.dtype == net.line.from_bus.dtype
+
+
+def test_compact_dtypes_tap_changer():
+    # the tap positions are integers below the neutral position, tp_pos - tp_mid is negative
+    net = pp.create_empty_network()
+    b1 = pp.create_bus(net, 20.)
+    b2 = pp.create_bus(net, 0.4)
+    pp.create_ext_grid(net, b1)
+    pp.create_transformer_from_parameters(net, b1, b2, sn_kva=400., vn_hv_kv=20., vn_lv_kv=0.4,
+                                          vscr_percent=1.325, vsc_percent=4., pfe_kw=0.95,
+                                          i0_percent=0.2375, tp_side="hv", tp_mid=5, tp_min=1,
+                                          tp_max=9, tp_st_percent=2.5, tp_pos=3)
+    pp.create_load(net, b2, p_kw=200., q_kvar=50.)
+    for column in ["tp_mid", "tp_min", "tp_max", "tp_pos"]:
+        net.trafo[column] = net.trafo[column].astype(np.int64)
+    pp.runpp(net)
+    vm_pu = net.res_bus.vm_pu.values.copy()
+
+    pp.compact_dtypes(net)
+    pp.runpp(net)
+    assert np.allclose(net.res_bus.vm_pu.values, vm_pu)
+    assert net.trafo.tp_pos.dtype.kind == "i"
+
+    net.trafo.tp_pos -= 3
+    assert net.trafo.tp_pos.at[0] == 0
+    net.trafo.tp_pos -= 1
+    assert net.trafo.tp_pos.at[0] == -1
+
+
+def test_compact_empty_network():
+    net = pp.create_empty_network(compact=True)
+    assert pd.api.types.is_categorical_dtype(net.bus.name)
+    b1 = pp.create_bus(net, 0.4, name="bus1")
+    b2, b3 = pp.create_buses(net, 2, 0.4, name="bus2")
+    pp.create_line(net, b1, b2, 1., "NAYY 4x50 SE")
+    pp.create_transformer3w(net, b1, b2, b3, "63/25/38 MVA 110/20/10 kV")
+    assert pd.api.types.is_categorical_dtype(net.bus.name)
+    assert pd.api.types.is_categorical_dtype(net.trafo3w.std_type)
+    assert list(net.bus.name) == ["bus1", "bus2", "bus2"]
+
+
 if __name__ == "__main__":
     pytest.main(["test_toolbox.py", "-xs"])
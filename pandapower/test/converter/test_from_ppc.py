@@ -110,5 +110,37 @@ def test_case9_conversion():
     assert pp.nets_equal(net, net2, check_only_results=True, tol=1e-10)
 
 
+def test_from_ppc_element_tables():
+    # the element tables have the columns and dtypes which the create functions give them
+    ppc = to_ppc(pn.case9())
+    ppc["gen"][2, 0] = ppc["gen"][1, 0]  # the second generator at a pv bus is converted to sgen
+    net = from_ppc(ppc, f_hz=60)
+    assert len(net.ext_grid) == len(net.gen) == len(net.sgen) == 1
+
+    limits = dict(max_p_kw=0., min_p_kw=-1., max_q_kvar=1., min_q_kvar=-1.)
+    ref = pp.create_empty_network()
+    b = pp.create_bus(ref, 345., zone=1., max_vm_pu=1.1, min_vm_pu=0.9)
+    pp.create_load(ref, b, p_kw=1., controllable=False)
+    pp.create_ext_grid(ref, b, **limits)
+    pp.create_gen(ref, b, p_kw=-1., controllable=True, **limits)
+    pp.create_sgen(ref, b, p_kw=-1., type="", controllable=True, **limits)
+    for element in ["bus", "load", "ext_grid", "gen", "sgen"]:
+        assert list(net[element].columns) == list(ref[element].columns)
+        for column in ["in_service", "controllable"]:
+            if column in ref[element]:
+                assert net[element][column].dtype == bool
+
+
+def test_large_grid_conversion():
+    net = pn.case2869pegase()
+    pp.runpp(net)
+    ppc = to_ppc(net)
+    net2 = from_ppc(ppc, f_hz=net.f_hz)
+    assert len(net2.bus) == len(net.bus)
+    assert len(net2.line) + len(net2.trafo) == len(net.line) + len(net.trafo)
+    assert len(net2.polynomial_cost) == len(net.polynomial_cost)
+    assert validate_from_ppc(ppc, net2, max_diff_values=max_diff_values1)
+
+
 if __name__ == '__main__':
     pytest.main(["test_from_ppc.py"])
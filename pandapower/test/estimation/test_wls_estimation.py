@@ -4,14 +4,18 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
+import copy
 import os
 
 import numpy as np
+import pandas as pd
 import pytest
+from scipy.sparse import issparse
 
 import pandapower as pp
 import pandapower.networks as nw
-from pandapower.estimation import chi2_analysis, remove_bad_data, estimate
+from pandapower.estimation import chi2_analysis, remove_bad_data, estimate, state_estimation, \
+    tracking_state_estimation
 
 
 def test_2bus():
@@ -238,7 +242,9 @@ def test_3bus_with_transformer():
 
     assert success
     assert (np.nanmax(abs(diff_v)) < 6e-4)
-    assert (np.nanmax(abs(diff_delta)) < 1.4e-4)
+    # the exact jacobian of the phase shifting transformer leads to the WLS optimum of the noisy
+    # measurements, which differs by a few 1e-4 degree from the power flow angles
+    assert (np.nanmax(abs(diff_delta)) < 1e-3)
 
     # Backwards check. Use state estimation results for power flow and check for equality
     net.load.drop(net.load.index, inplace=True)
@@ -394,6 +400,78 @@ def test_cigre_network_with_slack_init():
     test_cigre_network(init='slack')
 
 
+def test_cigre_network_with_bad_data():
+    np.random.seed(123456)
+    net = nw.create_cigre_network_mv(with_der=False)
+    pp.runpp(net)
+    for bus, row in net.res_bus.iterrows():
+        pp.create_measurement(net, "v", "bus", row.vm_pu * r(0.001), 0.001, bus)
+        pp.create_measurement(net, "p", "bus", -row.p_kw * r(0.01), max(1.0, abs(0.01 * row.p_kw)),
+                              bus)
+        pp.create_measurement(net, "q", "bus", -row.q_kvar * r(0.01),
+                              max(1.0, abs(0.01 * row.q_kvar)), bus)
+    bad_meas = net.measurement.index[(net.measurement.type == "v") &
+                                     (net.measurement.bus == 5)][0]
+    net.measurement.loc[bad_meas, "value"] += 0.02
+
+    # the normalized residuals are the same as with the dense residual covariance matrix (up to
+    # the cancellation errors of the dense inverse)
+    se = state_estimation(net=net)
+    assert se.estimate()
+    H = se.H.toarray()
+    omega = np.diag(np.linalg.inv(se.R_inv.toarray()) -
+                    H.dot(np.linalg.inv(se.Gm.toarray())).dot(H.T))
+    assert np.allclose(se._normalized_residuals(block_size=7),
+                       np.abs(se.r.ravel()) / np.sqrt(np.abs(omega)), rtol=5e-2)
+
+    assert remove_bad_data(net, init='flat')
+    assert bad_meas not in net.measurement.index
+    assert len(net.measurement) == 3 * len(net.bus) - 1
+    assert np.nanmax(abs(net.res_bus_est.vm_pu.values - net.res_bus.vm_pu.values)) < 1e-3
+
+
+@pytest.mark.parametrize("reuse_gain", [False, True])
+def test_tracking_state_estimation(reuse_gain):
+    net = nw.create_cigre_network_mv(with_der=False)
+    pp.runpp(net, calculate_voltage_angles=True)
+    for bus, row in net.res_bus.iterrows():
+        pp.create_measurement(net, "v", "bus", row.vm_pu, 0.001, bus)
+        pp.create_measurement(net, "p", "bus", -row.p_kw, 1., bus)
+        pp.create_measurement(net, "q", "bus", -row.q_kvar, 1., bus)
+    res_bus = net.res_bus.copy()
+    meas = net.measurement
+
+    tse = tracking_state_estimation(net, reuse_gain=reuse_gain)
+    tse.initialize(init="flat")
+    assert tse.update()
+    assert np.allclose(net.res_bus_est.vm_pu.values, res_bus.vm_pu.values, atol=1e-10)
+
+    for scaling in [1.01, 1.02, 0.99]:
+        # measurement snapshot of a changed operating point
+        snapshot = copy.deepcopy(net)
+        snapshot.load.p_kw *= scaling
+        snapshot.load.q_kvar *= scaling
+        pp.runpp(snapshot, calculate_voltage_angles=True)
+        values = pd.Series(index=meas.index)
+        for meas_type, column, sign in [("v", "vm_pu", 1), ("p", "p_kw", -1), ("q", "q_kvar", -1)]:
+            is_type = meas.type == meas_type
+            values[is_type] = sign * snapshot.res_bus[column].loc[meas.bus[is_type]].values
+        # a missing value only removes this measurement from the snapshot
+        values.iloc[4] = np.nan
+
+        assert tse.update(values)
+        assert np.allclose(net.res_bus_est.vm_pu.values, snapshot.res_bus.vm_pu.values,
+                           atol=1e-8)
+        assert np.allclose(net.res_bus_est.va_degree.values, snapshot.res_bus.va_degree.values,
+                           atol=1e-6)
+        assert tse._iterations <= 4
+        assert (tse._gain_lu is not None) == reuse_gain
+
+    # the power flow results and the measurements of the network are unchanged
+    assert net.res_bus.equals(res_bus)
+    assert not meas.value.isnull().any()
+
+
 @pytest.mark.xfail
 def test_IEEE_case_9_with_bad_data():
     # 1. Create network
@@ -532,6 +610,70 @@ def test_check_existing_measurements():
     assert m5 != m6
 
 
+def test_create_measurements():
+    net = nw.create_cigre_network_mv(with_der=False)
+    specs = [("v", "bus", 1.01, .01, 1, None), ("p", "bus", -100., 5., 2, None),
+             ("q", "line", 20., 2., "to", 3), ("i", "trafo", 30., 1., "lv", 0),
+             ("p", "line", 50., 2., 1, 0), ("q", "bus", -10., 1., 4, None)]
+    net_single = copy.deepcopy(net)
+    for n in [net, net_single]:
+        pp.create_measurement(n, "v", "bus", 1., .1, 1)
+        pp.create_measurement(n, "p", "line", 5., .1, 1, 0)
+    for spec in specs:
+        pp.create_measurement(net_single, *spec)
+
+    # the same as single measurements, existing measurements are replaced
+    index = pp.create_measurements(net, *[[spec[i] for spec in specs] for i in range(6)])
+    assert list(index) == [0, 2, 3, 4, 1, 5]
+    pd.testing.assert_frame_equal(net.measurement, net_single.measurement)
+
+    index = pp.create_measurements(net, "v", "bus", 1., .01, [0, 1, 2], check_existing=False,
+                                   index=[10, 11, 12])
+    assert list(index) == [10, 11, 12]
+    assert len(net.measurement) == 9
+
+    with pytest.raises(UserWarning):
+        pp.create_measurements(net, "v", "bus", 1., .01, [0, 1])
+    with pytest.raises(UserWarning):
+        pp.create_measurements(net, "i", "bus", 1., .01, [3])
+    with pytest.raises(UserWarning):
+        pp.create_measurements(net, "p", "line", 1., .01, [3], [100])
+    with pytest.raises(UserWarning):
+        pp.create_measurements(net, "q", "bus", 1., .01, [3], index=[11])
+
+
+def test_parallel_lines_with_sparse_matrices():
+    # branch measurements are assigned to the measured branch, not to the bus pair
+    net = pp.create_empty_network()
+    b0 = pp.create_bus(net, vn_kv=10.)
+    b1 = pp.create_bus(net, vn_kv=10.)
+    b2 = pp.create_bus(net, vn_kv=10.)
+    pp.create_ext_grid(net, b0, vm_pu=1.02)
+    pp.create_line_from_parameters(net, b0, b1, 1., r_ohm_per_km=.1, x_ohm_per_km=.3,
+                                   c_nf_per_km=0., max_i_ka=1)
+    pp.create_line_from_parameters(net, b0, b1, 1., r_ohm_per_km=.3, x_ohm_per_km=.5,
+                                   c_nf_per_km=0., max_i_ka=1)
+    pp.create_line_from_parameters(net, b1, b2, 1., r_ohm_per_km=.2, x_ohm_per_km=.4,
+                                   c_nf_per_km=0., max_i_ka=1)
+    pp.create_load(net, b1, p_kw=800., q_kvar=300.)
+    pp.create_load(net, b2, p_kw=500., q_kvar=200.)
+    pp.runpp(net, calculate_voltage_angles=True)
+
+    pp.create_measurement(net, "v", "bus", net.res_bus.vm_pu.at[b0], .001, bus=b0)
+    pp.create_measurement(net, "p", "line", net.res_line.p_from_kw.at[1], 1., bus=b0, element=1)
+    pp.create_measurement(net, "q", "line", net.res_line.q_from_kvar.at[1], 1., bus=b0, element=1)
+    for bus in [b1, b2]:
+        pp.create_measurement(net, "p", "bus", -net.res_bus.p_kw.at[bus], 1., bus=bus)
+        pp.create_measurement(net, "q", "bus", -net.res_bus.q_kvar.at[bus], 1., bus=bus)
+
+    se = state_estimation(net=net)
+    assert se.estimate()
+    assert issparse(se.H) and issparse(se.Gm)
+    assert np.allclose(net.res_bus_est.vm_pu.values, net.res_bus.vm_pu.values, atol=1e-8)
+    assert np.allclose(net.res_line_est.p_from_kw.values, net.res_line.p_from_kw.values,
+                       atol=1e-4)
+
+
 def load_3bus_network():
     folder = os.path.abspath(os.path.dirname(pp.__file__))
     return pp.from_pickle(os.path.join(folder, "test", "estimation", "3bus_wls.p"))
@@ -6,6 +6,8 @@
 
 import copy
 import os
+import subprocess
+import sys
 
 import numpy as np
 import pandas as pd
@@ -945,5 +947,28 @@ def test_dc_with_ext_grid_at_one_bus():
     assert np.allclose(net.res_ext_grid.p_kw.values, [0,0])
 
 
+def test_warmup(tmpdir, monkeypatch):
+    pytest.importorskip("numba")
+    cache_dir = str(tmpdir)
+    monkeypatch.delenv("NUMBA_CACHE_DIR", raising=False)
+    # fresh interpreters are needed, because functions which are already compiled in a process are
+    # not written to a new cache directory
+    code = "import os; import pandapower as pp; pp.warmup(cache_dir=%r); " \
+           "print(os.environ.get('NUMBA_CACHE_DIR'))" % cache_dir
+    out = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                           universal_newlines=True).communicate()[0]
+    assert any(f.endswith(".nbi") for _, _, files in os.walk(cache_dir) for f in files)
+    # the environment is only changed on request
+    assert out.splitlines()[-1] == "None"
+
+    code = "import pandapower as pp; from pandapower.auxiliary import _numba_functions; " \
+           "pp.warmup(); print(' '.join(f.py_func.__name__ for f in _numba_functions() " \
+           "if len(f.signatures) == 0))"
+    out = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                           universal_newlines=True).communicate()[0]
+    # ds_find and ds_union are only inlined in ds_create
+    assert set(out.splitlines()[-1].split()) <= {"ds_find", "ds_union"}
+
+
 if __name__ == "__main__":
     pytest.main(["test_runpp.py"])
\ No newline at end of file
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import os
+
+import pytest
+
+import pandapower as pp
+import pandapower.networks as pn
+from pandapower.networks.network_cache import _cache
+from pandapower.test.toolbox import tempdir
+
+
+@pytest.fixture
+def cache_options():
+    pn.clear_cache()
+    yield
+    pn.set_cache_options(enabled=True, max_size=20, disk_cache_dir="")
+    pn.clear_cache()
+
+
+def test_cached_copies(cache_options):
+    net1 = pn.case9()
+    assert len(_cache) == 1
+    net1.bus.vn_kv = 1.
+    net1.load.drop(net1.load.index, inplace=True)
+    net2 = pn.case9()
+    assert len(_cache) == 1
+    assert len(net2.load) == 3
+    assert (net2.bus.vn_kv == 345.).all()
+
+    pn.clear_cache()
+    assert len(_cache) == 0
+    assert pp.nets_equal(pn.case9(), net2)
+
+
+def test_cache_size(cache_options):
+    pn.set_cache_options(max_size=2)
+    pn.case4gs()
+    pn.case5()
+    pn.case4gs()
+    pn.case6ww()
+    # case5 is the least recently used network
+    assert [os.path.basename(p) for p in _cache] == ["case4gs.json", "case6ww.json"]
+    pn.set_cache_options(max_size=1)
+    assert len(_cache) == 1
+    pn.set_cache_options(enabled=False)
+    assert len(_cache) == 0
+    pn.case4gs()
+    assert len(_cache) == 0
+
+
+def test_disk_cache(cache_options, tempdir):
+    cache_dir = os.path.join(tempdir, "cache")
+    pn.set_cache_options(disk_cache_dir=cache_dir)
+    net = pn.case30()
+    files = os.listdir(cache_dir)
+    assert len(files) == 1 and files[0].endswith(".npz")
+    pn.clear_cache()
+    assert pp.nets_equal(net, pn.case30())
+    pn.clear_cache(disk=True)
+    assert len(os.listdir(cache_dir)) == 0
+
+
+if __name__ == '__main__':
+    pytest.main(["test_network_cache.py"])
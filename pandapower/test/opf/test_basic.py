@@ -6,8 +6,14 @@
 
 import pytest
 import numpy as np
+import scipy.linalg
+from scipy.sparse import csr_matrix as sparse, issparse
 
 import pandapower as pp
+import pandapower.networks as pn
+from pandapower.opf.kkt_solver import SpsolveKKTSolver
+from pandapower.opf.opf_model import opf_model
+from pandapower.opf.qps_linprog import HIGHS_AVAILABLE
 from pandapower.test.toolbox import add_grid_connection
 from pandapower.toolbox import convert_format
 
@@ -493,6 +499,122 @@ def test_dcopf_pwl(simple_opf_test_net):
     logger.debug("res_bus.vm_pu: \n%s" % net.res_bus.vm_pu)
     assert abs(100 * net.res_gen.p_kw.values - net.res_cost) < 1e-3
 
+@pytest.mark.skipif(not HIGHS_AVAILABLE, reason="requires linprog with HiGHS (scipy >= 1.7)")
+def test_dcopf_linprog(simple_opf_test_net):
+    net = simple_opf_test_net
+    pp.create_piecewise_linear_cost(net, 0, "gen", np.array([[-200, -20000], [-100, -10000], [0, 0]]))
+    pp.rundcopp(net, OPF_ALG_DC=800)
+    assert net["OPF_converged"]
+    assert abs(100 * net.res_gen.p_kw.values - net.res_cost) < 1e-3
+
+    # linear costs with different slopes, so that the dispatch is unique
+    net = pn.case30()
+    net.polynomial_cost.c = [np.array([[0., c[0][1] * (1 + 1e-2 * i), 0.]])
+                             for i, c in enumerate(net.polynomial_cost.c)]
+    pp.rundcopp(net)
+    cost, res_bus, res_gen = net.res_cost, net.res_bus.copy(), net.res_gen.copy()
+    pp.rundcopp(net, OPF_ALG_DC=800)
+    assert np.isclose(net.res_cost, cost)
+    assert np.allclose(net.res_bus.lam_p.values, res_bus.lam_p.values)
+    assert np.allclose(net.res_bus.va_degree.values, res_bus.va_degree.values)
+    assert np.allclose(net.res_gen.p_kw.values, res_gen.p_kw.values, atol=1e-3)
+
+    net = pn.case30()
+    with pytest.raises(ValueError):
+        pp.rundcopp(net, OPF_ALG_DC=800)
+
+
+def test_opf_model_sparse_assembly():
+    om = opf_model({})
+    om.add_vars("a", 2)
+    om.add_vars("b", 3)
+    om.add_vars("c", 1)
+    om.add_constraints("ca", np.array([[1., 2.]]), np.array([0.]), np.array([1.]), ["a"])
+    om.add_constraints("cbc", sparse(np.array([[0., 3., 0., 4.], [5., 0., 0., 0.]])),
+                       np.array([-1., -2.]), np.array([1., 2.]), ["b", "c"])
+    om.add_costs("cost", {"N": sparse(np.array([[1., 0., 2.], [0., 1., 0.]])),
+                          "Cw": np.array([1., 2.]), "H": sparse(np.array([[0., 1.], [1., 0.]]))},
+                 ["c", "a"])
+
+    A, l, u = om.linear_constraints()
+    assert issparse(A)
+    assert np.array_equal(A.toarray(), [[1, 2, 0, 0, 0, 0],
+                                        [0, 0, 0, 3, 0, 4],
+                                        [0, 0, 5, 0, 0, 0]])
+    assert np.array_equal(l, [0, -1, -2])
+    assert np.array_equal(u, [1, 1, 2])
+
+    om.build_cost_params()
+    cp = om.get_cost_params()
+    assert issparse(cp["N"]) and issparse(cp["H"])
+    assert np.array_equal(cp["N"].toarray(), [[0, 2, 0, 0, 0, 1],
+                                              [1, 0, 0, 0, 0, 0]])
+    assert np.array_equal(cp["H"].toarray(), [[0, 1], [1, 0]])
+    assert np.array_equal(cp["Cw"], [1, 2])
+
+    A, l, u = opf_model({}).linear_constraints()
+    assert A is None and len(l) == 0 and len(u) == 0
+
+
+def test_opf_warm_start():
+    net = pn.case30()
+    pp.runopp(net)
+    net.load.p_kw *= 1.05
+    pp.runopp(net)
+    cost_flat, iterations_flat = net.res_cost, net._ppc_opf["iterations"]
+    net.load.p_kw /= 1.05
+    pp.runopp(net)
+
+    # warm start from the solution of the previous load
+    net.load.p_kw *= 1.05
+    pp.runopp(net, init="results")
+    assert net["OPF_converged"]
+    assert net._ppc_opf["iterations"] < iterations_flat
+    assert np.isclose(net.res_cost, cost_flat, rtol=1e-6)
+
+    # different constraints, the opf is started from the flat start
+    net.line.in_service.at[0] = False
+    pp.runopp(net, init="results")
+    cost_warm, iterations_warm = net.res_cost, net._ppc_opf["iterations"]
+    pp.runopp(net)
+    assert net._ppc_opf["iterations"] == iterations_warm
+    assert np.isclose(net.res_cost, cost_warm)
+
+
+def test_opf_kkt_solvers():
+    net = pn.case30()
+    pp.runopp(net, PDIPM_LINSOLVE="spsolve")
+    cost, iterations = net.res_cost, net._ppc_opf["iterations"]
+    res_bus = net.res_bus.copy()
+
+    # the cached ordering of the default solver gives the same steps
+    pp.runopp(net)
+    assert net._ppc_opf["iterations"] == iterations
+    assert np.isclose(net.res_cost, cost)
+    assert np.allclose(net.res_bus.values, res_bus.values)
+
+    # a solver object, e.g. a wrapper of another factorization
+    class CountingSolver(SpsolveKKTSolver):
+        calls = 0
+
+        def solve(self, M, dg, b):
+            CountingSolver.calls += 1
+            return SpsolveKKTSolver.solve(self, M, dg, b)
+    pp.runopp(net, PDIPM_LINSOLVE=CountingSolver())
+    assert CountingSolver.calls == iterations
+    assert np.isclose(net.res_cost, cost)
+
+    # the dense symmetric indefinite factorization of scipy >= 1.1
+    if hasattr(scipy.linalg, "ldl"):
+        pp.runopp(net, PDIPM_LINSOLVE="ldl")
+        assert net._ppc_opf["iterations"] == iterations
+        assert np.isclose(net.res_cost, cost)
+        assert np.allclose(net.res_bus.values, res_bus.values)
+
+    with pytest.raises(ValueError):
+        pp.runopp(net, PDIPM_LINSOLVE="mumps")
+
+
 def test_opf_varying_max_line_loading():
     """ Testing a  simple network with transformer for loading
     constraints with OPF using a generator """
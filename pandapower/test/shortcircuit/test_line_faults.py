@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import numpy as np
+import pytest
+
+import pandapower as pp
+import pandapower.shortcircuit as sc
+
+
+def ring_network(position=None):
+    net = pp.create_empty_network()
+    b0 = pp.create_bus(net, 220)
+    b1 = pp.create_bus(net, 110)
+    b2 = pp.create_bus(net, 110)
+    b3 = pp.create_bus(net, 110)
+    pp.create_ext_grid(net, b0, s_sc_max_mva=100., s_sc_min_mva=80., rx_min=0.4, rx_max=0.4)
+    pp.create_transformer(net, b0, b1, "100 MVA 220/110 kV")
+    pp.create_line(net, b1, b2, std_type="305-AL1/39-ST1A 110.0", length_km=20.)
+    if position is None:
+        pp.create_line(net, b2, b3, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV", length_km=15.)
+    else:
+        # the line is split at the fault position
+        b4 = pp.create_bus(net, 110)
+        pp.create_line(net, b2, b4, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV",
+                       length_km=15. * position)
+        pp.create_line(net, b4, b3, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV",
+                       length_km=15. * (1 - position))
+    pp.create_line(net, b3, b1, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV", length_km=10.)
+    pp.create_sgen(net, b3, p_kw=-5e3, sn_kva=10e3, k=1.2)
+    return net
+
+
+def test_faults_along_line():
+    net = ring_network()
+    positions = [0.2, 0.6]
+    res = sc.calc_sc_along_lines(net, line=1, positions=positions, ip=True, ith=True)
+    assert list(res.columns) == ["ikss_ka", "ip_ka", "ith_ka", "ikss_from_ka", "ikss_to_ka"]
+    assert res.index.names == ["line", "position"]
+    for position in positions:
+        net_split = ring_network(position)
+        sc.calc_sc(net_split, ip=True, ith=True, branch_results=True, return_all_currents=True)
+        res_bus_sc = net_split.res_bus_sc.loc[4]
+        assert np.allclose(res.loc[(1, position), ["ikss_ka", "ip_ka", "ith_ka"]].values,
+                           res_bus_sc[["ikss_ka", "ip_ka", "ith_ka"]].values)
+        # currents of the line segments for the fault at the split position
+        assert np.isclose(res.ikss_from_ka.loc[(1, position)],
+                          net_split.res_line_sc.ikss_ka.loc[(1, 4)])
+        assert np.isclose(res.ikss_to_ka.loc[(1, position)],
+                          net_split.res_line_sc.ikss_ka.loc[(2, 4)])
+
+
+def test_faults_at_line_ends():
+    net = ring_network()
+    net.line["endtemp_degree"] = 80.
+    res = sc.calc_sc_along_lines(net, positions=[0, 1], case="min", ip=True, topology="radial")
+    sc.calc_sc(net, case="min", ip=True, topology="radial")
+    assert np.allclose(res.xs(0., level="position").ikss_ka.values,
+                       net.res_bus_sc.ikss_ka.loc[net.line.from_bus].values)
+    assert np.allclose(res.xs(1., level="position").ip_ka.values,
+                       net.res_bus_sc.ip_ka.loc[net.line.to_bus].values)
+
+    net.line.in_service.at[0] = False
+    res = sc.calc_sc_along_lines(net, positions=[0.5])
+    assert np.all(np.isnan(res.loc[0].values))
+    with pytest.raises(ValueError):
+        sc.calc_sc_along_lines(net, positions=[1.5])
+
+
+if __name__ == '__main__':
+    pytest.main(["test_line_faults.py"])
@@ -6,10 +6,13 @@
 
 import os
 
+import networkx as nx
+import numpy as np
 import pytest
 
 import pandapower as pp
 import pandapower.shortcircuit as sc
+from pandapower.shortcircuit.kappa import nxgraph_from_ppc
 
 
 @pytest.fixture
@@ -168,5 +171,41 @@ def test_min_6_meshed_grid(meshed_grid):
     assert (abs(net.res_bus_sc.ith_ka.at[8] - 1.058954) <1e-5)
     assert (abs(net.res_bus_sc.ith_ka.at[9] - 0.9327717) <1e-5)
 
+def test_kappa_correction_auto():
+    net = pp.create_empty_network()
+    b = pp.create_buses(net, 8, vn_kv=20.)
+    pp.create_ext_grid(net, b[0], s_sc_max_mva=500., rx_max=0.1)
+    pp.create_ext_grid(net, b[5], s_sc_max_mva=200., rx_max=0.2)
+    # ring over b1-b4 with overhead lines, a cable ring b5-b7 and a radial cable from b4 to b5
+    for fb, tb, r, x in [(0, 1, .1, .4), (1, 2, .1, .4), (2, 3, .3, .3), (3, 1, .1, .4),
+                         (3, 4, .2, .1), (4, 5, .3, .1), (5, 6, .3, .1), (6, 7, .3, .1),
+                         (7, 5, .3, .1), (3, 4, .2, .1)]:
+        pp.create_line_from_parameters(net, b[fb], b[tb], 2., r, x, 0., 1.)
+    net.line["endtemp_degree"] = 80.
+
+    # reference: search of all paths to the voltage sources
+    sc.calc_sc(net, ip=True, kappa_method="B", topology="meshed")
+    ppc = net._ppc
+    mg = nxgraph_from_ppc(net, ppc)
+    kappa_korr = np.ones(len(net.bus))
+    for bidx in net.bus.index:
+        ppc_bus = net._pd2ppc_lookups["bus"][bidx]
+        paths = list(nx.all_simple_paths(mg, ppc_bus, "earth"))
+        if len(paths) > 1:
+            kappa_korr[bidx] = 1.15
+            for path in paths:
+                r = sum([mg[b1][b2][0]["r"] for b1, b2 in zip(path, path[1:])])
+                x = sum([mg[b1][b2][0]["x"] for b1, b2 in zip(path, path[1:])])
+                if r / x < .3:
+                    kappa_korr[bidx] = 1.
+                    break
+    ip_meshed = net.res_bus_sc.ip_ka.values
+    sc.calc_sc(net, ip=True, kappa_method="B", topology="radial")
+    ip_radial = net.res_bus_sc.ip_ka.values
+    sc.calc_sc(net, ip=True, kappa_method="B", topology="auto")
+    assert not np.allclose(kappa_korr, 1.) and not np.allclose(kappa_korr, 1.15)
+    assert np.allclose(net.res_bus_sc.ip_ka.values,
+                       np.where(kappa_korr > 1, ip_meshed, ip_radial))
+
 if __name__ == '__main__':
     pytest.main(['-xs'])
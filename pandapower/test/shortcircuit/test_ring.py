@@ -42,6 +42,27 @@ def test_branch_results_closed_ring(ring_network):
     assert np.allclose(net.res_trafo_sc.ikss_lv_ka.values, [0.47705988])
     assert np.allclose(net.res_line_sc.ikss_ka.values, [0.17559325, 0.29778739, 0.40286545])
 
+def test_branch_results_all_currents(ring_network):
+    net = ring_network
+    net.switch.closed = True
+    sc.calc_sc(net, branch_results=True, ip=True, ith=True)
+    res_line_sc = net.res_line_sc.copy()
+    res_trafo_sc = net.res_trafo_sc.copy()
+
+    sc.calc_sc(net, branch_results=True, ip=True, ith=True, branch_chunk_size=1, n_threads=2)
+    assert np.allclose(net.res_line_sc.values, res_line_sc.values)
+    assert np.allclose(net.res_trafo_sc.values, res_trafo_sc.values)
+
+    sc.calc_sc(net, branch_results=True, ip=True, ith=True, return_all_currents=True,
+               branch_chunk_size=3)
+    assert net.res_line_sc.index.names == ["line", "bus"]
+    assert len(net.res_line_sc) == len(net.line) * len(net.bus)
+    assert np.allclose(net.res_line_sc.groupby(level="line").max().values, res_line_sc.values)
+    assert np.allclose(net.res_trafo_sc.groupby(level="trafo").max().values,
+                       res_trafo_sc.values)
+    # the current through the transformer is the short-circuit current for faults at its lv side
+    assert np.isclose(net.res_trafo_sc.ikss_lv_ka.loc[(0, 1)], net.res_bus_sc.ikss_ka.at[1])
+
 def test_kappa_methods(ring_network):
     net = ring_network
     net.switch.closed = True
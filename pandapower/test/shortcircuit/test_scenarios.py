@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2016-2018 by University of Kassel and Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+
+
+import copy
+
+import numpy as np
+import pytest
+
+import pandapower as pp
+import pandapower.shortcircuit as sc
+
+
+@pytest.fixture
+def ring_network():
+    net = pp.create_empty_network()
+    b0 = pp.create_bus(net, 220)
+    b1 = pp.create_bus(net, 110)
+    b2 = pp.create_bus(net, 110)
+    b3 = pp.create_bus(net, 110)
+    pp.create_ext_grid(net, b0, s_sc_max_mva=100., s_sc_min_mva=80., rx_min=0.4, rx_max=0.4)
+    pp.create_transformer(net, b0, b1, "100 MVA 220/110 kV")
+    pp.create_line(net, b1, b2, std_type="305-AL1/39-ST1A 110.0", length_km=20.)
+    l2 = pp.create_line(net, b2, b3, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV", length_km=15.)
+    pp.create_line(net, b3, b1, std_type="N2XS(FL)2Y 1x185 RM/35 64/110 kV", length_km=10.)
+    pp.create_switch(net, b3, l2, closed=False, et="l")
+    pp.create_sgen(net, b2, p_kw=-5e3, sn_kva=10e3, k=1.2)
+    return net
+
+
+@pytest.mark.parametrize("n_processes", [1, 2])
+def test_sc_scenarios(ring_network, n_processes):
+    net = ring_network
+    scenarios = {"open": {},
+                 "closed": {("switch", "closed"): {0: True}},
+                 "closed_without_sgen": {("switch", "closed"): {0: True},
+                                         ("sgen", "in_service"): {0: False}},
+                 "line_out_of_service": {("line", "in_service"): {2: False},
+                                         ("sgen", "sn_kva"): {0: 20e3}}}
+    switch = net.switch.copy()
+    results = sc.calc_sc_scenarios(net, scenarios, ip=True, branch_results=True,
+                                   n_processes=n_processes)
+    assert net.switch.equals(switch)
+    assert results["res_bus_sc"].index.names == ["scenario", "bus"]
+    assert results["res_line_sc"].index.names == ["scenario", "line"]
+    assert set(results["res_bus_sc"].index.get_level_values(0)) == set(scenarios.keys())
+
+    for name, modifications in scenarios.items():
+        net_scenario = copy.deepcopy(net)
+        for (element, column), values in modifications.items():
+            for index, value in values.items():
+                net_scenario[element].at[index, column] = value
+        sc.calc_sc(net_scenario, ip=True, branch_results=True)
+        assert np.allclose(results["res_bus_sc"].loc[name].values,
+                           net_scenario.res_bus_sc.values, equal_nan=True)
+        assert np.allclose(results["res_line_sc"].loc[name].values,
+                           net_scenario.res_line_sc.values, equal_nan=True)
+        assert np.allclose(results["res_trafo_sc"].loc[name].values,
+                           net_scenario.res_trafo_sc.values, equal_nan=True)
+
+
+def test_sc_scenarios_grouping(ring_network):
+    from pandapower.shortcircuit.scenarios import _group_scenarios
+    net = ring_network
+    scenarios = [{("sgen", "in_service"): {0: False}},
+                 {("sgen", "k"): {0: 1.5}},
+                 {("switch", "closed"): {0: True}},
+                 {("switch", "closed"): {0: True}, ("sgen", "sn_kva"): {0: 5e3}}]
+    groups = _group_scenarios(net, range(len(scenarios)), scenarios)
+    # the modifications of the current sources do not change the systems
+    assert sorted([name for name, _ in group] for _, group in groups.values()) == \
+        [[0, 1], [2, 3]]
+
+    with pytest.raises(UserWarning):
+        sc.calc_sc_scenarios(net, [{("switch", "closed"): {5: True}}])
+
+
+if __name__ == '__main__':
+    pytest.main(["test_scenarios.py"])
@@ -67,6 +67,47 @@ def test_wind_park(wind_park_example):
     assert np.isclose(net.res_bus_sc.ikss_ka.at[2], 3.9034, rtol=1e-4)
     assert np.isclose(net.res_bus_sc.ip_ka.at[2], 7.3746, rtol=1e-4)
 
+def test_fault_bus_subset(wind_park_example):
+    net = wind_park_example
+    net.line["endtemp_degree"] = 80
+    sc.calc_sc(net, ip=True, ith=True, topology="meshed")
+    res_all = net.res_bus_sc.copy()
+    sc.calc_sc(net, ip=True, ith=True, topology="meshed", bus=[4, 2])
+    assert np.array_equal(net.res_bus_sc.index.values, [4, 2])
+    assert np.allclose(net.res_bus_sc.values, res_all.loc[[4, 2]].values)
+
+    sc.calc_sc(net, branch_results=True)
+    line_all = net.res_line_sc.copy()
+    sc.calc_sc(net, branch_results=True, bus=4)
+    assert np.array_equal(net.res_bus_sc.index.values, [4])
+    assert np.isclose(net.res_bus_sc.ikss_ka.at[4], res_all.ikss_ka.at[4])
+    # the current from the grid over line 3 is maximal for a fault at bus 4
+    assert np.isclose(net.res_line_sc.ikss_ka.at[3], line_all.ikss_ka.at[3])
+
+    with pytest.raises(UserWarning):
+        sc.calc_sc(net, bus=[2, 5])
+
+def test_short_circuit_session(three_bus_example):
+    net = three_bus_example
+    runs = [dict(fault="3ph", case="max", ip=True, ith=True, branch_results=True),
+            dict(fault="2ph", case="min", ip=True, branch_results=True),
+            dict(fault="3ph", case="min", ith=True),
+            dict(fault="2ph", case="max")]
+    results = []
+    for kwargs in runs:
+        sc.calc_sc(net, **kwargs)
+        results.append((net.res_bus_sc.copy(), net.res_line_sc.copy()))
+
+    session = sc.short_circuit_session(net)
+    for kwargs, (res_bus, res_line) in zip(runs, results):
+        session.calc_sc(**kwargs)
+        assert np.array_equal(net.res_bus_sc.columns, res_bus.columns)
+        assert np.allclose(net.res_bus_sc.values, res_bus.values)
+        assert np.array_equal(net.res_line_sc.columns, res_line.columns)
+        assert np.allclose(net.res_line_sc.values, res_line.values)
+    # the bus impedance matrix is only calculated once for each case
+    assert sorted(session._systems.keys()) == ["max", "min"]
+
 if __name__ == '__main__':
     pytest.main(["test_sgen.py"])
 
@@ -42,5 +42,28 @@ def test_trafo3w_min(trafo3w_net):
     assert np.allclose(net.res_bus_sc.ip_ka.values, [0.25920083485, 1.3972274925, 3.9422963436])
     assert np.allclose(net.res_bus_sc.ith_ka.values, [0.10674893166, 0.57473904595, 1.6208335668])
 
+def test_trafo3w_xward_bus_subset(trafo3w_net):
+    net = trafo3w_net
+    pp.create_xward(net, 1, ps_kw=1000, qs_kvar=500, pz_kw=100, qz_kvar=50, r_ohm=0.5, x_ohm=5.,
+                    vm_pu=1.0)
+    sc.calc_sc(net, case="max", ip=True, branch_results=True)
+    res_all = net.res_bus_sc.copy()
+    assert np.array_equal(res_all.index.values, net.bus.index.values)
+
+    # the auxiliary buses of trafo3w and xward are not in the results of a subset of buses
+    sc.calc_sc(net, case="max", ip=True, branch_results=True, bus=[2, 0])
+    assert np.array_equal(net.res_bus_sc.index.values, [2, 0])
+    assert np.allclose(net.res_bus_sc.values, res_all.loc[[2, 0]].values)
+    assert np.array_equal(net.bus.index.values, [0, 1, 2])
+
+    session = sc.short_circuit_session(net, bus=[1])
+    session.calc_sc(case="max", ip=True)
+    assert np.allclose(net.res_bus_sc.ikss_ka.values, res_all.ikss_ka.loc[[1]].values)
+
+    results = sc.calc_sc_scenarios(net, [{("load", "in_service"): {0: False}}], case="max",
+                                   bus=[1, 2])
+    assert np.allclose(results["res_bus_sc"].loc[0].ikss_ka.values,
+                       res_all.ikss_ka.loc[[1, 2]].values)
+
 if __name__ == '__main__':   
     pytest.main(['test_trafo3w.py']) 
@@ -447,8 +447,59 @@ def dataframes_equal(x_df, y_df, tol=1.e-14, ignore_index_order=True):
 def convert_format(net):
     """
     Converts old nets to new format to ensure consistency. The converted net is returned.
+    Only the format migrations for pandapower versions newer than the version of the net
+    (net.version) are applied, so that nets saved with the current version are returned
+    unchanged without any checks. Nets without net.format_version were saved before it was
+    introduced, possibly with a pre-release of their version, so the migrations of their own
+    version are applied as well.
+    """
+    current_version = float(__version__[:3])
+    version = float(net.version) if "version" in net else 0.
+    pre_release = "format_version" not in net
+    if version >= current_version and not pre_release:
+        # sql stores the version as text
+        net.version = version
+        return net
+    # categorical columns are only set by compact_dtypes(), which also right-sizes the integers
+    categoricals = [(key, col) for key, item in net.items() if isinstance(item, pd.DataFrame)
+                    for col, dtype in item.dtypes.iteritems()
+                    if pd.api.types.is_categorical_dtype(dtype)]
+    for migration_version, migration in _format_migrations:
+        if version < migration_version or (pre_release and version == migration_version):
+            migration(net)
+    _restore_format_dtypes(net, skip_integers=len(categoricals) > 0)
+    for key, col in categoricals:
+        if col in net[key] and not pd.api.types.is_categorical_dtype(net[key][col]):
+            net[key][col] = net[key][col].astype("category")
+    net.version = current_version
+    net.format_version = __version__
+    return net
+
+
+def register_format_migration(version, migration):
     """
-    _pre_release_changes(net)
+    Registers a function which converts nets to the current format. convert_format applies it to
+    all nets which were saved with a pandapower version older than version. The migrations are
+    applied in the order in which they were registered. Nets without net.format_version, which
+    were saved before it was introduced, are converted by the migrations of their own version,
+    too.
+
+    INPUT:
+        **version** (float) - pandapower version (major.minor) which introduced the format change
+
+        **migration** (function) - function which takes the net as argument and changes it in place
+
+    EXAMPLE:
+
+        >>> def add_new_column(net):
+        >>>     net.line["new_column"] = 0.
+        >>> pp.register_format_migration(1.7, add_new_column)
+
+    """
+    _format_migrations.append((version, migration))
+
+
+def _update_format(net):
     if net.name is None:
         net.name = ""
     if "sn_kva" not in net:
@@ -533,13 +584,6 @@ def convert_format(net):
                                                          ("scaling", "f8"),
                                                          ("in_service", 'bool'),
                                                          ("type", np.dtype(object))]))
-    if "version" not in net or net.version < 1.1:
-        if "min_p_kw" in net.gen and "max_p_kw" in net.gen:
-            if np.any(net.gen.min_p_kw > net.gen.max_p_kw):
-                pmin = copy.copy(net.gen.min_p_kw.values)
-                pmax = copy.copy(net.gen.max_p_kw.values)
-                net.gen["min_p_kw"] = pmax
-                net.gen["max_p_kw"] = pmin
     if "piecewise_linear_cost" not in net:
         net["piecewise_linear_cost"] = pd.DataFrame(np.zeros(0, dtype=[("type", np.dtype(object)),
                                                                        ("element",
@@ -656,18 +700,33 @@ def convert_format(net):
         net["_pd2ppc_lookups"] = {"bus": None,
                                   "gen": None,
                                   "branch": None}
-    net.version = float(__version__[:3])
     if "std_type" not in net.trafo3w:
         net.trafo3w["std_type"] = None
 
     if "time_resolution" not in net:
         # for storages
         time_resolution = 1.0
+    if not "g_us_per_km" in net.line:
+        net.line["g_us_per_km"] = 0.
 
+
+def _swap_gen_p_limits(net):
+    if "min_p_kw" in net.gen and "max_p_kw" in net.gen:
+        if np.any(net.gen.min_p_kw > net.gen.max_p_kw):
+            pmin = copy.copy(net.gen.min_p_kw.values)
+            pmax = copy.copy(net.gen.max_p_kw.values)
+            net.gen["min_p_kw"] = pmax
+            net.gen["max_p_kw"] = pmin
+
+
+def _restore_format_dtypes(net, skip_integers=False):
     new_net = create_empty_network()
     for key, item in net.items():
         if isinstance(item, pd.DataFrame):
             for col in item.columns:
+                if skip_integers and (pd.api.types.is_categorical_dtype(item[col]) or
+                                      pd.api.types.is_integer_dtype(item[col])):
+                    continue
                 if key in new_net and col in new_net[key].columns:
                     if set(item.columns) == set(new_net[key]):
                         try:
@@ -680,9 +739,6 @@ def convert_format(net):
                     else:
                         net[key][col] = net[key][col].astype(new_net[key][col].dtype,
                                                              errors="ignore")
-    if not "g_us_per_km" in net.line:
-        net.line["g_us_per_km"] = 0.
-    return net
 
 
 def _pre_release_changes(net):
@@ -866,7 +922,6 @@ def _pre_release_changes(net):
         for std_type, parameters in net.std_types[element].items():
             if old in parameters:
                 net.std_types[element][std_type][new] = net.std_types[element][std_type].pop(old)
-    net.version = 1.0
     if "f_hz" not in net:
         net["f_hz"] = 50.
 
@@ -881,6 +936,52 @@ def _pre_release_changes(net):
     net.switch.closed = net.switch.closed.astype(bool)
 
 
+# format migrations (version, function) which are applied by convert_format in this order to nets
+# saved with an older pandapower version, see register_format_migration
+_format_migrations = [(1.6, _pre_release_changes),
+                      (1.1, _swap_gen_p_limits),
+                      (1.6, _update_format)]
+
+
+def compact_dtypes(net, columns=("name", "std_type", "type", "zone", "et")):
+    """
+    Reduces the memory footprint of the element tables of a pandapower net. The net is changed
+    in place:
+
+        - string columns given in **columns** are converted to pandas categoricals
+        - integer columns are reduced to the smallest signed integer type that holds their
+          values. Unsigned types are not used, since differences such as tp_pos - tp_mid would
+          wrap around
+        - object columns that only contain booleans are converted to bool
+
+    The create functions, convert_format and the file I/O functions keep the compact dtypes. Note
+    that a value which is not yet a category of a categorical column can only be set after adding
+    it to the categories, e.g. net.bus.name.cat.add_categories(["new name"], inplace=True).
+
+    INPUT:
+        **net** (pandapowerNet) - the pandapower net
+
+    OPTIONAL:
+        **columns** (iterable) - names of the string columns that are converted to categoricals
+
+    EXAMPLE:
+        compact_dtypes(net)
+    """
+    for element, table in net.items():
+        if element.startswith("_") or element.startswith("res") or \
+                not isinstance(table, pd.DataFrame):
+            continue
+        for col in table.columns:
+            values = table[col]
+            if values.dtype == object:
+                if col in columns:
+                    table[col] = values.astype("category")
+                elif len(values) and values.map(type).isin([bool, np.bool_]).all():
+                    table[col] = values.astype(bool)
+            elif values.dtype.kind in "iu" and len(values):
+                table[col] = pd.to_numeric(values, downcast="integer")
+
+
 def add_column_from_node_to_elements(net, column, replace, elements=None, branch_bus=None,
                                      verbose=True):
     """
@@ -6,7 +6,6 @@
 
 from itertools import combinations
 
-import networkx as nx
 import numpy as np
 
 try:
@@ -69,7 +68,8 @@ def create_nxgraph(net, respect_switches=True, include_lines=True, include_trafo
          # converts the pandapower network "net" to a MultiGraph. Open switches will be ignored.
 
     """
-
+    # networkx is imported on demand, it makes up a large part of the import time of pandapower
+    import networkx as nx
     if multi:
         mg = nx.MultiGraph()
     else:
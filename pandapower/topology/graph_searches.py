@@ -4,7 +4,6 @@
 # and Energy System Technology (IEE), Kassel. All rights reserved.
 
 
-import networkx as nx
 import pandas as pd
 
 from pandapower.topology.create_graph import create_nxgraph
@@ -120,6 +119,7 @@ def calc_distance_to_bus(net, bus, respect_switches=True, nogobuses=None,
          dist = top.calc_distance_to_bus(net, 5)
 
     """
+    import networkx as nx
     g = create_nxgraph(net, respect_switches=respect_switches,
                        nogobuses=nogobuses, notravbuses=notravbuses)
     return pd.Series(nx.single_source_dijkstra_path_length(g, bus))
@@ -152,7 +152,7 @@ def unsupplied_buses(net, mg=None, in_service_only=False, slacks=None, respect_s
 
          top.unsupplied_buses(net)
     """
-
+    import networkx as nx
     mg = mg or create_nxgraph(net, respect_switches=respect_switches)
     if slacks is None:
         slacks = set(net.ext_grid[net.ext_grid.in_service].bus.values)